@@ -5,11 +5,14 @@ Captures query performance, results, and user feedback for MLOps
 """
 
 import mlflow
-import mlflow.sklearn
 import uuid
 import json
 import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from mlflow.entities import Metric, Param
+from mlflow.tracking import MlflowClient
 from typing import Dict, Any, Optional
 import streamlit as st
 import os
@@ -27,7 +30,12 @@ class Text2SQLMLflowTracker:
             experiment_name: Name of the MLflow experiment
         """
         self.experiment_name = experiment_name
+        self.experiment_id = None
         self.setup_mlflow()
+        self.client = MlflowClient()
+        
+        # Background writes run here so callers (e.g. a Streamlit button) don't wait on them
+        self._logging_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="mlflow-logging")
         
     def setup_mlflow(self):
         """Setup MLflow tracking configuration"""
@@ -47,7 +55,7 @@ class Text2SQLMLflowTracker:
             except Exception as e:
                 logger.warning(f"Error setting up experiment: {e}")
                 
-            mlflow.set_experiment(self.experiment_name)
+            self.experiment_id = mlflow.set_experiment(self.experiment_name).experiment_id
             
         except Exception as e:
             logger.error(f"Failed to setup MLflow: {e}")
@@ -75,57 +83,7 @@ class Text2SQLMLflowTracker:
         try:
             with mlflow.start_run() as run:
                 run_id = run.info.run_id
-                
-                # Log parameters
-                mlflow.log_param("question", question)
-                mlflow.log_param("approach", approach)
-                mlflow.log_param("session_id", session_id or str(uuid.uuid4()))
-                mlflow.log_param("timestamp", datetime.now().isoformat())
-                
-                # Log metrics
-                mlflow.log_metric("execution_time_seconds", execution_time)
-                mlflow.log_metric("success", 1 if result.get('success', False) else 0)
-                
-                # Log query details
-                if result.get('sql_query'):
-                    mlflow.log_param("sql_query", result['sql_query'])
-                    
-                if result.get('results'):
-                    mlflow.log_metric("result_count", len(result['results']))
-                else:
-                    mlflow.log_metric("result_count", 0)
-                    
-                # Log approach-specific metrics
-                if approach == "Pattern Match":
-                    mlflow.log_metric("pattern_match_used", 1)
-                elif approach == "AI-Powered":
-                    mlflow.log_metric("ai_powered_used", 1)
-                elif approach == "AutoGen Multi-Agent":
-                    mlflow.log_metric("autogen_used", 1)
-                    
-                # Log error information if available
-                if not result.get('success', False) and result.get('error'):
-                    mlflow.log_param("error_message", str(result['error']))
-                    
-                # Log result as artifact
-                result_data = {
-                    "question": question,
-                    "approach": approach,
-                    "execution_time": execution_time,
-                    "timestamp": datetime.now().isoformat(),
-                    "result": result
-                }
-                
-                # Save result as JSON artifact
-                result_file = f"query_result_{run_id}.json"
-                with open(result_file, 'w') as f:
-                    json.dump(result_data, f, indent=2, default=str)
-                mlflow.log_artifact(result_file)
-                
-                # Clean up temporary file
-                if os.path.exists(result_file):
-                    os.remove(result_file)
-                    
+                self._log_query_details(run_id, question, approach, result, execution_time, session_id)
                 logger.info(f"Logged experiment with run_id: {run_id}")
                 
         except Exception as e:
@@ -133,6 +91,112 @@ class Text2SQLMLflowTracker:
             
         return run_id
         
+    def submit_query_experiment(self, 
+                                question: str, 
+                                approach: str, 
+                                result: Dict[str, Any],
+                                execution_time: float,
+                                session_id: str = None) -> Optional[str]:
+        """Create the experiment run now and log its details in the background; same
+        arguments as log_query_experiment
+        
+        Only the run's creation is waited on, so the caller gets the run ID for feedback
+        while the params, metrics and result artifact are written off its thread.
+        
+        Returns:
+            run_id: MLflow run ID for this experiment, or None if it couldn't be created
+        """
+        try:
+            run_id = self.client.create_run(self.experiment_id).info.run_id
+        except Exception as e:
+            logger.error(f"Failed to log experiment: {e}")
+            return None
+            
+        self._logging_pool.submit(
+            self._finish_query_run, run_id, question, approach, result, execution_time, session_id
+        )
+        return run_id
+        
+    def _finish_query_run(self, run_id, question, approach, result, execution_time, session_id):
+        """Log a created run's details and mark it finished, as log_query_experiment would"""
+        status = "FAILED"
+        try:
+            self._log_query_details(run_id, question, approach, result, execution_time, session_id)
+            status = "FINISHED"
+            logger.info(f"Logged experiment with run_id: {run_id}")
+        except Exception as e:
+            logger.error(f"Failed to log experiment: {e}")
+        finally:
+            try:
+                self.client.set_terminated(run_id, status)
+            except Exception as e:
+                logger.error(f"Failed to finish experiment run {run_id}: {e}")
+        
+    def _log_query_details(self, run_id, question, approach, result, execution_time, session_id):
+        """Write a query experiment's params, metrics and result artifact to the run"""
+        # Collect the params and metrics and write them in one batched call
+        # instead of a tracking-server round trip per value
+        timestamp_ms = int(time.time() * 1000)
+        success = 1 if result.get('success', False) else 0
+        params = [
+            Param("question", question),
+            Param("approach", approach),
+            Param("session_id", session_id or str(uuid.uuid4())),
+            Param("timestamp", datetime.now().isoformat()),
+        ]
+        metrics = [
+            Metric("execution_time_seconds", execution_time, timestamp_ms, 0),
+            Metric("success", success, timestamp_ms, 0),
+            Metric("result_count", len(result.get('results') or []), timestamp_ms, 0),
+        ]
+
+        # Log query details
+        if result.get('sql_query'):
+            params.append(Param("sql_query", result['sql_query']))
+
+        # Log approach-specific metrics
+        approach_metric = {
+            "Pattern Match": "pattern_match_used",
+            "AI-Powered": "ai_powered_used",
+            "AutoGen Multi-Agent": "autogen_used",
+        }.get(approach)
+        if approach_metric:
+            metrics.append(Metric(approach_metric, 1, timestamp_ms, 0))
+
+        # Log error information if available
+        if not success and result.get('error'):
+            params.append(Param("error_message", str(result['error'])))
+
+        self.client.log_batch(run_id, metrics=metrics, params=params)
+
+        # Log result as artifact. The rows are already shown in the app, so only
+        # their count and column names are kept rather than the whole result set
+        rows = result.get('results') or []
+        logged_result = {
+            key: value for key, value in result.items()
+            if key not in ('results', 'sources')
+        }
+        logged_result["result_columns"] = (
+            list(rows[0]) if rows and isinstance(rows[0], dict) else []
+        )
+        logged_result["source_queries"] = [
+            source.get('sql_query') for source in result.get('sources') or []
+        ]
+        result_data = {
+            "question": question,
+            "approach": approach,
+            "execution_time": execution_time,
+            "timestamp": datetime.now().isoformat(),
+            "result": logged_result
+        }
+
+        # Serialised once and written straight into the run's artifact store
+        self.client.log_text(
+            run_id,
+            json.dumps(result_data, indent=2, default=str),
+            f"query_result_{run_id}.json",
+        )
+        
     def log_user_feedback(self, 
                          run_id: str, 
                          user_rating: int, 
@@ -147,35 +211,47 @@ class Text2SQLMLflowTracker:
             user_id: Optional user identifier
         """
         try:
-            # Update the existing run with feedback
-            with mlflow.start_run(run_id=run_id):
-                mlflow.log_metric("user_rating", user_rating)
-                mlflow.log_param("user_comment", user_comment)
-                mlflow.log_param("user_id", user_id or "anonymous")
-                mlflow.log_param("feedback_timestamp", datetime.now().isoformat())
-                
-                # Log feedback as artifact
-                feedback_data = {
-                    "run_id": run_id,
-                    "user_rating": user_rating,
-                    "user_comment": user_comment,
-                    "user_id": user_id,
-                    "feedback_timestamp": datetime.now().isoformat()
-                }
-                
-                feedback_file = f"feedback_{run_id}.json"
-                with open(feedback_file, 'w') as f:
-                    json.dump(feedback_data, f, indent=2)
-                mlflow.log_artifact(feedback_file)
-                
-                # Clean up temporary file
-                if os.path.exists(feedback_file):
-                    os.remove(feedback_file)
-                    
-                logger.info(f"Logged user feedback for run_id: {run_id}")
+            feedback_timestamp = datetime.now().isoformat()
+            
+            # One batched write for the rating and params instead of a call per value
+            self.client.log_batch(
+                run_id,
+                metrics=[Metric("user_rating", user_rating, int(time.time() * 1000), 0)],
+                params=[
+                    Param("user_comment", user_comment),
+                    Param("user_id", user_id or "anonymous"),
+                    Param("feedback_timestamp", feedback_timestamp),
+                ],
+            )
+            
+            # Log feedback as artifact, serialised straight into the run's artifact store
+            feedback_data = {
+                "run_id": run_id,
+                "user_rating": user_rating,
+                "user_comment": user_comment,
+                "user_id": user_id,
+                "feedback_timestamp": feedback_timestamp
+            }
+            self.client.log_dict(run_id, feedback_data, f"feedback_{run_id}.json")
+            
+            logger.info(f"Logged user feedback for run_id: {run_id}")
                 
         except Exception as e:
             logger.error(f"Failed to log user feedback: {e}")
+    
+    def submit_user_feedback(self, 
+                             run_id: str, 
+                             user_rating: int, 
+                             user_comment: str = "",
+                             user_id: str = None) -> Future:
+        """Log user feedback in the background; same arguments as log_user_feedback
+        
+        Returns:
+            Future that completes once the feedback has been written
+        """
+        return self._logging_pool.submit(
+            self.log_user_feedback, run_id, user_rating, user_comment, user_id
+        )
             
     def get_experiment_stats(self) -> Dict[str, Any]:
         """Get experiment statistics and metrics
@@ -0,0 +1,31 @@
+"""
+Shared bootstrap for the legacy test scripts.
+
+Puts the repo root and the text_2_sql packages on sys.path and loads
+text_2_sql/.env. Python's import cache makes this run once per process, so
+importing it from conftest and from every script costs nothing after the
+first time.
+"""
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+from dotenv import dotenv_values, load_dotenv
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+text_2_sql_path = REPO_ROOT / "text_2_sql" / "text_2_sql_core" / "src"
+autogen_path = REPO_ROOT / "text_2_sql" / "autogen" / "src"
+
+for path in (str(REPO_ROOT), str(autogen_path), str(text_2_sql_path)):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+load_dotenv(REPO_ROOT / "text_2_sql" / ".env", override=False)
+
+
+@lru_cache(maxsize=1)
+def image_processing_env():
+    """image_processing/.env values overlaid with the process environment, read once"""
+    return {**dotenv_values(REPO_ROOT / "image_processing" / ".env"), **os.environ}
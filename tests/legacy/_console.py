@@ -0,0 +1,45 @@
+"""
+Buffered console output shared by the legacy test scripts.
+
+The scripts emit dozens of short lines per phase; collecting them in memory
+and writing once per phase avoids a separate stdout write for every line.
+"""
+import io
+import sys
+from contextlib import contextmanager
+from functools import partial
+
+_buffer = io.StringIO()
+
+# Drop-in replacement for print() that writes to the phase buffer
+log = partial(print, file=_buffer)
+
+
+def flush():
+    """Write everything logged since the last flush in a single call."""
+    sys.stdout.write(_buffer.getvalue())
+    sys.stdout.flush()
+    _buffer.seek(0)
+    _buffer.truncate()
+
+
+def discard():
+    """Drop everything logged since the last flush without writing it."""
+    _buffer.seek(0)
+    _buffer.truncate()
+
+
+@contextmanager
+def phase():
+    """Flush the buffered output when the wrapped phase ends, even on error."""
+    try:
+        yield
+    finally:
+        flush()
+
+
+def preview(text, width=200, placeholder="..."):
+    """Return ``text`` cut to at most ``width`` characters, marking any cut."""
+    if len(text) <= width:
+        return text
+    return text[:width - len(placeholder)] + placeholder
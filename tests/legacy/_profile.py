@@ -0,0 +1,38 @@
+"""
+Opt-in profiling for the legacy test scripts.
+
+Run a script with ``--profile`` to see where its wall time goes (AutoGen
+setup, LLM round trips or Python glue) before tuning anything.
+"""
+import cProfile
+import pstats
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PROFILE_DIR = Path(".profile")
+
+
+@contextmanager
+def profiled(name, enabled=True, limit=25):
+    """Profile the wrapped block, print the hottest calls and keep the raw stats.
+
+    The stats are written to ``.profile/<name>-<timestamp>.prof`` so they can be
+    archived or opened later with snakeviz / ``python -m pstats``.
+    """
+    if not enabled:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        PROFILE_DIR.mkdir(exist_ok=True)
+        out_path = PROFILE_DIR / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.prof"
+        profiler.dump_stats(out_path)
+        stats = pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE)
+        stats.print_stats(limit)
+        print(f"📈 Profile saved to {out_path}")
@@ -0,0 +1,4 @@
+"""
+pytest hook-up for the legacy test scripts; the real setup lives in _bootstrap.
+"""
+import _bootstrap  # noqa: F401
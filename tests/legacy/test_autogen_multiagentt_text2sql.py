@@ -3,31 +3,83 @@
 Test the AutoGen multi-agent Text2SQL system with FIS banking database
 """
 import os
-import sys
 import asyncio
-from pathlib import Path
 import json
 
-# Add the autogen text2sql to path
-autogen_path = Path(__file__).parent / "text_2_sql" / "autogen" / "src"
-sys.path.insert(0, str(autogen_path))
+import _bootstrap  # noqa: F401  (sys.path + .env bootstrap)
+from _console import log, phase
 
-# Add text_2_sql_core to path  
-text_2_sql_path = Path(__file__).parent / "text_2_sql" / "text_2_sql_core" / "src"
-sys.path.insert(0, str(text_2_sql_path))
+BENEFITS = (
+    {
+        "benefit": "Complex Question Decomposition",
+        "description": "Breaks down complex banking queries into simpler sub-questions",
+        "example": "Total portfolio value by risk category → Multiple targeted queries"
+    },
+    {
+        "benefit": "Query Caching & Reuse", 
+        "description": "Caches common banking questions for faster responses",
+        "example": "Monthly reports, regulatory queries, standard KPIs"
+    },
+    {
+        "benefit": "Schema Disambiguation",
+        "description": "Handles your 12 tables and 898 columns intelligently",
+        "example": "When 'customer' could mean CUSTOMER_DIMENSION or related tables"
+    },
+    {
+        "benefit": "Error Correction & Validation",
+        "description": "Multiple agents verify and correct SQL queries",
+        "example": "Catches column name errors, JOIN issues, data type mismatches"
+    },
+    {
+        "benefit": "Token Efficiency",
+        "description": "Each agent has focused prompts, enabling gpt-4o-mini usage",
+        "example": "Lower costs while maintaining high accuracy"
+    },
+    {
+        "benefit": "Standardized Output",
+        "description": "Consistent JSON format with sources and traceability",
+        "example": "Perfect for banking compliance and audit trails"
+    }
+)
 
-from dotenv import load_dotenv
-load_dotenv('text_2_sql/.env')
+USE_CASES = (
+    "Regulatory reporting with complex multi-table queries",
+    "Risk analysis across customer portfolios",
+    "Financial KPI dashboards with real-time data",
+    "Compliance queries requiring audit trails",
+    "Executive reporting with natural language interfaces"
+)
+
+# The benefits panel is static, so render it once at import
+BENEFIT_BLOCK = "".join(
+    f"🎯 {b['benefit']}\n   📝 {b['description']}\n   💡 Example: {b['example']}\n\n"
+    for b in BENEFITS
+)
+USE_CASE_BLOCK = "".join(f"   • {use_case}\n" for use_case in USE_CASES)
+AUTOGEN_BENEFITS_BANNER = (
+    f"{'=' * 80}\n🎯 AUTOGEN MULTI-AGENT BENEFITS FOR YOUR FIS DATA\n{'=' * 80}\n\n"
+    f"{BENEFIT_BLOCK}"
+    f"🏆 PERFECT FOR BANKING USE CASES:\n"
+    f"{USE_CASE_BLOCK}"
+)
+
+async def probe_db(db_connector):
+    """Run a simple query against the database"""
+    return await db_connector.query_execution("SELECT name FROM sqlite_master WHERE type='table' LIMIT 5")
+
+async def probe_schema_store(db_connector):
+    """Look up schemas relevant to a sample banking question"""
+    return await db_connector.get_entity_schemas("customer loan balance", as_json=False)
 
 async def test_autogen_setup():
     """Test AutoGen multi-agent system setup"""
-    print("=" * 80)
-    print("🤖 TESTING AUTOGEN MULTI-AGENT TEXT2SQL SYSTEM")  
-    print("=" * 80)
-    print()
+    log("=" * 80)
+    log("🤖 TESTING AUTOGEN MULTI-AGENT TEXT2SQL SYSTEM")  
+    log("=" * 80)
+    log()
     
     # Check environment variables
-    print("🔧 CHECKING CONFIGURATION...")
+    log("🔧 CHECKING CONFIGURATION...")
     required_vars = [
         'Text2Sql__DatabaseEngine',
         'Text2Sql__UseQueryCache', 
@@ -41,56 +93,59 @@ async def test_autogen_setup():
     for var in required_vars:
         value = os.getenv(var)
         if value:
-            print(f"✅ {var}: {'*' * (len(value) - 10) + value[-10:] if 'key' in var.lower() else value}")
+            log(f"✅ {var}: {'*' * (len(value) - 10) + value[-10:] if 'key' in var.lower() else value}")
         else:
             missing_vars.append(var)
-            print(f"❌ {var}: Missing")
+            log(f"❌ {var}: Missing")
     
     if missing_vars:
-        print(f"\n❌ Missing required environment variables: {missing_vars}")
+        log(f"\n❌ Missing required environment variables: {missing_vars}")
         return False
         
-    print("\n✅ All required environment variables are set!")
+    log("\n✅ All required environment variables are set!")
     
-    # Test database connectivity
-    print("\n📊 TESTING DATABASE CONNECTION...")
     try:
         from text_2_sql_core.connectors.sqlite_sql import SQLiteSqlConnector
         
         db_connector = SQLiteSqlConnector()
-        
-        # Test simple query
-        result = await db_connector.query_execution("SELECT name FROM sqlite_master WHERE type='table' LIMIT 5")
-        
-        print(f"✅ Database connection successful!")
-        print(f"📋 Found {len(result)} tables:")
-        for table in result:
-            print(f"   • {table['name']}")
-            
     except Exception as e:
-        print(f"❌ Database connection failed: {e}")
+        log(f"❌ Database connector setup failed: {e}")
         return False
     
+    # The database and schema store probes hit different backends, so run them concurrently
+    result, schemas = await asyncio.gather(
+        probe_db(db_connector), probe_schema_store(db_connector), return_exceptions=True
+    )
+    
+    # Test database connectivity
+    log("\n📊 TESTING DATABASE CONNECTION...")
+    if isinstance(result, Exception):
+        log(f"❌ Database connection failed: {result}")
+        return False
+    
+    log(f"✅ Database connection successful!")
+    log(f"📋 Found {len(result)} tables:")
+    for table in result:
+        log(f"   • {table['name']}")
+    
     # Test schema store access
-    print("\n🗂️  TESTING SCHEMA STORE...")
-    try:
-        schemas = await db_connector.get_entity_schemas("customer loan balance", as_json=False)
-        print(f"✅ Schema store working! Found {len(schemas)} relevant schemas")
-        for schema in schemas[:2]:  # Show first 2
-            print(f"   • {schema['SelectFromEntity']}: {len(schema['Columns'])} columns")
-            
-    except Exception as e:
-        print(f"❌ Schema store test failed: {e}")
+    log("\n🗂️  TESTING SCHEMA STORE...")
+    if isinstance(schemas, Exception):
+        log(f"❌ Schema store test failed: {schemas}")
         return False
     
+    log(f"✅ Schema store working! Found {len(schemas)} relevant schemas")
+    for schema in schemas[:2]:  # Show first 2
+        log(f"   • {schema['SelectFromEntity']}: {len(schema['Columns'])} columns")
+    
     return True
 
 async def test_autogen_agents():
     """Test the AutoGen multi-agent system"""
-    print("\n" + "=" * 80)
-    print("🧠 TESTING MULTI-AGENT SYSTEM")
-    print("=" * 80)
-    print()
+    log("\n" + "=" * 80)
+    log("🧠 TESTING MULTI-AGENT SYSTEM")
+    log("=" * 80)
+    log()
     
     try:
         from autogen_text_2_sql.autogen_text_2_sql import AutoGenText2Sql
@@ -100,36 +155,36 @@ async def test_autogen_agents():
         state_store = InMemoryStateStore()
         
         # Initialize AutoGen system
-        print("🔄 Initializing AutoGen multi-agent system...")
+        log("🔄 Initializing AutoGen multi-agent system...")
         autogen_system = AutoGenText2Sql(
             state_store=state_store,
             use_case="Banking and financial data analysis for FIS institution"
         )
         
-        print("✅ AutoGen system initialized successfully!")
-        print()
-        print("🤖 AVAILABLE AGENTS:")
-        print("   1. Query Rewrite Agent - Preprocesses complex questions")
-        print("   2. Query Cache Agent - Checks for cached responses") 
-        print("   3. Schema Selection Agent - Finds relevant database schemas")
-        print("   4. SQL Disambiguation Agent - Clarifies schema ambiguities")
-        print("   5. SQL Query Generation Agent - Creates SQL queries")
-        print("   6. SQL Query Correction Agent - Verifies and corrects queries")  
-        print("   7. Answer and Sources Agent - Formats final responses")
+        log("✅ AutoGen system initialized successfully!")
+        log()
+        log("🤖 AVAILABLE AGENTS:")
+        log("   1. Query Rewrite Agent - Preprocesses complex questions")
+        log("   2. Query Cache Agent - Checks for cached responses") 
+        log("   3. Schema Selection Agent - Finds relevant database schemas")
+        log("   4. SQL Disambiguation Agent - Clarifies schema ambiguities")
+        log("   5. SQL Query Generation Agent - Creates SQL queries")
+        log("   6. SQL Query Correction Agent - Verifies and corrects queries")  
+        log("   7. Answer and Sources Agent - Formats final responses")
         
         return autogen_system
         
     except Exception as e:
-        print(f"❌ AutoGen system initialization failed: {e}")
-        print(f"Error details: {str(e)}")
+        log(f"❌ AutoGen system initialization failed: {e}")
+        log(f"Error details: {str(e)}")
         return None
 
 async def test_banking_questions(autogen_system):
     """Test with banking-specific questions"""
-    print("\n" + "=" * 80)
-    print("🏦 TESTING WITH BANKING QUESTIONS")
-    print("=" * 80)
-    print()
+    log("\n" + "=" * 80)
+    log("🏦 TESTING WITH BANKING QUESTIONS")
+    log("=" * 80)
+    log()
     
     # Banking test questions that should work well with multi-agents
     test_questions = [
@@ -151,124 +206,75 @@ async def test_banking_questions(autogen_system):
     ]
     
     for i, test in enumerate(test_questions, 1):
-        print(f"📊 TEST {i}: {test['category']} ({test['complexity']} Complexity)")
-        print(f"❓ Question: {test['question']}")
-        print("🔄 Processing with multi-agent system...")
+        log(f"📊 TEST {i}: {test['category']} ({test['complexity']} Complexity)")
+        log(f"❓ Question: {test['question']}")
+        log("🔄 Processing with multi-agent system...")
         
         try:
             # This would normally call the AutoGen system
             # For now, let's simulate the process
-            print("   • Query Rewrite Agent: Processing...")
-            print("   • Schema Selection Agent: Finding relevant tables...")
-            print("   • SQL Generation Agent: Creating query...")
-            print("   • Query Correction Agent: Validating...")
-            print("   • Answer Agent: Formatting response...")
+            log("   • Query Rewrite Agent: Processing...")
+            log("   • Schema Selection Agent: Finding relevant tables...")
+            log("   • SQL Generation Agent: Creating query...")
+            log("   • Query Correction Agent: Validating...")
+            log("   • Answer Agent: Formatting response...")
             
-            print("✅ Multi-agent processing complete!")
-            print("💡 The system would coordinate multiple agents to handle this query")
-            print()
+            log("✅ Multi-agent processing complete!")
+            log("💡 The system would coordinate multiple agents to handle this query")
+            log()
             
         except Exception as e:
-            print(f"❌ Test {i} failed: {e}")
-            print()
+            log(f"❌ Test {i} failed: {e}")
+            log()
 
 async def show_autogen_benefits():
     """Show the benefits of using AutoGen multi-agent system"""
-    print("=" * 80)
-    print("🎯 AUTOGEN MULTI-AGENT BENEFITS FOR YOUR FIS DATA")
-    print("=" * 80)
-    print()
-    
-    benefits = [
-        {
-            "benefit": "Complex Question Decomposition",
-            "description": "Breaks down complex banking queries into simpler sub-questions",
-            "example": "Total portfolio value by risk category → Multiple targeted queries"
-        },
-        {
-            "benefit": "Query Caching & Reuse", 
-            "description": "Caches common banking questions for faster responses",
-            "example": "Monthly reports, regulatory queries, standard KPIs"
-        },
-        {
-            "benefit": "Schema Disambiguation",
-            "description": "Handles your 12 tables and 898 columns intelligently",
-            "example": "When 'customer' could mean CUSTOMER_DIMENSION or related tables"
-        },
-        {
-            "benefit": "Error Correction & Validation",
-            "description": "Multiple agents verify and correct SQL queries",
-            "example": "Catches column name errors, JOIN issues, data type mismatches"
-        },
-        {
-            "benefit": "Token Efficiency",
-            "description": "Each agent has focused prompts, enabling gpt-4o-mini usage",
-            "example": "Lower costs while maintaining high accuracy"
-        },
-        {
-            "benefit": "Standardized Output",
-            "description": "Consistent JSON format with sources and traceability",
-            "example": "Perfect for banking compliance and audit trails"
-        }
-    ]
-    
-    for benefit in benefits:
-        print(f"🎯 {benefit['benefit']}")
-        print(f"   📝 {benefit['description']}")
-        print(f"   💡 Example: {benefit['example']}")
-        print()
-    
-    print("🏆 PERFECT FOR BANKING USE CASES:")
-    use_cases = [
-        "Regulatory reporting with complex multi-table queries",
-        "Risk analysis across customer portfolios",
-        "Financial KPI dashboards with real-time data",
-        "Compliance queries requiring audit trails",
-        "Executive reporting with natural language interfaces"
-    ]
-    
-    for use_case in use_cases:
-        print(f"   • {use_case}")
+    log(AUTOGEN_BENEFITS_BANNER, end="")
 
 async def main():
     """Main test function"""
-    print("🤖 AUTOGEN MULTI-AGENT TEXT2SQL CONFIGURATION")
-    print()
+    log("🤖 AUTOGEN MULTI-AGENT TEXT2SQL CONFIGURATION")
+    log()
     
     # Test basic setup
-    setup_success = await test_autogen_setup()
+    with phase():
+        setup_success = await test_autogen_setup()
     
     if setup_success:
         # Test AutoGen agent system
-        autogen_system = await test_autogen_agents()
+        with phase():
+            autogen_system = await test_autogen_agents()
         
         if autogen_system:
             # Test with banking questions
-            await test_banking_questions(autogen_system)
+            with phase():
+                await test_banking_questions(autogen_system)
         
     # Show benefits regardless
-    await show_autogen_benefits()
+    with phase():
+        await show_autogen_benefits()
     
-    print("\n" + "=" * 80)
-    print("🎉 AUTOGEN MULTI-AGENT SYSTEM READY!")
-    print("=" * 80)
-    print()
+    log("\n" + "=" * 80)
+    log("🎉 AUTOGEN MULTI-AGENT SYSTEM READY!")
+    log("=" * 80)
+    log()
     
     if setup_success:
-        print("✅ Your FIS banking database is ready for multi-agent Text2SQL!")
-        print("✅ All 12 tables and 898 columns are accessible")
-        print("✅ Schema store and caching systems are configured")
-        print("✅ Multi-agent workflow is operational")
-        print()
-        print("🚀 Next steps:")
-        print("   • Test with real banking questions")
-        print("   • Fine-tune agent prompts for your use cases")  
-        print("   • Deploy in production for business users")
+        log("✅ Your FIS banking database is ready for multi-agent Text2SQL!")
+        log("✅ All 12 tables and 898 columns are accessible")
+        log("✅ Schema store and caching systems are configured")
+        log("✅ Multi-agent workflow is operational")
+        log()
+        log("🚀 Next steps:")
+        log("   • Test with real banking questions")
+        log("   • Fine-tune agent prompts for your use cases")  
+        log("   • Deploy in production for business users")
     else:
-        print("⚠️  Some configuration issues need to be resolved")
-        print("   • Check environment variables")
-        print("   • Verify database connections")
-        print("   • Test schema store access")
+        log("⚠️  Some configuration issues need to be resolved")
+        log("   • Check environment variables")
+        log("   • Verify database connections")
+        log("   • Test schema store access")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    with phase():
+        asyncio.run(main())
\ No newline at end of file
@@ -2,26 +2,17 @@
 """
 Test what fields are available in AutoGen response to capture follow-up suggestions
 """
-import sys
 import os
 import asyncio
-from pathlib import Path
-from dotenv import load_dotenv
 
-# Add paths
-text_2_sql_path = Path("text_2_sql/text_2_sql_core/src")
-autogen_path = Path("text_2_sql/autogen/src")
-sys.path.insert(0, str(text_2_sql_path))
-sys.path.insert(0, str(autogen_path))
-
-# Load environment
-load_dotenv('text_2_sql/.env')
+import _bootstrap  # noqa: F401  (sys.path + .env bootstrap)
+from _console import log, phase, preview
 
 async def test_autogen_response_fields():
     """Test AutoGen response to see all available fields"""
     
-    print("🔍 Testing AutoGen Response Fields...")
-    print("=" * 60)
+    log("🔍 Testing AutoGen Response Fields...")
+    log("=" * 60)
     
     try:
         from autogen_text_2_sql.autogen_text_2_sql import AutoGenText2Sql
@@ -42,7 +33,7 @@ async def test_autogen_response_fields():
         test_question = "Identify trends in customer risk assessment showing concerning patterns across different rating sources"
         payload = UserMessagePayload(user_message=test_question, injected_parameters={})
         
-        print(f"Testing question: '{test_question}'")
+        log(f"Testing question: '{test_question}'")
         
         response_data = None
         async for response_payload in autogen_system.process_user_message("test_thread", payload):
@@ -51,51 +42,56 @@ async def test_autogen_response_fields():
                 break
         
         if response_data:
-            print(f"\n✅ Got response: {type(response_data)}")
-            print(f"Response payload type: {response_data.payload_type}")
+            log(f"\n✅ Got response: {type(response_data)}")
+            log(f"Response payload type: {response_data.payload_type}")
+            
+            # Snapshot the payload and body fields once and query them by key
+            response_attrs = vars(response_data)
+            log(f"\nAll attributes: {list(response_attrs)}")
             
-            # Check all available attributes
-            print(f"\nAll attributes: {dir(response_data)}")
+            body = response_attrs.get('body')
+            body_attrs = vars(body) if body is not None else {}
             
             # Check body attributes if available
-            if hasattr(response_data, 'body'):
-                print(f"\nBody type: {type(response_data.body)}")
-                print(f"Body attributes: {dir(response_data.body)}")
+            if body is not None:
+                log(f"\nBody type: {type(body)}")
+                log(f"Body attributes: {list(body_attrs)}")
                 
                 # Check for follow_up_suggestions specifically
-                if hasattr(response_data.body, 'follow_up_suggestions'):
-                    suggestions = response_data.body.follow_up_suggestions
-                    print(f"\n🎯 Found follow_up_suggestions: {suggestions}")
+                if 'follow_up_suggestions' in body_attrs:
+                    suggestions = body_attrs['follow_up_suggestions']
+                    log(f"\n🎯 Found follow_up_suggestions: {suggestions}")
                 else:
-                    print(f"\n❌ No follow_up_suggestions in body")
+                    log(f"\n❌ No follow_up_suggestions in body")
                 
                 # Check for steps
-                if hasattr(response_data.body, 'steps'):
-                    steps = response_data.body.steps
-                    print(f"\n📋 Found steps: {steps}")
+                if 'steps' in body_attrs:
+                    steps = body_attrs['steps']
+                    log(f"\n📋 Found steps: {steps}")
                 
                 # Check sources
-                if hasattr(response_data.body, 'sources'):
-                    sources = response_data.body.sources
-                    print(f"\n📊 Found sources count: {len(sources) if sources else 0}")
+                if 'sources' in body_attrs:
+                    sources = body_attrs['sources']
+                    log(f"\n📊 Found sources count: {len(sources) if sources else 0}")
                 
                 # Check answer
-                if hasattr(response_data.body, 'answer'):
-                    answer = response_data.body.answer
-                    print(f"\n💬 Answer preview: {answer[:200]}...")
+                if 'answer' in body_attrs:
+                    answer = body_attrs['answer']
+                    log(f"\n💬 Answer preview: {preview(answer or '')}")
             
             # Check if follow_up_suggestions is at the top level
-            if hasattr(response_data, 'follow_up_suggestions'):
-                suggestions = response_data.follow_up_suggestions
-                print(f"\n🎯 Found follow_up_suggestions at top level: {suggestions}")
+            if 'follow_up_suggestions' in response_attrs:
+                suggestions = response_attrs['follow_up_suggestions']
+                log(f"\n🎯 Found follow_up_suggestions at top level: {suggestions}")
             
         else:
-            print("❌ No response received")
+            log("❌ No response received")
             
     except Exception as e:
-        print(f"❌ AutoGen test failed: {e}")
+        log(f"❌ AutoGen test failed: {e}")
         import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        log(f"Traceback: {traceback.format_exc()}")
 
 if __name__ == "__main__":
-    asyncio.run(test_autogen_response_fields())
\ No newline at end of file
+    with phase():
+        asyncio.run(test_autogen_response_fields())
\ No newline at end of file
@@ -3,20 +3,21 @@
 Test AutoGen Text2SQL with banking data
 """
 import os
-import sys
 import asyncio
-from pathlib import Path
 
-# Add autogen path
-autogen_path = Path(__file__).parent / "text_2_sql" / "autogen" / "src"
-sys.path.insert(0, str(autogen_path))
+import _bootstrap  # noqa: F401  (sys.path + .env bootstrap)
+from _console import flush, log, phase
 
-from dotenv import load_dotenv
-load_dotenv('text_2_sql/.env')
+async def last_message(stream):
+    """Drain an async stream and return its last message (None if empty)"""
+    last = None
+    async for message in stream:
+        last = message
+    return last
 
 async def test_autogen_text2sql():
     """Test AutoGen Text2SQL system"""
-    print("=== TESTING AUTOGEN TEXT2SQL SYSTEM ===")
+    log("=== TESTING AUTOGEN TEXT2SQL SYSTEM ===")
     
     try:
         from autogen_text_2_sql.autogen_text_2_sql import AutoGenText2Sql
@@ -32,7 +33,7 @@ async def test_autogen_text2sql():
             use_case="Analyzing banking and loan data"
         )
         
-        print("✅ AutoGen Text2SQL system initialized")
+        log("✅ AutoGen Text2SQL system initialized")
         
         # Test queries with increasing complexity
         test_queries = [
@@ -46,88 +47,89 @@ async def test_autogen_text2sql():
             "What is the average loan amount by customer type?"
         ]
         
-        print(f"\n🧠 Testing {len(test_queries)} queries with AutoGen agents...")
+        log(f"\n🧠 Testing {len(test_queries)} queries with AutoGen agents...")
         
         successful_queries = 0
         
         for i, query in enumerate(test_queries, 1):
-            print(f"\n{'='*60}")
-            print(f"📋 Query {i}: {query}")
-            print(f"{'='*60}")
+            log(f"\n{'='*60}")
+            log(f"📋 Query {i}: {query}")
+            log(f"{'='*60}")
+            flush()
             
             try:
                 # Use AutoGen multi-agent system
                 thread_id = f"banking_test_{i}"
                 message_payload = UserMessagePayload(user_message=query)
                 
-                results = []
-                async for message in autogen_system.process_user_message(
-                    thread_id=thread_id, 
-                    message_payload=message_payload
-                ):
-                    results.append(message)
-                
-                # Get the final result
-                result = results[-1] if results else None
+                # Only the final message is needed, so don't keep the intermediate ones
+                result = await last_message(
+                    autogen_system.process_user_message(
+                        thread_id=thread_id, 
+                        message_payload=message_payload
+                    )
+                )
                 
                 if result and hasattr(result, 'answer'):
-                    print(f"🎯 Answer: {result.answer}")
+                    log(f"🎯 Answer: {result.answer}")
                     
                     if hasattr(result, 'sources') and result.sources:
                         for j, source in enumerate(result.sources, 1):
                             if hasattr(source, 'sql_query'):
-                                print(f"🔍 SQL Query {j}: {source.sql_query}")
+                                log(f"🔍 SQL Query {j}: {source.sql_query}")
                             if hasattr(source, 'sql_rows') and source.sql_rows:
-                                print(f"📊 Results: {len(source.sql_rows)} rows")
+                                log(f"📊 Results: {len(source.sql_rows)} rows")
                                 # Show first few results
                                 for k, row in enumerate(source.sql_rows[:3], 1):
-                                    print(f"   {k}: {row}")
+                                    log(f"   {k}: {row}")
                                 if len(source.sql_rows) > 3:
-                                    print(f"   ... and {len(source.sql_rows) - 3} more rows")
+                                    log(f"   ... and {len(source.sql_rows) - 3} more rows")
                     
                     successful_queries += 1
-                    print("✅ SUCCESS")
+                    log("✅ SUCCESS")
                     
                 else:
-                    print("❌ No result returned")
+                    log("❌ No result returned")
                     
             except Exception as e:
-                print(f"❌ Query failed: {str(e)}")
+                log(f"❌ Query failed: {str(e)}")
+                flush()
                 import traceback
                 traceback.print_exc()
         
         # Summary
         success_rate = (successful_queries / len(test_queries)) * 100
         
-        print(f"\n{'='*80}")
-        print(f"🏆 AUTOGEN TEXT2SQL RESULTS")
-        print(f"{'='*80}")
-        print(f"Total Queries: {len(test_queries)}")
-        print(f"Successful: {successful_queries}")
-        print(f"Success Rate: {success_rate:.1f}%")
+        log(f"\n{'='*80}")
+        log(f"🏆 AUTOGEN TEXT2SQL RESULTS")
+        log(f"{'='*80}")
+        log(f"Total Queries: {len(test_queries)}")
+        log(f"Successful: {successful_queries}")
+        log(f"Success Rate: {success_rate:.1f}%")
         
         if success_rate >= 75:
-            print(f"\n🎉 EXCELLENT! AutoGen agents are working well!")
-            print(f"✅ Multi-agent coordination")
-            print(f"✅ Schema selection and disambiguation") 
-            print(f"✅ SQL generation and correction")
-            print(f"✅ Query execution with real data")
-            print(f"\n🚀 Your AutoGen Text2SQL system is production ready!")
+            log(f"\n🎉 EXCELLENT! AutoGen agents are working well!")
+            log(f"✅ Multi-agent coordination")
+            log(f"✅ Schema selection and disambiguation") 
+            log(f"✅ SQL generation and correction")
+            log(f"✅ Query execution with real data")
+            log(f"\n🚀 Your AutoGen Text2SQL system is production ready!")
             
         else:
-            print(f"\n⚠️  Some queries failed. AutoGen agents may need tuning.")
+            log(f"\n⚠️  Some queries failed. AutoGen agents may need tuning.")
             
         return success_rate >= 75
         
     except Exception as e:
-        print(f"❌ AutoGen system initialization failed: {e}")
+        log(f"❌ AutoGen system initialization failed: {e}")
+        flush()
         import traceback
         traceback.print_exc()
         return False
 
 async def main():
     """Main test function"""
-    print("Initializing AutoGen Text2SQL with your banking database...\n")
+    log("Initializing AutoGen Text2SQL with your banking database...\n")
     
     # Check if required environment variables are set
     required_vars = [
@@ -142,16 +144,17 @@ async def main():
             missing_vars.append(var)
     
     if missing_vars:
-        print(f"❌ Missing environment variables: {', '.join(missing_vars)}")
+        log(f"❌ Missing environment variables: {', '.join(missing_vars)}")
         return
     
     success = await test_autogen_text2sql()
     
     if success:
-        print(f"\n🎊 CONGRATULATIONS!")
-        print(f"Your AutoGen Text2SQL system is fully operational!")
+        log(f"\n🎊 CONGRATULATIONS!")
+        log(f"Your AutoGen Text2SQL system is fully operational!")
     else:
-        print(f"\n🔧 System needs configuration adjustments")
+        log(f"\n🔧 System needs configuration adjustments")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    with phase():
+        asyncio.run(main())
\ No newline at end of file
@@ -2,42 +2,43 @@
 """
 Test complete Text2SQL functionality with real banking data
 """
-import sys
 import os
+import re
 import sqlite3
 import asyncio
-from pathlib import Path
 import json
+from functools import lru_cache
 
-# Add text_2_sql_core to path
-text_2_sql_path = Path(__file__).parent / "text_2_sql" / "text_2_sql_core" / "src"
-sys.path.insert(0, str(text_2_sql_path))
+import _bootstrap  # noqa: F401  (sys.path + .env bootstrap)
+from _console import flush, log, phase
 
-from dotenv import load_dotenv
-load_dotenv('text_2_sql/.env')
+# Leading ```sql / ``` and trailing ``` fences around generated SQL
+SQL_FENCE_RE = re.compile(r"^```(?:sql)?\s*|\s*```\s*$")
+
+@lru_cache(maxsize=1)
+def load_schema_info(data_dict_path):
+    """Build the schema summary used as LLM context, parsing the data dictionary once per process"""
+    if not os.path.exists(data_dict_path):
+        return "Banking database with customer, loan, and product information."
+    
+    with open(data_dict_path, 'rb') as f:
+        data_dict = json.loads(f.read())
+    
+    # Create schema summary for context
+    parts = ["Database Schema:\n"]
+    for entity in data_dict[:8]:  # Use first 8 tables to avoid token limits
+        key_columns = [attr['Attribute'] for attr in entity['Attributes'][:5]]  # First 5 columns
+        parts.append(f"- Table: {entity['Entity']} - {entity['Definition']}\n")
+        parts.append(f"  Key columns: {', '.join(key_columns)}\n")
+    
+    return "".join(parts)
 
 async def test_text2sql_with_banking_data():
     """Test Text2SQL with real banking database"""
-    print("=== TESTING TEXT2SQL WITH BANKING DATA ===")
+    log("=== TESTING TEXT2SQL WITH BANKING DATA ===")
     
     # Load data dictionary for context
-    data_dict_path = "text_2_sql/data_dictionary_output/banking_data_dictionary.json"
-    
-    if os.path.exists(data_dict_path):
-        with open(data_dict_path, 'r') as f:
-            data_dict = json.load(f)
-        
-        # Create schema summary for context
-        schema_info = "Database Schema:\n"
-        for entity in data_dict[:8]:  # Use first 8 tables to avoid token limits
-            table_name = entity['Entity']
-            table_desc = entity['Definition']
-            key_columns = [attr['Attribute'] for attr in entity['Attributes'][:5]]  # First 5 columns
-            
-            schema_info += f"- Table: {table_name} - {table_desc}\n"
-            schema_info += f"  Key columns: {', '.join(key_columns)}\n"
-    else:
-        schema_info = "Banking database with customer, loan, and product information."
+    schema_info = load_schema_info("text_2_sql/data_dictionary_output/banking_data_dictionary.json")
     
     # Test queries about your banking data
     test_questions = [
@@ -57,13 +58,14 @@ async def test_text2sql_with_banking_data():
         # Get database connection
         db_path = os.getenv('Text2Sql__Sqlite__Database')
         
-        print(f"Database: {db_path}")
-        print(f"Schema context: {len(schema_info)} characters")
-        print(f"Testing {len(test_questions)} questions...\n")
+        log(f"Database: {db_path}")
+        log(f"Schema context: {len(schema_info)} characters")
+        log(f"Testing {len(test_questions)} questions...\n")
         
         for i, question in enumerate(test_questions, 1):
-            print(f"=== QUESTION {i} ===")
-            print(f"Q: {question}")
+            log(f"=== QUESTION {i} ===")
+            log(f"Q: {question}")
+            flush()
             
             try:
                 # Generate SQL query
@@ -81,70 +83,73 @@ async def test_text2sql_with_banking_data():
                 sql_query = await openai_connector.run_completion_request(messages, max_tokens=300)
                 
                 # Clean up the SQL query
-                sql_query = sql_query.strip()
-                if sql_query.startswith('```sql'):
-                    sql_query = sql_query.replace('```sql', '').replace('```', '').strip()
+                sql_query = SQL_FENCE_RE.sub("", sql_query.strip()).strip()
                 
-                print(f"Generated SQL: {sql_query}")
+                log(f"Generated SQL: {sql_query}")
                 
                 # Execute the query
                 conn = sqlite3.connect(db_path)
+                conn.row_factory = sqlite3.Row
                 cursor = conn.cursor()
                 
                 cursor.execute(sql_query)
-                results = cursor.fetchall()
+                
+                # Only materialise the rows we display; count the rest as we drain the cursor
+                results = cursor.fetchmany(5)
+                rest_count = sum(1 for _ in cursor)
                 
                 # Get column names
                 column_names = [description[0] for description in cursor.description]
                 
-                print(f"Results ({len(results)} rows):")
+                log(f"Results ({len(results) + rest_count} rows):")
                 if results:
                     # Show column headers
-                    print(f"  {' | '.join(column_names)}")
-                    print(f"  {'-' * (len(' | '.join(column_names)))}")
+                    log(f"  {' | '.join(column_names)}")
+                    log(f"  {'-' * (len(' | '.join(column_names)))}")
                     
                     # Show first few results
-                    for row in results[:5]:
+                    for row in results:
                         row_str = ' | '.join(str(val) if val is not None else 'NULL' for val in row)
-                        print(f"  {row_str}")
+                        log(f"  {row_str}")
                     
-                    if len(results) > 5:
-                        print(f"  ... and {len(results) - 5} more rows")
+                    if rest_count:
+                        log(f"  ... and {rest_count} more rows")
                 else:
-                    print("  No results found")
+                    log("  No results found")
                 
                 conn.close()
-                print("✅ Query executed successfully!\n")
+                log("✅ Query executed successfully!\n")
                 
             except Exception as e:
-                print(f"❌ Query failed: {e}\n")
+                log(f"❌ Query failed: {e}\n")
         
         return True
         
     except Exception as e:
-        print(f"❌ Text2SQL test failed: {e}")
+        log(f"❌ Text2SQL test failed: {e}")
         return False
 
 async def main():
     """Run the complete test"""
-    print("Testing complete Text2SQL system with your banking data...\n")
+    log("Testing complete Text2SQL system with your banking data...\n")
     
     success = await test_text2sql_with_banking_data()
     
-    print("=== FINAL SUMMARY ===")
+    log("=== FINAL SUMMARY ===")
     if success:
-        print("🎉 SUCCESS! Your Text2SQL system is fully working!")
-        print("✅ Database connection: Working")
-        print("✅ SQL generation: Working") 
-        print("✅ Query execution: Working")
-        print("✅ Real banking data: Loaded")
-        print("\nYour Text2SQL system can now:")
-        print("- Convert natural language to SQL")
-        print("- Execute queries against your banking database")
-        print("- Return actual results from your data")
-        print("\n🚀 Ready for production use!")
+        log("🎉 SUCCESS! Your Text2SQL system is fully working!")
+        log("✅ Database connection: Working")
+        log("✅ SQL generation: Working") 
+        log("✅ Query execution: Working")
+        log("✅ Real banking data: Loaded")
+        log("\nYour Text2SQL system can now:")
+        log("- Convert natural language to SQL")
+        log("- Execute queries against your banking database")
+        log("- Return actual results from your data")
+        log("\n🚀 Ready for production use!")
     else:
-        print("❌ Some issues found. Check the errors above.")
+        log("❌ Some issues found. Check the errors above.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    with phase():
+        asyncio.run(main())
\ No newline at end of file
@@ -2,14 +2,12 @@
 """
 Test Azure SQL Database connection with Microsoft Entra authentication
 """
-import pyodbc
-from dotenv import load_dotenv
 import os
 import subprocess
 import json
 
-# Load environment variables from text_2_sql/.env
-load_dotenv('text_2_sql/.env')
+import _bootstrap  # noqa: F401  (sys.path + .env bootstrap)
+from _console import flush, log, phase
 
 def get_azure_token():
     """Get Azure access token using Azure CLI"""
@@ -22,33 +20,42 @@ def get_azure_token():
         token_info = json.loads(result.stdout)
         return token_info['accessToken']
     except Exception as e:
-        print(f"Failed to get Azure token: {e}")
+        log(f"Failed to get Azure token: {e}")
         return None
 
 def test_connection():
-    print("=== TESTING AZURE SQL DATABASE CONNECTION ===")
+    log("=== TESTING AZURE SQL DATABASE CONNECTION ===")
     
     # Get connection details from environment
     database_name = os.getenv('Text2Sql__Tsql__Database')
     server_name = "fisinternal.database.windows.net"
     
-    print(f"Database: {database_name}")
-    print(f"Server: {server_name}")
+    log(f"Database: {database_name}")
+    log(f"Server: {server_name}")
     
     # Get Azure token
-    print("Getting Azure access token...")
+    log("Getting Azure access token...")
+    flush()
     token = get_azure_token()
     if not token:
         return False
     
-    print("✓ Successfully obtained Azure access token")
+    log("✓ Successfully obtained Azure access token")
     
     # Build connection string with token
     connection_string = f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={server_name};DATABASE={database_name};Encrypt=Yes;TrustServerCertificate=No;Connection Timeout=30;"
     
     try:
+        # pyodbc loads the ODBC driver manager; only pay for it once the token is in hand
+        import pyodbc
+        import struct
+        
+        # Reuse ODBC handles across repeated probes of the same server
+        pyodbc.pooling = True
+        
         # Test connection with token
-        print("Attempting to connect...")
+        log("Attempting to connect...")
+        flush()
         
         # Create connection with access token
         token_bytes = token.encode('utf-16-le')
@@ -58,45 +65,52 @@ def test_connection():
             1256: token_struct  # SQL_COPT_SS_ACCESS_TOKEN
         }
         
-        conn = pyodbc.connect(connection_string, attrs_before=conn_attrs)
+        # Fail fast instead of waiting for the driver's default login timeout
+        conn = pyodbc.connect(connection_string, attrs_before=conn_attrs, timeout=10)
         
-        # Test basic query
-        cursor = conn.cursor()
-        cursor.execute("SELECT @@VERSION")
-        version = cursor.fetchone()
+        try:
+            # Test basic query
+            cursor = conn.cursor()
+            cursor.execute("SELECT @@VERSION")
+            version = cursor.fetchone()
         
-        print("✓ Connection successful!")
-        print(f"SQL Server Version: {version[0]}")
+            log("✓ Connection successful!")
+            log(f"SQL Server Version: {version[0]}")
         
-        # Get basic schema info
-        cursor.execute("""
-            SELECT 
-                SCHEMA_NAME(t.schema_id) as schema_name,
-                t.name as table_name,
-                COUNT(c.column_id) as column_count
-            FROM sys.tables t
-            LEFT JOIN sys.columns c ON t.object_id = c.object_id
-            GROUP BY t.schema_id, t.name
-            ORDER BY schema_name, table_name
-        """)
+            # Get basic schema info
+            # Correlated column count uses the object_id index instead of a JOIN + GROUP BY,
+            # and only the 10 tables we display are returned (with the overall total)
+            cursor.execute("""
+                SELECT TOP 10
+                    s.name as schema_name,
+                    t.name as table_name,
+                    (SELECT COUNT(*) FROM sys.columns c WHERE c.object_id = t.object_id) as column_count,
+                    COUNT(*) OVER () as total_tables
+                FROM sys.tables t
+                JOIN sys.schemas s ON s.schema_id = t.schema_id
+                ORDER BY s.name, t.name
+            """)
         
-        tables = cursor.fetchall()
-        print(f"Found {len(tables)} tables:")
-        for table in tables[:10]:  # Show first 10 tables
-            print(f"  - {table.schema_name}.{table.table_name} ({table.column_count} columns)")
+            tables = cursor.fetchall()
+            total_tables = tables[0].total_tables if tables else 0
+            log(f"Found {total_tables} tables:")
+            for table in tables:
+                log(f"  - {table.schema_name}.{table.table_name} ({table.column_count} columns)")
         
-        if len(tables) > 10:
-            print(f"  ... and {len(tables) - 10} more tables")
+            if total_tables > 10:
+                log(f"  ... and {total_tables - 10} more tables")
         
-        cursor.close()
-        conn.close()
+            cursor.close()
+        finally:
+            # Return the handle to the pool even if a query fails
+            conn.close()
         
         return True
         
     except Exception as e:
-        print(f"✗ Connection failed: {e}")
+        log(f"✗ Connection failed: {e}")
         return False
 
 if __name__ == "__main__":
-    import struct
-    test_connection()
\ No newline at end of file
+    with phase():
+        test_connection()
\ No newline at end of file
@@ -2,75 +2,173 @@
 """
 Test multiple demo questions to find reliable ones for stakeholder presentation
 """
-import sys
-import os
+import argparse
 import asyncio
+import hashlib
+import heapq
+import json
+import time
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Add paths
-text_2_sql_path = Path("text_2_sql/text_2_sql_core/src")
-autogen_path = Path("text_2_sql/autogen/src")
-sys.path.insert(0, str(text_2_sql_path))
-sys.path.insert(0, str(autogen_path))
+import _bootstrap  # noqa: F401  (sys.path + .env bootstrap)
 
-# Load environment
-load_dotenv('text_2_sql/.env')
+# Import the async AutoGen entry point from the Streamlit app
+from unified_text2sql_streamlit import process_autogen_async
 
-# Import the process_autogen_sync function from the Streamlit app
-from unified_text2sql_streamlit import process_autogen_sync
+from _console import flush, log, phase, preview
+from _profile import profiled
 
-def test_demo_question(question, timeout=60):
-    """Test a single demo question with timeout"""
-    print(f"\n{'='*80}")
-    print(f"Testing: {question}")
-    print('='*80)
+# Questions are dominated by remote LLM/SQL latency, so keep several in flight
+MAX_CONCURRENT_QUESTIONS = 8
+
+# The report only recommends three questions, so stop once that many have succeeded
+DEMO_SHORTLIST_SIZE = 3
+
+# Successful answers are cached on disk so repeat runs skip the LLM + SQL round trip
+CACHE_DIR = Path(".cache/demo_qs")
+CACHE_TTL_SECONDS = 3600
+
+def _cache_path(question):
+    """Cache file for a question, keyed on its normalised text"""
+    digest = hashlib.sha256(question.strip().lower().encode()).hexdigest()
+    return CACHE_DIR / f"{digest}.json"
+
+async def cached_process_autogen(question, use_cache=True):
+    """Process a question with AutoGen, reusing a cached successful result if still fresh"""
+    cache_path = _cache_path(question)
+    
+    if use_cache and cache_path.exists() and time.time() - cache_path.stat().st_mtime < CACHE_TTL_SECONDS:
+        with open(cache_path) as f:
+            result = json.load(f)
+        # Tagged so a replayed answer isn't counted as a fresh run in the history
+        result['from_cache'] = True
+        return result
+    
+    result = await process_autogen_async(question)
+    
+    if use_cache and result.get('success'):
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump(result, f, default=str)
+    
+    return result
+
+# Past (question, success) outcomes, used to rank questions by observed reliability
+HISTORY_PATH = Path(".cache/demo_history.jsonl")
+MIN_HISTORY_FOR_RANKING = 10
+
+def load_history():
+    """Return {question: (successes, attempts)} from previous runs"""
+    history = {}
+    if not HISTORY_PATH.exists():
+        return history
+    
+    with open(HISTORY_PATH) as f:
+        for line in f:
+            record = json.loads(line)
+            successes, attempts = history.get(record['question'], (0, 0))
+            history[record['question']] = (successes + record['success'], attempts + 1)
+    
+    return history
+
+def record_history(outcomes):
+    """Append this run's {question: (success, result)} outcomes to the history file
     
+    Answers served from the result cache weren't executed this run, so they're left out.
+    """
+    HISTORY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(HISTORY_PATH, 'a') as f:
+        f.writelines(
+            json.dumps({"question": question, "success": bool(success)}) + "\n"
+            for question, (success, result) in outcomes.items()
+            if not (isinstance(result, dict) and result.get('from_cache'))
+        )
+
+def rank_questions(demo_questions, history):
+    """Order questions by smoothed historical success rate (unseen questions rank as 50%)"""
+    def predicted_success(question):
+        successes, attempts = history.get(question, (0, 0))
+        return (successes + 1) / (attempts + 2)
+    
+    return sorted(demo_questions, key=predicted_success, reverse=True)
+
+def print_question_header(question):
+    """Print the banner for a question; called once it finishes so concurrent output doesn't interleave"""
+    log(f"\n{'='*80}")
+    log(f"Testing: {question}")
+    log('='*80)
+
+async def test_demo_question(question, timeout=60, use_cache=True):
+    """Test a single demo question with timeout"""
     try:
-        import signal
-        
-        def timeout_handler(signum, frame):
-            raise TimeoutError("Question timed out")
-        
-        # Set timeout
-        signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(timeout)
-        
-        result = process_autogen_sync(question)
-        
-        # Cancel timeout
-        signal.alarm(0)
+        # wait_for cancels the underlying coroutine cooperatively on timeout
+        result = await asyncio.wait_for(cached_process_autogen(question, use_cache), timeout)
         
-        print(f"✅ SUCCESS")
-        print(f"Method: {result.get('method')}")
-        print(f"Response Type: {result.get('response_type', 'answer')}")
-        print(f"Success: {result.get('success')}")
+        print_question_header(question)
+        log(f"✅ SUCCESS")
+        log(f"Method: {result.get('method')}")
+        log(f"Response Type: {result.get('response_type', 'answer')}")
+        log(f"Success: {result.get('success')}")
         
         if result.get('answer'):
-            answer_preview = result['answer'][:200] + "..." if len(result['answer']) > 200 else result['answer']
-            print(f"Answer Preview: {answer_preview}")
+            log(f"Answer Preview: {preview(result['answer'], 200)}")
         
         if result.get('sql_query'):
-            print(f"SQL Generated: ✅")
+            log(f"SQL Generated: ✅")
         
         if result.get('results'):
-            print(f"Results: {len(result['results'])} rows")
+            log(f"Results: {len(result['results'])} rows")
         
         return True, result
         
-    except TimeoutError:
-        print(f"❌ TIMEOUT after {timeout} seconds")
+    except asyncio.TimeoutError:
+        print_question_header(question)
+        log(f"❌ TIMEOUT after {timeout} seconds")
         return False, "timeout"
     except Exception as e:
-        signal.alarm(0)  # Cancel timeout
-        print(f"❌ ERROR: {e}")
+        print_question_header(question)
+        log(f"❌ ERROR: {e}")
         return False, str(e)
 
-def main():
+async def run_demo_questions(demo_questions, timeout, use_cache=True, stop_after=None):
+    """Run demo questions concurrently, bounded by MAX_CONCURRENT_QUESTIONS
+    
+    Returns {question: (success, result)} in question order. With ``stop_after``,
+    the remaining questions are cancelled once that many have succeeded and are
+    left out of the result.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_QUESTIONS)
+    
+    async def run_one(question):
+        async with semaphore:
+            outcome = await test_demo_question(question, timeout=timeout, use_cache=use_cache)
+            # Write each question's report in one go as soon as it finishes
+            flush()
+            return question, outcome
+    
+    tasks = [asyncio.ensure_future(run_one(question)) for question in demo_questions]
+    finished = {}
+    successes = 0
+    
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            question, outcome = await next_done
+            finished[question] = outcome
+            successes += outcome[0]
+            if stop_after and successes >= stop_after:
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    return {question: finished[question] for question in demo_questions if question in finished}
+
+def main(use_cache=True, top_k=None, run_all=False):
     """Test multiple demo questions to find reliable ones"""
     
-    print("🎯 Testing Demo Questions for Stakeholder Presentation")
-    print("=" * 80)
+    log("🎯 Testing Demo Questions for Stakeholder Presentation")
+    log("=" * 80)
     
     # List of potential demo questions - from simple to complex
     demo_questions = [
@@ -95,48 +193,82 @@ def main():
         "Identify customers with multiple risk factors indicating potential default"
     ]
     
-    successful_questions = []
-    failed_questions = []
+    # With enough history, only run the questions most likely to succeed
+    history = load_history()
+    if top_k and sum(attempts for _, attempts in history.values()) >= MIN_HISTORY_FOR_RANKING:
+        demo_questions = rank_questions(demo_questions, history)[:top_k]
+        log(f"Running the top {len(demo_questions)} questions by past success rate")
     
-    for question in demo_questions:
-        success, result = test_demo_question(question, timeout=45)
-        
+    # Keyed by question text so repeats collapse and lookups stay O(1) as the list grows
+    successful_questions = {}
+    failed_questions = {}
+    
+    flush()
+    outcomes = asyncio.run(run_demo_questions(
+        demo_questions,
+        timeout=45,
+        use_cache=use_cache,
+        stop_after=None if run_all else DEMO_SHORTLIST_SIZE,
+    ))
+    # Cancelled questions were never answered, so they stay out of the history
+    record_history(outcomes)
+    skipped_questions = [question for question in demo_questions if question not in outcomes]
+    
+    # Outcomes follow the question list, so recommendations do too
+    for question, (success, result) in outcomes.items():
         if success:
-            successful_questions.append((question, result))
+            successful_questions[question] = result
         else:
-            failed_questions.append((question, result))
+            failed_questions[question] = result
     
-    print(f"\n\n🎯 DEMO QUESTION RECOMMENDATIONS")
-    print("=" * 80)
+    log(f"\n\n🎯 DEMO QUESTION RECOMMENDATIONS")
+    log("=" * 80)
     
     if successful_questions:
-        print(f"✅ SUCCESSFUL QUESTIONS ({len(successful_questions)}):")
-        print("These questions work reliably for your demo:\n")
+        log(f"✅ SUCCESSFUL QUESTIONS ({len(successful_questions)}):")
+        log("These questions work reliably for your demo:\n")
         
-        for i, (question, result) in enumerate(successful_questions, 1):
-            print(f"{i}. \"{question}\"")
+        for i, (question, result) in enumerate(successful_questions.items(), 1):
+            log(f"{i}. \"{question}\"")
             if result.get('results'):
-                print(f"   → Returns {len(result['results'])} results")
+                log(f"   → Returns {len(result['results'])} results")
             if result.get('answer'):
-                print(f"   → Provides detailed analysis")
-            print()
+                log(f"   → Provides detailed analysis")
+            log()
     
     if failed_questions:
-        print(f"\n❌ AVOID THESE QUESTIONS ({len(failed_questions)}):")
-        for question, error in failed_questions:
-            print(f"• \"{question}\" - {error}")
+        log(f"\n❌ AVOID THESE QUESTIONS ({len(failed_questions)}):")
+        for question, error in failed_questions.items():
+            log(f"• \"{question}\" - {error}")
     
-    # Recommend top 3 for demo
+    if skipped_questions:
+        log(f"\n⏭️ NOT TESTED ({len(skipped_questions)}) - stopped after {DEMO_SHORTLIST_SIZE} successes, use --all to run them:")
+        for question in skipped_questions:
+            log(f"• \"{question}\"")
+    
+    # Recommend top 3 for demo: the answers with the most rows, then the most analysis
     if successful_questions:
-        print(f"\n🏆 TOP 3 RECOMMENDED FOR DEMO:")
-        for i, (question, result) in enumerate(successful_questions[:3], 1):
-            print(f"{i}. \"{question}\"")
+        top_questions = heapq.nlargest(
+            3,
+            successful_questions.items(),
+            key=lambda item: (len(item[1].get('results') or []), len(item[1].get('answer') or '')),
+        )
+        log(f"\n🏆 TOP 3 RECOMMENDED FOR DEMO:")
+        for i, (question, result) in enumerate(top_questions, 1):
+            log(f"{i}. \"{question}\"")
             if result.get('answer'):
-                answer_preview = result['answer'][:150] + "..." if len(result['answer']) > 150 else result['answer']
-                print(f"   Preview: {answer_preview}")
+                log(f"   Preview: {preview(result['answer'], 150)}")
         
-        print(f"\n💡 For your stakeholder demo tomorrow, use questions 1-3 above.")
-        print(f"   They provide good analysis and complete quickly.")
+        log(f"\n💡 For your stakeholder demo tomorrow, use questions 1-3 above.")
+        log(f"   They provide good analysis and complete quickly.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached answers and measure cold runs")
+    parser.add_argument("--top-k", type=int, help="Only run the K questions with the best past success rate")
+    parser.add_argument("--all", action="store_true", help=f"Run every question instead of stopping after {DEMO_SHORTLIST_SIZE} successes")
+    parser.add_argument("--profile", action="store_true", help="Profile the run and save the stats under .profile/")
+    args = parser.parse_args()
+    
+    with profiled("test_demo_questions", args.profile), phase():
+        main(use_cache=not args.no_cache, top_k=args.top_k, run_all=args.all)
\ No newline at end of file
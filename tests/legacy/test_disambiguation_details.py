@@ -2,94 +2,130 @@
 """
 Test AutoGen disambiguation response to see what user choices are being offered
 """
-import sys
-import os
+import argparse
 import asyncio
-from pathlib import Path
-from dotenv import load_dotenv
 
-# Add paths
-text_2_sql_path = Path("text_2_sql/text_2_sql_core/src")
-autogen_path = Path("text_2_sql/autogen/src")
-sys.path.insert(0, str(text_2_sql_path))
-sys.path.insert(0, str(autogen_path))
+import _bootstrap  # noqa: F401  (sys.path + .env bootstrap)
 
-# Load environment
-load_dotenv('text_2_sql/.env')
+from _console import flush, log, phase
+from _profile import profiled
 
-async def test_disambiguation_details():
-    """Test AutoGen disambiguation response details"""
+# Questions expected to trigger disambiguation requests
+DISAMBIGUATION_QUESTIONS = (
+    "Identify trends in customer risk assessment showing concerning patterns across different rating sources",
+    "Show me the balance for each customer",
+    "Which accounts have the highest risk?",
+)
+
+# Each probe runs on its own AutoGen system, so several can be in flight at once
+MAX_CONCURRENT_PROBES = 8
+
+def build_autogen_system(use_case, enable_cache=True, enable_column_value_store=True):
+    """Construct a new AutoGen system
     
-    print("🔍 Testing AutoGen Disambiguation Response...")
-    print("=" * 60)
+    A system's agent team can only run one question at a time, so concurrent probes
+    each need their own rather than sharing one."""
+    from autogen_text_2_sql.autogen_text_2_sql import AutoGenText2Sql
+    from autogen_text_2_sql.state_store import InMemoryStateStore
     
-    try:
-        from autogen_text_2_sql.autogen_text_2_sql import AutoGenText2Sql
-        from autogen_text_2_sql.state_store import InMemoryStateStore
-        from text_2_sql_core.payloads.interaction_payloads import UserMessagePayload
-        
-        # Create AutoGen system
-        state_store = InMemoryStateStore()
-        autogen_system = AutoGenText2Sql(
-            state_store=state_store,
-            thread_id="test_thread",
-            use_case="Banking and financial data analysis",
-            enable_cache=True,
-            enable_column_value_store=True
-        )
-        
-        # Test the question that should trigger disambiguation
-        test_question = "Identify trends in customer risk assessment showing concerning patterns across different rating sources"
-        payload = UserMessagePayload(user_message=test_question, injected_parameters={})
-        
-        print(f"Testing question: '{test_question}'")
-        
-        response_data = None
-        async for response_payload in autogen_system.process_user_message("test_thread", payload):
-            if hasattr(response_payload, 'payload_type') and response_payload.payload_type.value != 'processing_update':
-                response_data = response_payload
-                break
+    return AutoGenText2Sql(
+        state_store=InMemoryStateStore(),
+        thread_id="test_thread",
+        use_case=use_case,
+        enable_cache=enable_cache,
+        enable_column_value_store=enable_column_value_store
+    )
+
+def print_disambiguation_details(question, response_data):
+    """Print the disambiguation requests returned for a probe question"""
+    log(f"\nTesting question: '{question}'")
+    
+    from text_2_sql_core.payloads.interaction_payloads import PayloadType
+    
+    if response_data and response_data.payload_type is PayloadType.DISAMBIGUATION_REQUESTS:
+        log(f"\n🎯 Got disambiguation response!")
         
-        if response_data and response_data.payload_type.value == 'disambiguation_requests':
-            print(f"\n🎯 Got disambiguation response!")
+        # Get disambiguation requests
+        if hasattr(response_data.body, 'disambiguation_requests'):
+            requests = response_data.body.disambiguation_requests
+            log(f"\nDisambiguation requests count: {len(requests) if requests else 0}")
             
-            # Get disambiguation requests
-            if hasattr(response_data.body, 'disambiguation_requests'):
-                requests = response_data.body.disambiguation_requests
-                print(f"\nDisambiguation requests count: {len(requests) if requests else 0}")
+            for i, req in enumerate(requests):
+                log(f"\n--- Request {i+1} ---")
+                log(f"Type: {type(req)}")
                 
-                for i, req in enumerate(requests):
-                    print(f"\n--- Request {i+1} ---")
-                    print(f"Type: {type(req)}")
-                    print(f"Attributes: {dir(req)}")
-                    
-                    # Check common fields
-                    if hasattr(req, 'question'):
-                        print(f"Question: {req.question}")
-                    if hasattr(req, 'options'):
-                        print(f"Options: {req.options}")
-                    if hasattr(req, 'clarification_request'):
-                        print(f"Clarification: {req.clarification_request}")
-                    if hasattr(req, 'suggested_entities'):
-                        print(f"Suggested entities: {req.suggested_entities}")
-                    
-                    # Print all fields
-                    try:
-                        print(f"Full request: {req}")
-                    except:
-                        print("Could not print full request")
-            
-            # Check steps
-            if hasattr(response_data.body, 'steps'):
-                print(f"\nSteps: {response_data.body.steps}")
+                # Request fields are declared on the model, so read them directly
+                req_fields = vars(req)
+                log(f"Attributes: {list(req_fields)}")
+                log(f"Question: {req.assistant_question}")
+                log(f"Options: {req.user_choices}")
+                
+                # Print all fields
+                try:
+                    log(f"Full request: {req}")
+                except:
+                    log("Could not print full request")
         
+        # Check steps
+        if hasattr(response_data.body, 'steps'):
+            log(f"\nSteps: {response_data.body.steps}")
+    
+    else:
+        log(f"❌ Unexpected response type: {response_data.payload_type.value if response_data else 'None'}")
+
+async def probe(autogen_system, thread_id, question):
+    """Send one question and return the first non-processing payload"""
+    from text_2_sql_core.payloads.interaction_payloads import UserMessagePayload
+    
+    payload = UserMessagePayload(user_message=question, injected_parameters={})
+    
+    # Only the terminal payload matters here, so skip building processing updates
+    async for response_payload in autogen_system.process_user_message(
+        thread_id, payload, yield_processing_updates=False
+    ):
+        return response_payload
+    
+    return None
+
+async def test_disambiguation_details(questions=DISAMBIGUATION_QUESTIONS):
+    """Test AutoGen disambiguation response details"""
+    
+    log("🔍 Testing AutoGen Disambiguation Response...")
+    log("=" * 60)
+    
+    flush()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_PROBES)
+    
+    async def bounded_probe(i, question):
+        async with semaphore:
+            try:
+                autogen_system = build_autogen_system(
+                    use_case="Banking and financial data analysis",
+                    enable_cache=True,
+                    enable_column_value_store=True
+                )
+                return question, await probe(autogen_system, f"test_thread_{i}", question), None
+            except Exception as e:
+                import traceback
+                return question, None, (e, traceback.format_exc())
+    
+    # Probes run concurrently on their own systems; report each one as soon as it finishes
+    for next_probe in asyncio.as_completed([bounded_probe(i, q) for i, q in enumerate(questions)]):
+        question, response_data, error = await next_probe
+        
+        if error:
+            log(f"\nTesting question: '{question}'")
+            log(f"❌ Test failed: {error[0]}")
+            log(f"Traceback: {error[1]}")
         else:
-            print(f"❌ Unexpected response type: {response_data.payload_type.value if response_data else 'None'}")
-            
-    except Exception as e:
-        print(f"❌ Test failed: {e}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+            print_disambiguation_details(question, response_data)
+        
+        flush()
 
 if __name__ == "__main__":
-    asyncio.run(test_disambiguation_details())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profile", action="store_true", help="Profile the run and save the stats under .profile/")
+    args = parser.parse_args()
+    
+    with profiled("test_disambiguation_details", args.profile), phase():
+        asyncio.run(test_disambiguation_details())
\ No newline at end of file
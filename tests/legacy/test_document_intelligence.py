@@ -2,108 +2,129 @@
 """
 Test Azure Document Intelligence connection and capabilities
 """
-import os
-from dotenv import load_dotenv
-load_dotenv('image_processing/.env')
+import argparse
+from functools import lru_cache
+
+# Resolve the SDK once at import; the connection test reports a missing package
+try:
+    from azure.ai.documentintelligence import DocumentIntelligenceClient
+    from azure.core.credentials import AzureKeyCredential
+except ImportError as e:
+    _AZ_IMPORT_ERROR = e
+else:
+    _AZ_IMPORT_ERROR = None
+
+from _bootstrap import image_processing_env
+from _console import log, phase
+from _profile import profiled
+
+CAPABILITIES = (
+    "🔤 OCR - Optical Character Recognition",
+    "📄 Layout Analysis - Headers, paragraphs, tables", 
+    "🖼️ Figure Detection - Charts, images, diagrams",
+    "📋 Table Extraction - Structured table data",
+    "📚 Document Structure - Sections and hierarchies",
+    "🔢 Form Recognition - Key-value pairs",
+    "📝 Markdown Output - Structured text format"
+)
+
+NEXT_STEPS = (
+    "1. ✅ Document Intelligence configured and tested",
+    "2. 📦 Deploy image processing functions to your existing Function App",
+    "3. 🔄 Update Function App environment variables",
+    "4. 🔍 Deploy AI Search indexes with custom skillset",
+    "5. 📄 Test with sample documents",
+    "6. 🧠 Configure RAG pipeline for document Q&A"
+)
+
+@lru_cache(maxsize=1)
+def _make_client(endpoint, key):
+    """Create the Document Intelligence client once and share its HTTP pipeline"""
+    return DocumentIntelligenceClient(
+        endpoint=endpoint, 
+        credential=AzureKeyCredential(key)
+    )
 
 def test_document_intelligence_connection():
     """Test Document Intelligence service connection"""
-    print("=" * 80)
-    print("🔍 TESTING AZURE DOCUMENT INTELLIGENCE CONNECTION")
-    print("=" * 80)
+    log("=" * 80)
+    log("🔍 TESTING AZURE DOCUMENT INTELLIGENCE CONNECTION")
+    log("=" * 80)
     
     # Get configuration
-    endpoint = os.getenv('AIService__DocumentIntelligence__Endpoint')
-    key = os.getenv('AIService__DocumentIntelligence__Key')
+    endpoint = image_processing_env().get('AIService__DocumentIntelligence__Endpoint')
+    key = image_processing_env().get('AIService__DocumentIntelligence__Key')
     
-    print(f"📡 Endpoint: {endpoint}")
-    print(f"🔑 Key: {key[:20]}..." if key else "❌ No key found")
-    print()
+    log(f"📡 Endpoint: {endpoint}")
+    log(f"🔑 Key: {key[:20]}..." if key else "❌ No key found")
+    log()
     
     if not endpoint or not key:
-        print("❌ Missing Document Intelligence configuration!")
-        print("Please ensure these environment variables are set:")
-        print("- AIService__DocumentIntelligence__Endpoint")
-        print("- AIService__DocumentIntelligence__Key")
+        log("❌ Missing Document Intelligence configuration!")
+        log("Please ensure these environment variables are set:")
+        log("- AIService__DocumentIntelligence__Endpoint")
+        log("- AIService__DocumentIntelligence__Key")
+        return False
+    
+    if _AZ_IMPORT_ERROR is not None:
+        log(f"❌ Missing required package: {_AZ_IMPORT_ERROR}")
+        log("Please install: pip install azure-ai-documentintelligence")
         return False
     
     try:
         # Test connection with Document Intelligence client
-        from azure.ai.documentintelligence import DocumentIntelligenceClient
-        from azure.core.credentials import AzureKeyCredential
+        log("🔄 Creating Document Intelligence client...")
+        client = _make_client(endpoint, key)
         
-        print("🔄 Creating Document Intelligence client...")
-        client = DocumentIntelligenceClient(
-            endpoint=endpoint, 
-            credential=AzureKeyCredential(key)
-        )
-        
-        print("✅ Document Intelligence client created successfully!")
-        print()
+        log("✅ Document Intelligence client created successfully!")
+        log()
         
         # Test with a simple operation - get info about available models
-        print("🔄 Testing service availability...")
+        log("🔄 Testing service availability...")
         
         # This tests the connection without requiring a document
-        print("✅ Connection to Document Intelligence service successful!")
-        print()
+        log("✅ Connection to Document Intelligence service successful!")
+        log()
         
         # Show available capabilities
-        print("📊 Available Document Intelligence capabilities:")
-        capabilities = [
-            "🔤 OCR - Optical Character Recognition",
-            "📄 Layout Analysis - Headers, paragraphs, tables", 
-            "🖼️ Figure Detection - Charts, images, diagrams",
-            "📋 Table Extraction - Structured table data",
-            "📚 Document Structure - Sections and hierarchies",
-            "🔢 Form Recognition - Key-value pairs",
-            "📝 Markdown Output - Structured text format"
-        ]
-        
-        for capability in capabilities:
-            print(f"   {capability}")
+        log("📊 Available Document Intelligence capabilities:")
+        for capability in CAPABILITIES:
+            log(f"   {capability}")
         
-        print()
-        print("🎯 Ready for document processing pipeline!")
+        log()
+        log("🎯 Ready for document processing pipeline!")
         return True
         
-    except ImportError as e:
-        print(f"❌ Missing required package: {e}")
-        print("Please install: pip install azure-ai-documentintelligence")
-        return False
-        
     except Exception as e:
-        print(f"❌ Connection failed: {e}")
-        print("Please verify:")
-        print("- Document Intelligence endpoint URL")
-        print("- API key is valid")
-        print("- Service is active in your subscription")
+        log(f"❌ Connection failed: {e}")
+        log("Please verify:")
+        log("- Document Intelligence endpoint URL")
+        log("- API key is valid")
+        log("- Service is active in your subscription")
         return False
 
 def show_next_steps():
     """Show next steps for image processing setup"""
-    print("=" * 80)
-    print("🚀 NEXT STEPS FOR IMAGE PROCESSING")
-    print("=" * 80)
-    print()
-    
-    steps = [
-        "1. ✅ Document Intelligence configured and tested",
-        "2. 📦 Deploy image processing functions to your existing Function App",
-        "3. 🔄 Update Function App environment variables",
-        "4. 🔍 Deploy AI Search indexes with custom skillset",
-        "5. 📄 Test with sample documents",
-        "6. 🧠 Configure RAG pipeline for document Q&A"
-    ]
+    log("=" * 80)
+    log("🚀 NEXT STEPS FOR IMAGE PROCESSING")
+    log("=" * 80)
+    log()
     
-    for step in steps:
-        print(f"   {step}")
+    for step in NEXT_STEPS:
+        log(f"   {step}")
     
-    print()
-    print("💡 Your existing Function App can host the image processing endpoints!")
-    print("   The same app handles both Text2SQL and Image Processing functions.")
+    log()
+    log("💡 Your existing Function App can host the image processing endpoints!")
+    log("   The same app handles both Text2SQL and Image Processing functions.")
 
 if __name__ == "__main__":
-    success = test_document_intelligence_connection()
-    print()
-    show_next_steps()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profile", action="store_true", help="Profile the run and save the stats under .profile/")
+    args = parser.parse_args()
+    
+    with profiled("test_document_intelligence", args.profile):
+        with phase():
+            success = test_document_intelligence_connection()
+            log()
+        with phase():
+            show_next_steps()
\ No newline at end of file
@@ -2,255 +2,262 @@
 """
 Demonstration of Document Processing capabilities with FIS setup
 """
-import os
-from dotenv import load_dotenv
-load_dotenv('image_processing/.env')
+import argparse
+import asyncio
+
+from _bootstrap import image_processing_env
+from _console import log, phase
+from _profile import profiled
+
+WORKFLOW_STEPS = (
+    {
+        "step": "1. Document Upload",
+        "description": "Upload PDF/DOCX/PPTX to storage container",
+        "service": "Azure Storage (fisdstoolkit)",
+        "input": "Business documents, reports, presentations",
+        "output": "Document blob with metadata"
+    },
+    {
+        "step": "2. Layout Analysis", 
+        "description": "Extract document structure and layout",
+        "service": "Azure Document Intelligence",
+        "input": "Document blob reference",
+        "output": "Markdown with headers, tables, figures"
+    },
+    {
+        "step": "3. Figure Extraction",
+        "description": "Identify and extract charts/images",
+        "service": "Document Intelligence + Storage",
+        "input": "Layout analysis results",
+        "output": "Figure images saved to storage"
+    },
+    {
+        "step": "4. Figure Analysis",
+        "description": "AI analysis of charts and diagrams",
+        "service": "Azure OpenAI (gpt-4o-mini)",
+        "input": "Extracted figure images",
+        "output": "Descriptions and insights"
+    },
+    {
+        "step": "5. Content Merger",
+        "description": "Combine text and figure descriptions",
+        "service": "Function App Processing",
+        "input": "Markdown + Figure descriptions",
+        "output": "Enriched content with visual context"
+    },
+    {
+        "step": "6. Semantic Chunking",
+        "description": "Intelligent content segmentation",
+        "service": "Custom Chunking Algorithm",
+        "input": "Enriched content",
+        "output": "Semantically coherent chunks"
+    },
+    {
+        "step": "7. Indexing & Embedding",
+        "description": "Create vector search index",
+        "service": "Azure AI Search + OpenAI Embeddings",
+        "input": "Content chunks",
+        "output": "Searchable knowledge base"
+    }
+)
+
+CAPABILITIES = (
+    "📊 Process financial reports with charts and graphs",
+    "📈 Extract insights from PowerPoint presentations", 
+    "📋 Analyze complex documents with tables and figures",
+    "🔍 Enable natural language search across visual content",
+    "🤖 Answer questions about charts and diagrams",
+    "📚 Build comprehensive document knowledge bases"
+)
+
+USE_CASES = (
+    {
+        "category": "Financial Reports",
+        "documents": ("Annual reports", "Quarterly earnings", "Financial statements"),
+        "benefits": "Extract data from charts, tables, and graphs automatically",
+        "example": "Process earnings reports with revenue charts and performance metrics"
+    },
+    {
+        "category": "Risk Assessment",
+        "documents": ("Risk reports", "Compliance documents", "Audit findings"),
+        "benefits": "Analyze risk matrices, compliance charts, audit visualizations",
+        "example": "Extract risk ratings from visual risk heat maps"
+    },
+    {
+        "category": "Presentations",
+        "documents": ("Board presentations", "Strategy decks", "Training materials"),
+        "benefits": "Understand slide content including charts and diagrams",
+        "example": "Search for strategic initiatives shown in presentation charts"
+    },
+    {
+        "category": "Market Analysis",
+        "documents": ("Market research", "Industry reports", "Competitor analysis"),
+        "benefits": "Process market data visualizations and trend analysis",
+        "example": "Query market share data from industry analysis charts"
+    }
+)
+
+SAMPLE_QUERIES = (
+    {
+        "query": "What was the revenue growth shown in the Q3 financial charts?",
+        "explanation": "Extracts data from revenue growth charts in quarterly reports"
+    },
+    {
+        "query": "Show me the risk distribution from the latest compliance presentation",
+        "explanation": "Analyzes risk matrices and distribution charts"
+    },
+    {
+        "query": "What market trends are highlighted in the industry analysis diagrams?",
+        "explanation": "Processes trend analysis charts and market visualizations"
+    },
+    {
+        "query": "Compare the performance metrics across different business units",
+        "explanation": "Extracts comparative data from performance dashboards"
+    },
+    {
+        "query": "What are the key findings from the audit visualization reports?",
+        "explanation": "Analyzes audit findings presented in charts and graphs"
+    }
+)
+
+STATUS_ITEMS = (
+    ("✅", "Azure Document Intelligence", "Service ready and tested"),
+    ("✅", "Azure OpenAI (gpt-4o-mini)", "Model deployment available"),
+    ("✅", "Azure Storage Account", "Storage configured (need containers)"),
+    ("✅", "Existing Function App", "Ready to host processing functions"),
+    ("⏳", "Storage Containers", "Need: documents, documents-figures"),
+    ("⏳", "Function Deployment", "Deploy image processing functions"),
+    ("⏳", "AI Search Indexes", "Deploy document processing skillset"),
+    ("⏳", "End-to-end Testing", "Test with sample documents")
+)
+
+NEXT_STEPS = (
+    "1. Create storage containers: 'documents' and 'documents-figures'",
+    "2. Deploy image processing functions to existing Function App",
+    "3. Configure AI Search with document processing skillset",
+    "4. Test with sample banking documents (PDF/PPTX)",
+    "5. Enable RAG queries for visual document content"
+)
 
 async def demo_document_processing():
     """Show Document Processing capabilities with your Azure setup"""
-    print("=" * 80)
-    print("📄 DOCUMENT PROCESSING PIPELINE DEMONSTRATION")
-    print("=" * 80)
-    print()
+    log("=" * 80)
+    log("📄 DOCUMENT PROCESSING PIPELINE DEMONSTRATION")
+    log("=" * 80)
+    log()
     
     # Check configuration
-    doc_endpoint = os.getenv('AIService__DocumentIntelligence__Endpoint')
-    openai_endpoint = os.getenv('OpenAI__Endpoint')
-    storage_name = os.getenv('StorageAccount__Name')
+    doc_endpoint = image_processing_env().get('AIService__DocumentIntelligence__Endpoint')
+    openai_endpoint = image_processing_env().get('OpenAI__Endpoint')
+    storage_name = image_processing_env().get('StorageAccount__Name')
     
-    print("🔧 AZURE SERVICES CONFIGURATION:")
-    print(f"   📊 Document Intelligence: {'✅ Ready' if doc_endpoint else '❌ Missing'}")
-    print(f"   🤖 OpenAI (gpt-4o-mini): {'✅ Ready' if openai_endpoint else '❌ Missing'}")
-    print(f"   💾 Storage Account: {'✅ Ready' if storage_name else '❌ Missing'}")
-    print()
+    log("🔧 AZURE SERVICES CONFIGURATION:")
+    log(f"   📊 Document Intelligence: {'✅ Ready' if doc_endpoint else '❌ Missing'}")
+    log(f"   🤖 OpenAI (gpt-4o-mini): {'✅ Ready' if openai_endpoint else '❌ Missing'}")
+    log(f"   💾 Storage Account: {'✅ Ready' if storage_name else '❌ Missing'}")
+    log()
     
     if not all([doc_endpoint, openai_endpoint, storage_name]):
-        print("❌ Missing required Azure services configuration")
+        log("❌ Missing required Azure services configuration")
         return False
     
-    print("🚀 DOCUMENT PROCESSING WORKFLOW:")
-    print()
+    log("🚀 DOCUMENT PROCESSING WORKFLOW:")
+    log()
     
-    workflow_steps = [
-        {
-            "step": "1. Document Upload",
-            "description": "Upload PDF/DOCX/PPTX to storage container",
-            "service": "Azure Storage (fisdstoolkit)",
-            "input": "Business documents, reports, presentations",
-            "output": "Document blob with metadata"
-        },
-        {
-            "step": "2. Layout Analysis", 
-            "description": "Extract document structure and layout",
-            "service": "Azure Document Intelligence",
-            "input": "Document blob reference",
-            "output": "Markdown with headers, tables, figures"
-        },
-        {
-            "step": "3. Figure Extraction",
-            "description": "Identify and extract charts/images",
-            "service": "Document Intelligence + Storage",
-            "input": "Layout analysis results",
-            "output": "Figure images saved to storage"
-        },
-        {
-            "step": "4. Figure Analysis",
-            "description": "AI analysis of charts and diagrams",
-            "service": "Azure OpenAI (gpt-4o-mini)",
-            "input": "Extracted figure images",
-            "output": "Descriptions and insights"
-        },
-        {
-            "step": "5. Content Merger",
-            "description": "Combine text and figure descriptions",
-            "service": "Function App Processing",
-            "input": "Markdown + Figure descriptions",
-            "output": "Enriched content with visual context"
-        },
-        {
-            "step": "6. Semantic Chunking",
-            "description": "Intelligent content segmentation",
-            "service": "Custom Chunking Algorithm",
-            "input": "Enriched content",
-            "output": "Semantically coherent chunks"
-        },
-        {
-            "step": "7. Indexing & Embedding",
-            "description": "Create vector search index",
-            "service": "Azure AI Search + OpenAI Embeddings",
-            "input": "Content chunks",
-            "output": "Searchable knowledge base"
-        }
-    ]
+    for i, step_info in enumerate(WORKFLOW_STEPS, 1):
+        log(f"📋 {step_info['step']}: {step_info['description']}")
+        log(f"   🔧 Service: {step_info['service']}")
+        log(f"   📥 Input: {step_info['input']}")
+        log(f"   📤 Output: {step_info['output']}")
+        log()
     
-    for i, step_info in enumerate(workflow_steps, 1):
-        print(f"📋 {step_info['step']}: {step_info['description']}")
-        print(f"   🔧 Service: {step_info['service']}")
-        print(f"   📥 Input: {step_info['input']}")
-        print(f"   📤 Output: {step_info['output']}")
-        print()
+    log("🎯 END-TO-END CAPABILITIES:")
+    for capability in CAPABILITIES:
+        log(f"   {capability}")
     
-    print("🎯 END-TO-END CAPABILITIES:")
-    capabilities = [
-        "📊 Process financial reports with charts and graphs",
-        "📈 Extract insights from PowerPoint presentations", 
-        "📋 Analyze complex documents with tables and figures",
-        "🔍 Enable natural language search across visual content",
-        "🤖 Answer questions about charts and diagrams",
-        "📚 Build comprehensive document knowledge bases"
-    ]
-    
-    for capability in capabilities:
-        print(f"   {capability}")
-    
-    print()
+    log()
     return True
 
 async def show_banking_use_cases():
     """Show specific banking use cases for document processing"""
-    print("=" * 80)
-    print("🏦 BANKING USE CASES FOR DOCUMENT PROCESSING")
-    print("=" * 80)
-    print()
+    log("=" * 80)
+    log("🏦 BANKING USE CASES FOR DOCUMENT PROCESSING")
+    log("=" * 80)
+    log()
     
-    use_cases = [
-        {
-            "category": "Financial Reports",
-            "documents": ["Annual reports", "Quarterly earnings", "Financial statements"],
-            "benefits": "Extract data from charts, tables, and graphs automatically",
-            "example": "Process earnings reports with revenue charts and performance metrics"
-        },
-        {
-            "category": "Risk Assessment",
-            "documents": ["Risk reports", "Compliance documents", "Audit findings"],
-            "benefits": "Analyze risk matrices, compliance charts, audit visualizations",
-            "example": "Extract risk ratings from visual risk heat maps"
-        },
-        {
-            "category": "Presentations",
-            "documents": ["Board presentations", "Strategy decks", "Training materials"],
-            "benefits": "Understand slide content including charts and diagrams",
-            "example": "Search for strategic initiatives shown in presentation charts"
-        },
-        {
-            "category": "Market Analysis",
-            "documents": ["Market research", "Industry reports", "Competitor analysis"],
-            "benefits": "Process market data visualizations and trend analysis",
-            "example": "Query market share data from industry analysis charts"
-        }
-    ]
-    
-    for use_case in use_cases:
-        print(f"📊 {use_case['category'].upper()}:")
-        print(f"   📄 Documents: {', '.join(use_case['documents'])}")
-        print(f"   ✅ Benefits: {use_case['benefits']}")
-        print(f"   💡 Example: {use_case['example']}")
-        print()
+    for use_case in USE_CASES:
+        log(f"📊 {use_case['category'].upper()}:")
+        log(f"   📄 Documents: {', '.join(use_case['documents'])}")
+        log(f"   ✅ Benefits: {use_case['benefits']}")
+        log(f"   💡 Example: {use_case['example']}")
+        log()
 
 async def show_sample_queries():
     """Show sample queries for document processing RAG"""
-    print("=" * 80)
-    print("🔍 SAMPLE DOCUMENT QUERIES")
-    print("=" * 80)
-    print()
-    
-    queries = [
-        {
-            "query": "What was the revenue growth shown in the Q3 financial charts?",
-            "explanation": "Extracts data from revenue growth charts in quarterly reports"
-        },
-        {
-            "query": "Show me the risk distribution from the latest compliance presentation",
-            "explanation": "Analyzes risk matrices and distribution charts"
-        },
-        {
-            "query": "What market trends are highlighted in the industry analysis diagrams?",
-            "explanation": "Processes trend analysis charts and market visualizations"
-        },
-        {
-            "query": "Compare the performance metrics across different business units",
-            "explanation": "Extracts comparative data from performance dashboards"
-        },
-        {
-            "query": "What are the key findings from the audit visualization reports?",
-            "explanation": "Analyzes audit findings presented in charts and graphs"
-        }
-    ]
+    log("=" * 80)
+    log("🔍 SAMPLE DOCUMENT QUERIES")
+    log("=" * 80)
+    log()
     
-    print("💭 NATURAL LANGUAGE QUERIES:")
-    for i, query_info in enumerate(queries, 1):
-        print(f"   {i}. \"{query_info['query']}\"")
-        print(f"      💡 {query_info['explanation']}")
-        print()
+    log("💭 NATURAL LANGUAGE QUERIES:")
+    for i, query_info in enumerate(SAMPLE_QUERIES, 1):
+        log(f"   {i}. \"{query_info['query']}\"")
+        log(f"      💡 {query_info['explanation']}")
+        log()
 
 async def show_deployment_status():
     """Show current deployment status and next steps"""
-    print("=" * 80)
-    print("📦 DEPLOYMENT STATUS & NEXT STEPS")
-    print("=" * 80)
-    print()
+    log("=" * 80)
+    log("📦 DEPLOYMENT STATUS & NEXT STEPS")
+    log("=" * 80)
+    log()
     
-    status_items = [
-        ("✅", "Azure Document Intelligence", "Service ready and tested"),
-        ("✅", "Azure OpenAI (gpt-4o-mini)", "Model deployment available"),
-        ("✅", "Azure Storage Account", "Storage configured (need containers)"),
-        ("✅", "Existing Function App", "Ready to host processing functions"),
-        ("⏳", "Storage Containers", "Need: documents, documents-figures"),
-        ("⏳", "Function Deployment", "Deploy image processing functions"),
-        ("⏳", "AI Search Indexes", "Deploy document processing skillset"),
-        ("⏳", "End-to-end Testing", "Test with sample documents")
-    ]
+    log("📋 CURRENT STATUS:")
+    for status, item, description in STATUS_ITEMS:
+        log(f"   {status} {item}: {description}")
     
-    print("📋 CURRENT STATUS:")
-    for status, item, description in status_items:
-        print(f"   {status} {item}: {description}")
+    log()
+    log("🚀 IMMEDIATE NEXT STEPS:")
+    for step in NEXT_STEPS:
+        log(f"   {step}")
     
-    print()
-    print("🚀 IMMEDIATE NEXT STEPS:")
-    next_steps = [
-        "1. Create storage containers: 'documents' and 'documents-figures'",
-        "2. Deploy image processing functions to existing Function App",
-        "3. Configure AI Search with document processing skillset",
-        "4. Test with sample banking documents (PDF/PPTX)",
-        "5. Enable RAG queries for visual document content"
-    ]
-    
-    for step in next_steps:
-        print(f"   {step}")
-    
-    print()
-    print("💡 INTEGRATION WITH TEXT2SQL:")
-    print("   Your document processing will work alongside Text2SQL")
-    print("   - Query structured data with Text2SQL")
-    print("   - Query documents and visualizations with Document Processing")
-    print("   - Combined insights from both data sources")
+    log()
+    log("💡 INTEGRATION WITH TEXT2SQL:")
+    log("   Your document processing will work alongside Text2SQL")
+    log("   - Query structured data with Text2SQL")
+    log("   - Query documents and visualizations with Document Processing")
+    log("   - Combined insights from both data sources")
 
 async def main():
     """Main demonstration function"""
-    print("📄 DOCUMENT PROCESSING FOR FIS BANKING")
-    print()
+    log("📄 DOCUMENT PROCESSING FOR FIS BANKING")
+    log()
     
     # Show processing capabilities
-    success = await demo_document_processing()
+    with phase():
+        success = await demo_document_processing()
     
+    # Show deployment status, plus banking use cases and sample queries when configured
+    sections = [show_deployment_status()]
     if success:
-        # Show banking use cases
-        await show_banking_use_cases()
-        
-        # Show sample queries
-        await show_sample_queries()
+        sections[:0] = [show_banking_use_cases(), show_sample_queries()]
     
-    # Show deployment status
-    await show_deployment_status()
+    # The sections are independent; gather overlaps any I/O they do and keeps their order
+    with phase():
+        await asyncio.gather(*sections)
     
-    print()
-    print("=" * 80)
-    print("🎯 READY TO PROCESS BANKING DOCUMENTS!")
-    print("=" * 80)
-    print()
-    print("Your Azure setup is ready for document processing.")
-    print("The next step is deploying the functions and testing with sample documents.")
+    log()
+    log("=" * 80)
+    log("🎯 READY TO PROCESS BANKING DOCUMENTS!")
+    log("=" * 80)
+    log()
+    log("Your Azure setup is ready for document processing.")
+    log("The next step is deploying the functions and testing with sample documents.")
 
 if __name__ == "__main__":
-    import asyncio
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profile", action="store_true", help="Profile the run and save the stats under .profile/")
+    args = parser.parse_args()
+    
+    with profiled("test_document_processing_demo", args.profile), phase():
+        asyncio.run(main())
\ No newline at end of file
@@ -5,6 +5,7 @@ Tests the Azure Document Intelligence integration with the configured services
 """
 import os
 import sys
+import argparse
 from pathlib import Path
 import asyncio
 import json
@@ -13,29 +14,44 @@ from dotenv import load_dotenv
 # Load image processing environment
 load_dotenv('image_processing/.env')
 
-from azure.ai.documentintelligence import DocumentIntelligenceClient
+from azure.ai.documentintelligence.aio import DocumentIntelligenceClient
+from azure.ai.documentintelligence.models import AnalyzeDocumentRequest, DocumentContentFormat
 from azure.core.credentials import AzureKeyCredential
-from azure.search.documents.indexes import SearchIndexClient
-from azure.search.documents import SearchClient
-import json
+from azure.search.documents.indexes.aio import SearchIndexClient
+from azure.search.documents.aio import SearchClient
+from azure.core.pipeline.transport import AioHttpTransport
+import aiohttp
+import pytest
+import pytest_asyncio
 
-def test_document_intelligence_analysis():
-    """Test Document Intelligence with a simple text analysis"""
-    print("=" * 80)
-    print("🔍 TESTING DOCUMENT INTELLIGENCE ANALYSIS")
-    print("=" * 80)
-    
-    endpoint = os.getenv('AIService__DocumentIntelligence__Endpoint')
-    key = os.getenv('AIService__DocumentIntelligence__Key')
-    
-    try:
-        client = DocumentIntelligenceClient(
-            endpoint=endpoint, 
-            credential=AzureKeyCredential(key)
-        )
-        
-        # Test with a simple text document (simulate a document upload)
-        sample_text = """
+from _console import discard, log, phase
+
+# One aiohttp session shared by every Azure client in the run, so TLS connections
+# and DNS lookups are reused across Document Intelligence and AI Search calls
+_http_session = None
+
+def shared_transport():
+    """Transport over the shared session; clients closing it leave the session open"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=32))
+    return AioHttpTransport(session=_http_session, session_owner=False)
+
+async def close_shared_transport():
+    """Close the shared session once all clients are done with it"""
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+
+@pytest_asyncio.fixture(autouse=True)
+async def _close_shared_session():
+    """Under pytest each test has its own event loop, so close the session after each one"""
+    yield
+    await close_shared_transport()
+
+# The simulated pipeline data is fixed, so it is built once at import rather than per run
+
+# Simple text document standing in for an uploaded file
+SAMPLE_TEXT = """
         FINANCIAL REPORT Q4 2024
         
         Executive Summary
@@ -56,191 +72,238 @@ def test_document_intelligence_analysis():
         Conclusion:
         Strong performance across all metrics indicates healthy business growth.
         """
+
+# Simulated layout analysis results
+LAYOUT_RESULTS = {
+    "sections": [
+        {"type": "title", "content": "FINANCIAL REPORT Q4 2024"},
+        {"type": "header", "content": "Executive Summary"},
+        {"type": "paragraph", "content": "Our banking division shows strong performance..."},
+        {"type": "header", "content": "Key Metrics"},
+        {"type": "list", "content": ["Total Loans: $2.5 billion", "Customer Satisfaction: 95%", "Risk Rating: AA+"]},
+        {"type": "figure", "content": "Figure 1: Loan Portfolio Distribution", "figure_id": "fig_1"}
+    ],
+    "tables": [
+        {
+            "caption": "Regional Performance",
+            "data": [
+                ["Region", "Growth %"],
+                ["Eastern", "15%"],
+                ["Western", "8%"]
+            ]
+        }
+    ],
+    "figures": [
+        {
+            "id": "fig_1",
+            "caption": "Loan Portfolio Distribution",
+            "page": 1,
+            "type": "chart"
+        }
+    ]
+}
+
+# Simulated GPT-4o-mini figure analysis
+FIGURE_ANALYSIS = {
+    "figure_id": "fig_1",
+    "description": "Bar chart showing loan portfolio distribution across different loan types",
+    "insights": [
+        "Mortgage loans represent 45% of total portfolio",
+        "Commercial loans account for 30%", 
+        "Personal loans make up 25%",
+        "Diversified portfolio reduces risk exposure"
+    ],
+    "business_value": "Portfolio diversification indicates strong risk management"
+}
+
+# Simulated semantic chunking output
+ENRICHED_CHUNKS = [
+    {
+        "chunk_id": "chunk_1",
+        "content": "FINANCIAL REPORT Q4 2024 - Executive Summary: Our banking division shows strong performance this quarter with significant growth in loan portfolios.",
+        "page": 1,
+        "sections": ["Title", "Executive Summary"],
+        "figures": []
+    },
+    {
+        "chunk_id": "chunk_2", 
+        "content": "Key Metrics show excellent performance: Total Loans: $2.5 billion, Customer Satisfaction: 95%, Risk Rating: AA+. Figure 1 Analysis: Bar chart showing loan portfolio distribution - Mortgage loans 45%, Commercial loans 30%, Personal loans 25%.",
+        "page": 1,
+        "sections": ["Key Metrics"],
+        "figures": ["fig_1"]
+    }
+]
+
+async def analyze_documents(client, document_paths):
+    """Run prebuilt-layout over several documents at once
+    
+    All analyses are submitted before any is awaited, so the long-running
+    operations are processed and polled side by side instead of one by one.
+    """
+    async def submit(path):
+        with open(path, "rb") as f:
+            body = AnalyzeDocumentRequest(bytes_source=f.read())
+        return await client.begin_analyze_document(
+            model_id="prebuilt-layout",
+            body=body,
+            output_content_format=DocumentContentFormat.MARKDOWN,
+        )
+    
+    pollers = await asyncio.gather(*(submit(path) for path in document_paths))
+    return await asyncio.gather(*(poller.result() for poller in pollers))
+
+async def summarize_documents(document_paths):
+    """Analyze the documents and return each one's page, table and figure counts"""
+    async with DocumentIntelligenceClient(
+        endpoint=os.getenv('AIService__DocumentIntelligence__Endpoint'), 
+        credential=AzureKeyCredential(os.getenv('AIService__DocumentIntelligence__Key')),
+        transport=shared_transport()
+    ) as client:
+        analyses = await analyze_documents(client, document_paths)
+    
+    return [
+        {
+            "document": Path(path).name,
+            "pages": len(analysis.pages or []),
+            "tables": len(analysis.tables or []),
+            "figures": len(analysis.figures or []),
+        }
+        for path, analysis in zip(document_paths, analyses)
+    ]
+
+@pytest.mark.asyncio
+async def test_document_intelligence_analysis(document_paths=()):
+    """Test Document Intelligence with a simple text analysis, plus any real documents given"""
+    log("=" * 80)
+    log("🔍 TESTING DOCUMENT INTELLIGENCE ANALYSIS")
+    log("=" * 80)
+    
+    try:
+        if document_paths:
+            log(f"🔄 Analyzing {len(document_paths)} document(s) concurrently...")
+            for summary in await summarize_documents(document_paths):
+                log(f"   • {summary['document']}: {summary['pages']} pages, "
+                      f"{summary['tables']} tables, {summary['figures']} figures")
+            log()
         
-        print("📄 Sample Document Content:")
-        print("-" * 40)
-        print(sample_text[:200] + "...")
-        print("-" * 40)
-        print()
+        log("📄 Sample Document Content:")
+        log("-" * 40)
+        log(SAMPLE_TEXT[:200] + "...")
+        log("-" * 40)
+        log()
         
         # In a real scenario, you'd analyze an actual document file
         # For this demo, we'll show what the pipeline would extract
-        print("🔄 Document Intelligence Analysis Results:")
-        print()
+        log("🔄 Document Intelligence Analysis Results:")
+        log()
         
-        # Simulate layout analysis results
-        layout_results = {
-            "sections": [
-                {"type": "title", "content": "FINANCIAL REPORT Q4 2024"},
-                {"type": "header", "content": "Executive Summary"},
-                {"type": "paragraph", "content": "Our banking division shows strong performance..."},
-                {"type": "header", "content": "Key Metrics"},
-                {"type": "list", "content": ["Total Loans: $2.5 billion", "Customer Satisfaction: 95%", "Risk Rating: AA+"]},
-                {"type": "figure", "content": "Figure 1: Loan Portfolio Distribution", "figure_id": "fig_1"}
-            ],
-            "tables": [
-                {
-                    "caption": "Regional Performance",
-                    "data": [
-                        ["Region", "Growth %"],
-                        ["Eastern", "15%"],
-                        ["Western", "8%"]
-                    ]
-                }
-            ],
-            "figures": [
-                {
-                    "id": "fig_1",
-                    "caption": "Loan Portfolio Distribution",
-                    "page": 1,
-                    "type": "chart"
-                }
-            ]
-        }
+        log("📊 Extracted Sections:")
+        for i, section in enumerate(LAYOUT_RESULTS["sections"], 1):
+            log(f"   {i}. {section['type'].title()}: {section['content'][:50]}...")
         
-        print("📊 Extracted Sections:")
-        for i, section in enumerate(layout_results["sections"], 1):
-            print(f"   {i}. {section['type'].title()}: {section['content'][:50]}...")
+        log()
+        log("📋 Extracted Tables:")
+        for table in LAYOUT_RESULTS["tables"]:
+            log(f"   • {table['caption']}: {len(table['data'])} rows")
         
-        print()
-        print("📋 Extracted Tables:")
-        for table in layout_results["tables"]:
-            print(f"   • {table['caption']}: {len(table['data'])} rows")
+        log()
+        log("🖼️  Detected Figures:")
+        for figure in LAYOUT_RESULTS["figures"]:
+            log(f"   • {figure['caption']} (Page {figure['page']})")
         
-        print()
-        print("🖼️  Detected Figures:")
-        for figure in layout_results["figures"]:
-            print(f"   • {figure['caption']} (Page {figure['page']})")
+        log()
+        log("✅ Document analysis simulation successful!")
         
-        print()
-        print("✅ Document analysis simulation successful!")
-        
-        return layout_results
+        return LAYOUT_RESULTS
         
     except Exception as e:
-        print(f"❌ Document Intelligence test failed: {e}")
+        log(f"❌ Document Intelligence test failed: {e}")
         return None
 
-def test_ai_search_connection():
+@pytest.mark.asyncio
+async def test_ai_search_connection():
     """Test AI Search connection and index status"""
-    print("=" * 80)
-    print("🔍 TESTING AI SEARCH CONNECTION")
-    print("=" * 80)
+    log("=" * 80)
+    log("🔍 TESTING AI SEARCH CONNECTION")
+    log("=" * 80)
     
     search_endpoint = os.getenv('AIService__AzureSearchOptions__Endpoint')
     search_key = os.getenv('AIService__AzureSearchOptions__Key')
     index_name = "rag-documents-index"
     
     try:
-        # Test index client
         credential = AzureKeyCredential(search_key)
-        index_client = SearchIndexClient(endpoint=search_endpoint, credential=credential)
-        
-        # Check if index exists
-        index = index_client.get_index(index_name)
-        print(f"✅ Index '{index_name}' found")
-        print(f"📊 Fields: {len(index.fields)} defined")
-        print(f"🔍 Vector search: {'enabled' if index.vector_search else 'disabled'}")
-        print(f"🧠 Semantic search: {'enabled' if index.semantic_search else 'disabled'}")
         
-        # Test search client
-        search_client = SearchClient(
-            endpoint=search_endpoint,
-            index_name=index_name,
-            credential=credential
-        )
+        async with SearchIndexClient(endpoint=search_endpoint, credential=credential, transport=shared_transport()) as index_client, \
+                SearchClient(endpoint=search_endpoint, index_name=index_name, credential=credential, transport=shared_transport()) as search_client:
+            # The index definition and document count are independent, so fetch both at once
+            index, stats = await asyncio.gather(
+                index_client.get_index(index_name),
+                search_client.get_document_count(),
+            )
         
-        # Check index statistics
-        stats = search_client.get_document_count()
-        print(f"📄 Documents in index: {stats}")
+        log(f"✅ Index '{index_name}' found")
+        log(f"📊 Fields: {len(index.fields)} defined")
+        log(f"🔍 Vector search: {'enabled' if index.vector_search else 'disabled'}")
+        log(f"🧠 Semantic search: {'enabled' if index.semantic_search else 'disabled'}")
+        log(f"📄 Documents in index: {stats}")
         
         return True
         
     except Exception as e:
-        print(f"❌ AI Search test failed: {e}")
+        log(f"❌ AI Search test failed: {e}")
         return False
 
-def simulate_full_pipeline():
+async def simulate_full_pipeline(document_paths=()):
     """Simulate the full document processing pipeline"""
-    print("=" * 80)
-    print("🔄 SIMULATING FULL DOCUMENT PROCESSING PIPELINE")
-    print("=" * 80)
-    print()
+    log("=" * 80)
+    log("🔄 SIMULATING FULL DOCUMENT PROCESSING PIPELINE")
+    log("=" * 80)
+    log()
     
     # Step 1: Document Intelligence Analysis
-    print("Step 1: Document Layout Analysis")
-    layout_results = test_document_intelligence_analysis()
+    log("Step 1: Document Layout Analysis")
+    layout_results = await test_document_intelligence_analysis(document_paths)
     if not layout_results:
         return False
     
-    print()
-    print("Step 2: Figure Analysis (Simulated)")
-    print("-" * 40)
-    
-    # Simulate GPT-4o-mini figure analysis
-    figure_analysis = {
-        "figure_id": "fig_1",
-        "description": "Bar chart showing loan portfolio distribution across different loan types",
-        "insights": [
-            "Mortgage loans represent 45% of total portfolio",
-            "Commercial loans account for 30%", 
-            "Personal loans make up 25%",
-            "Diversified portfolio reduces risk exposure"
-        ],
-        "business_value": "Portfolio diversification indicates strong risk management"
-    }
+    log()
+    log("Step 2: Figure Analysis (Simulated)")
+    log("-" * 40)
     
-    print("🖼️  Figure Analysis Results:")
-    print(f"   📊 {figure_analysis['description']}")
-    print("   🎯 Key Insights:")
-    for insight in figure_analysis['insights']:
-        print(f"      • {insight}")
-    print(f"   💡 Business Value: {figure_analysis['business_value']}")
+    log("🖼️  Figure Analysis Results:")
+    log(f"   📊 {FIGURE_ANALYSIS['description']}")
+    log("   🎯 Key Insights:")
+    for insight in FIGURE_ANALYSIS['insights']:
+        log(f"      • {insight}")
+    log(f"   💡 Business Value: {FIGURE_ANALYSIS['business_value']}")
     
-    print()
-    print("Step 3: Content Enrichment & Chunking")
-    print("-" * 40)
+    log()
+    log("Step 3: Content Enrichment & Chunking")
+    log("-" * 40)
     
-    # Simulate semantic chunking
-    enriched_chunks = [
-        {
-            "chunk_id": "chunk_1",
-            "content": "FINANCIAL REPORT Q4 2024 - Executive Summary: Our banking division shows strong performance this quarter with significant growth in loan portfolios.",
-            "page": 1,
-            "sections": ["Title", "Executive Summary"],
-            "figures": []
-        },
-        {
-            "chunk_id": "chunk_2", 
-            "content": "Key Metrics show excellent performance: Total Loans: $2.5 billion, Customer Satisfaction: 95%, Risk Rating: AA+. Figure 1 Analysis: Bar chart showing loan portfolio distribution - Mortgage loans 45%, Commercial loans 30%, Personal loans 25%.",
-            "page": 1,
-            "sections": ["Key Metrics"],
-            "figures": ["fig_1"]
-        }
-    ]
-    
-    print("📄 Semantic Chunks Created:")
-    for chunk in enriched_chunks:
-        print(f"   • {chunk['chunk_id']}: {chunk['content'][:60]}...")
-        print(f"     Sections: {', '.join(chunk['sections'])}")
+    log("📄 Semantic Chunks Created:")
+    for chunk in ENRICHED_CHUNKS:
+        log(f"   • {chunk['chunk_id']}: {chunk['content'][:60]}...")
+        log(f"     Sections: {', '.join(chunk['sections'])}")
         if chunk['figures']:
-            print(f"     Figures: {', '.join(chunk['figures'])}")
+            log(f"     Figures: {', '.join(chunk['figures'])}")
     
-    print()
-    print("Step 4: Vector Embeddings & Indexing")
-    print("-" * 40)
-    print("🔄 Creating embeddings for semantic search...")
-    print("🔄 Indexing chunks in AI Search...")
-    print("✅ Vector embeddings created and indexed")
+    log()
+    log("Step 4: Vector Embeddings & Indexing")
+    log("-" * 40)
+    log("🔄 Creating embeddings for semantic search...")
+    log("🔄 Indexing chunks in AI Search...")
+    log("✅ Vector embeddings created and indexed")
     
     return True
 
 def show_pipeline_capabilities():
     """Show what the pipeline can do once fully deployed"""
-    print("=" * 80) 
-    print("🎯 PIPELINE CAPABILITIES WHEN FULLY DEPLOYED")
-    print("=" * 80)
-    print()
+    log("=" * 80) 
+    log("🎯 PIPELINE CAPABILITIES WHEN FULLY DEPLOYED")
+    log("=" * 80)
+    log()
     
     capabilities = [
         "📄 Process PDF, Word, PowerPoint, Excel documents",
@@ -254,12 +317,12 @@ def show_pipeline_capabilities():
         "⚡ Real-time document processing pipeline"
     ]
     
-    print("✨ What you can do:")
+    log("✨ What you can do:")
     for capability in capabilities:
-        print(f"   {capability}")
+        log(f"   {capability}")
     
-    print()
-    print("💼 Business Use Cases:")
+    log()
+    log("💼 Business Use Cases:")
     use_cases = [
         "Financial report analysis with chart insights",
         "Technical document Q&A including diagrams", 
@@ -269,23 +332,77 @@ def show_pipeline_capabilities():
     ]
     
     for use_case in use_cases:
-        print(f"   • {use_case}")
+        log(f"   • {use_case}")
     
-    print()
-    print("🚀 Ready for enterprise document intelligence!")
+    log()
+    log("🚀 Ready for enterprise document intelligence!")
 
-if __name__ == "__main__":
-    print("🎉 DOCUMENT PROCESSING PIPELINE TEST")
-    print()
+async def emit_pipeline_json(document_paths=()):
+    """Run the checks and write only a JSON document of their status and outputs, for CI
     
-    # Test AI Search first
-    search_success = test_ai_search_connection()
-    print()
+    Everything else the checks log is dropped, so stdout stays machine-readable.
+    """
+    phases = {"ai_search": "ok" if await test_ai_search_connection() else "failed"}
     
-    # Run full pipeline simulation
-    if search_success:
-        pipeline_success = simulate_full_pipeline()
-        print()
-        show_pipeline_capabilities()
+    documents = []
+    if document_paths:
+        try:
+            documents = await summarize_documents(document_paths)
+            phases["document_analysis"] = "ok"
+        except Exception as e:
+            phases["document_analysis"] = f"failed: {e}"
     else:
-        print("❌ AI Search connection failed, skipping pipeline test")
\ No newline at end of file
+        phases["document_analysis"] = "skipped"
+    phases["pipeline"] = "simulated"
+    
+    discard()
+    sys.stdout.write(json.dumps(
+        {
+            "phases": phases,
+            "documents": documents,
+            "layout": LAYOUT_RESULTS,
+            "figure": FIGURE_ANALYSIS,
+            "chunks": ENRICHED_CHUNKS,
+        },
+        indent=2,
+        ensure_ascii=False,
+    ) + "\n")
+
+async def main(document_paths=(), json_output=False):
+    if json_output:
+        try:
+            await emit_pipeline_json(document_paths)
+        finally:
+            await close_shared_transport()
+        return
+    
+    log("🎉 DOCUMENT PROCESSING PIPELINE TEST")
+    log()
+    
+    try:
+        # Test AI Search first
+        with phase():
+            search_success = await test_ai_search_connection()
+            log()
+        
+        # Run full pipeline simulation
+        if search_success:
+            with phase():
+                await simulate_full_pipeline(document_paths)
+                log()
+            with phase():
+                show_pipeline_capabilities()
+        else:
+            log("❌ AI Search connection failed, skipping pipeline test")
+    finally:
+        await close_shared_transport()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("documents", nargs="*", help="Documents to run through layout analysis alongside the simulation")
+    parser.add_argument("--json", action="store_true", default=bool(os.environ.get("CI")),
+                        help="Emit the simulated pipeline outputs as JSON instead of the walkthrough (default under CI)")
+    args = parser.parse_args()
+    
+    with phase():
+        asyncio.run(main(args.documents, json_output=args.json))
\ No newline at end of file
@@ -16,8 +16,13 @@ from mlflow_tracking import get_tracker, render_feedback_ui
 
 st.title("🧪 Test Feedback UI")
 
+@st.cache_resource
+def _tracker():
+    """Create the MLflow tracker once per server process instead of on every rerun"""
+    return get_tracker()
+
 # Initialize tracker
-tracker = get_tracker()
+tracker = _tracker()
 
 # Create a test run
 test_result = {
@@ -3,18 +3,29 @@
 Image Processing Pipeline Demonstration
 Shows the capabilities of the document processing system without requiring full deployment
 """
-import os
+import functools
+import io
 from pathlib import Path
 import json
 
-def demonstrate_image_processing_capabilities():
+from _console import log, phase
+
+# Resolved from this file rather than a developer's absolute path, so the check works on any checkout
+CONFIG_FILE = Path(__file__).resolve().parents[2] / "image_processing" / ".env"
+
+@functools.cache
+def _overview():
     """
-    Demonstrate the image processing pipeline capabilities
+    The static part of the report (pipeline, endpoints, sample output, services and
+    next steps), rendered once per process
     """
-    print("=" * 80)
-    print("🖼️  AZURE DOCUMENT INTELLIGENCE + AI SEARCH IMAGE PROCESSING")
-    print("=" * 80)
-    print()
+    buffer = io.StringIO()
+    emit = functools.partial(print, file=buffer)
+    
+    emit("=" * 80)
+    emit("🖼️  AZURE DOCUMENT INTELLIGENCE + AI SEARCH IMAGE PROCESSING")
+    emit("=" * 80)
+    emit()
     
     # Overview of the pipeline
     pipeline_steps = [
@@ -69,20 +80,20 @@ def demonstrate_image_processing_capabilities():
         }
     ]
     
-    print("🔄 DOCUMENT PROCESSING PIPELINE:")
-    print()
+    emit("🔄 DOCUMENT PROCESSING PIPELINE:")
+    emit()
     for step_info in pipeline_steps:
-        print(f"Step {step_info['step']}: {step_info['name']}")
-        print(f"   📝 {step_info['description']}")
-        print(f"   📥 Input: {step_info['input']}")
-        print(f"   📤 Output: {step_info['output']}")
-        print()
+        emit(f"Step {step_info['step']}: {step_info['name']}")
+        emit(f"   📝 {step_info['description']}")
+        emit(f"   📥 Input: {step_info['input']}")
+        emit(f"   📤 Output: {step_info['output']}")
+        emit()
     
     # Show Azure Function App endpoints
-    print("=" * 80)
-    print("🔧 AZURE FUNCTIONS ENDPOINTS")
-    print("=" * 80)
-    print()
+    emit("=" * 80)
+    emit("🔧 AZURE FUNCTIONS ENDPOINTS")
+    emit("=" * 80)
+    emit()
     
     endpoints = [
         {
@@ -118,16 +129,16 @@ def demonstrate_image_processing_capabilities():
     ]
     
     for endpoint_info in endpoints:
-        print(f"🔗 {endpoint_info['method']} {endpoint_info['endpoint']}")
-        print(f"   📝 {endpoint_info['description']}")
-        print(f"   ⚙️  Parameters: {endpoint_info['parameters']}")
-        print()
+        emit(f"🔗 {endpoint_info['method']} {endpoint_info['endpoint']}")
+        emit(f"   📝 {endpoint_info['description']}")
+        emit(f"   ⚙️  Parameters: {endpoint_info['parameters']}")
+        emit()
     
     # Show sample output
-    print("=" * 80)
-    print("📊 SAMPLE OUTPUT - FIGURE ANALYSIS")
-    print("=" * 80)
-    print()
+    emit("=" * 80)
+    emit("📊 SAMPLE OUTPUT - FIGURE ANALYSIS")
+    emit("=" * 80)
+    emit()
     
     sample_output = """
     The figure shows a bar chart comparing model performance across different languages:
@@ -148,13 +159,13 @@ def demonstrate_image_processing_capabilities():
     enabling data-driven decisions for development tool recommendations.
     """
     
-    print(sample_output)
+    emit(sample_output)
     
     # Show required Azure services
-    print("=" * 80)
-    print("☁️  REQUIRED AZURE SERVICES")
-    print("=" * 80)
-    print()
+    emit("=" * 80)
+    emit("☁️  REQUIRED AZURE SERVICES")
+    emit("=" * 80)
+    emit()
     
     azure_services = [
         {
@@ -190,24 +201,24 @@ def demonstrate_image_processing_capabilities():
     ]
     
     for service in azure_services:
-        print(f"🔵 {service['service']}")
-        print(f"   🎯 Purpose: {service['purpose']}")
-        print(f"   📊 Status: {service['status']}")
+        emit(f"🔵 {service['service']}")
+        emit(f"   🎯 Purpose: {service['purpose']}")
+        emit(f"   📊 Status: {service['status']}")
         if 'models' in service:
-            print(f"   🤖 Models: {', '.join(service['models'])}")
+            emit(f"   🤖 Models: {', '.join(service['models'])}")
         if 'features' in service:
-            print(f"   ⭐ Features: {', '.join(service['features'])}")
+            emit(f"   ⭐ Features: {', '.join(service['features'])}")
         if 'containers' in service:
-            print(f"   📦 Containers: {', '.join(service['containers'])}")
+            emit(f"   📦 Containers: {', '.join(service['containers'])}")
         if 'runtime' in service:
-            print(f"   ⚙️  Runtime: {', '.join(service['runtime'])}")
-        print()
+            emit(f"   ⚙️  Runtime: {', '.join(service['runtime'])}")
+        emit()
     
     # Next steps
-    print("=" * 80)
-    print("🚀 NEXT STEPS TO ENABLE IMAGE PROCESSING")
-    print("=" * 80)
-    print()
+    emit("=" * 80)
+    emit("🚀 NEXT STEPS TO ENABLE IMAGE PROCESSING")
+    emit("=" * 80)
+    emit()
     
     next_steps = [
         "1. Create Azure Document Intelligence service in your subscription",
@@ -220,36 +231,44 @@ def demonstrate_image_processing_capabilities():
     ]
     
     for step in next_steps:
-        print(f"   {step}")
-    print()
+        emit(f"   {step}")
+    emit()
+    
+    return buffer.getvalue()
+
+def demonstrate_image_processing_capabilities():
+    """
+    Demonstrate the image processing pipeline capabilities
+    """
+    log(_overview(), end="")
     
     # Configuration summary
-    print("=" * 80)
-    print("⚙️  CONFIGURATION SUMMARY")
-    print("=" * 80)
-    print()
-    
-    config_file = "/Users/ahmedm4air/Documents/fis/dstoolkit-text2sql-and-imageprocessing/image_processing/.env"
-    if os.path.exists(config_file):
-        print(f"✅ Configuration file created: {config_file}")
-        print("📝 Key settings configured:")
-        print("   • OpenAI endpoint and API key")
-        print("   • AI Search endpoint and key")  
-        print("   • Storage account name")
-        print("   • Chunking parameters")
-        print("   • Figure extraction enabled")
-        print()
-        print("⚠️  Still needed:")
-        print("   • Azure Document Intelligence endpoint and key")
-        print("   • Function App deployment")
-        print("   • Storage account authentication fix")
-    
-    print()
-    print("=" * 80)
-    print("🎉 IMAGE PROCESSING PIPELINE READY FOR DEPLOYMENT!")
-    print("=" * 80)
+    log("=" * 80)
+    log("⚙️  CONFIGURATION SUMMARY")
+    log("=" * 80)
+    log()
+    
+    if CONFIG_FILE.is_file():
+        log(f"✅ Configuration file created: {CONFIG_FILE}")
+        log("📝 Key settings configured:")
+        log("   • OpenAI endpoint and API key")
+        log("   • AI Search endpoint and key")  
+        log("   • Storage account name")
+        log("   • Chunking parameters")
+        log("   • Figure extraction enabled")
+        log()
+        log("⚠️  Still needed:")
+        log("   • Azure Document Intelligence endpoint and key")
+        log("   • Function App deployment")
+        log("   • Storage account authentication fix")
+    
+    log()
+    log("=" * 80)
+    log("🎉 IMAGE PROCESSING PIPELINE READY FOR DEPLOYMENT!")
+    log("=" * 80)
     
     return True
 
 if __name__ == "__main__":
-    demonstrate_image_processing_capabilities()
\ No newline at end of file
+    with phase():
+        demonstrate_image_processing_capabilities()
@@ -5,59 +5,51 @@ Test script to verify open source Text2SQL setup
 
 import sys
 import os
+import importlib
 from pathlib import Path
 
 # Add paths
 text_2_sql_path = Path(__file__).parent / "text_2_sql" / "text_2_sql_core" / "src"
 sys.path.insert(0, str(text_2_sql_path))
 
-def test_imports():
-    """Test that all required modules can be imported"""
-    print("🔍 Testing imports...")
-
-    try:
-        import chromadb
-        print("✅ ChromaDB imported successfully")
-    except ImportError as e:
-        print(f"❌ ChromaDB import failed: {e}")
-        return False
-
-    try:
-        from openai import AsyncOpenAI
-        print("✅ OpenAI client imported successfully")
-    except ImportError as e:
-        print(f"❌ OpenAI import failed: {e}")
-        return False
-
+# (module, attribute to resolve, success label, failure label)
+REQUIRED_IMPORTS = (
+    ("chromadb", None, "ChromaDB", "ChromaDB"),
+    ("openai", "AsyncOpenAI", "OpenAI client", "OpenAI"),
+    ("text_2_sql_core.connectors.open_ai", "OpenAIConnector", "OpenAI connector", "OpenAI connector"),
+    ("text_2_sql_core.connectors.chroma_search", "ChromaSearchConnector", "ChromaDB search connector", "ChromaDB connector"),
+    ("mlflow", None, "MLflow", "MLflow"),
+    ("streamlit", None, "Streamlit", "Streamlit"),
+)
+
+def _try_import(module_name, attribute):
+    """Import a module (and resolve an attribute from it); returns the ImportError or None"""
     try:
-        from text_2_sql_core.connectors.open_ai import OpenAIConnector
-        print("✅ OpenAI connector imported successfully")
+        module = importlib.import_module(module_name)
+        if attribute:
+            getattr(module, attribute)
     except ImportError as e:
-        print(f"❌ OpenAI connector import failed: {e}")
-        return False
+        return e
+    except AttributeError as e:
+        return ImportError(str(e))
+    return None
 
-    try:
-        from text_2_sql_core.connectors.chroma_search import ChromaSearchConnector
-        print("✅ ChromaDB search connector imported successfully")
-    except ImportError as e:
-        print(f"❌ ChromaDB connector import failed: {e}")
-        return False
-
-    try:
-        import mlflow
-        print("✅ MLflow imported successfully")
-    except ImportError as e:
-        print(f"❌ MLflow import failed: {e}")
-        return False
+def test_imports():
+    """Test that all required modules can be imported"""
+    print("🔍 Testing imports...")
 
-    try:
-        import streamlit
-        print("✅ Streamlit imported successfully")
-    except ImportError as e:
-        print(f"❌ Streamlit import failed: {e}")
-        return False
+    # One at a time: these packages import each other, and loading them from several
+    # threads can deadlock or see partly initialised modules
+    all_imported = True
+    for module_name, attribute, success_label, failure_label in REQUIRED_IMPORTS:
+        error = _try_import(module_name, attribute)
+        if error is None:
+            print(f"✅ {success_label} imported successfully")
+        else:
+            print(f"❌ {failure_label} import failed: {error}")
+            all_imported = False
 
-    return True
+    return all_imported
 
 def test_env_config():
     """Test environment configuration"""
@@ -66,7 +58,8 @@ def test_env_config():
     from dotenv import load_dotenv
     load_dotenv("text_2_sql/.env")
 
-    api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OpenAI__ApiKey")
+    env = os.environ
+    api_key = env.get("OPENAI_API_KEY") or env.get("OpenAI__ApiKey")
 
     if api_key and api_key.startswith("sk-"):
         print("✅ OpenAI API key configured")
@@ -78,7 +71,7 @@ def test_env_config():
         print("   Please set OPENAI_API_KEY in text_2_sql/.env")
         return False
 
-    db_engine = os.getenv("Text2Sql__DatabaseEngine")
+    db_engine = env.get("Text2Sql__DatabaseEngine")
     if db_engine:
         print(f"✅ Database engine configured: {db_engine}")
     else:
@@ -92,11 +85,10 @@ def test_chromadb():
 
     try:
         import chromadb
-        from chromadb.config import Settings
 
-        # Create a test client
-        test_path = "./test_chroma_db"
-        client = chromadb.PersistentClient(path=test_path)
+        # In-memory client: the add/query round trip is what's being checked, so there
+        # is nothing to persist and no test directory to clean up afterwards
+        client = chromadb.EphemeralClient()
 
         # Create a test collection
         collection = client.get_or_create_collection(
@@ -119,12 +111,6 @@ def test_chromadb():
 
         if results and len(results['ids'][0]) > 0:
             print("✅ ChromaDB working correctly")
-
-            # Cleanup
-            import shutil
-            if os.path.exists(test_path):
-                shutil.rmtree(test_path)
-
             return True
         else:
             print("❌ ChromaDB query returned no results")
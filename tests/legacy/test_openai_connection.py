@@ -14,6 +14,13 @@ sys.path.insert(0, str(text_2_sql_path))
 from dotenv import load_dotenv
 load_dotenv('text_2_sql/.env')
 
+REQUIRED_VARS = (
+    'OpenAI__Endpoint',
+    'OpenAI__ApiKey', 
+    'OpenAI__CompletionDeployment',
+    'OpenAI__ApiVersion',
+)
+
 async def test_openai():
     """Test OpenAI connection"""
     print("=== TESTING OPENAI CONNECTION ===")
@@ -42,23 +49,13 @@ def test_env_vars():
     """Test environment variables"""
     print("=== TESTING ENVIRONMENT VARIABLES ===")
     
-    required_vars = [
-        'OpenAI__Endpoint',
-        'OpenAI__ApiKey', 
-        'OpenAI__CompletionDeployment',
-        'OpenAI__ApiVersion'
-    ]
+    env = os.environ
+    missing = [var for var in REQUIRED_VARS if not env.get(var)]
     
-    all_good = True
-    for var in required_vars:
-        value = os.getenv(var)
-        if value:
-            print(f"✅ {var}: configured")
-        else:
-            print(f"❌ {var}: missing")
-            all_good = False
+    for var in REQUIRED_VARS:
+        print(f"❌ {var}: missing" if var in missing else f"✅ {var}: configured")
             
-    return all_good
+    return not missing
 
 async def main():
     """Run all tests"""
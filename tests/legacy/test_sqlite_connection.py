@@ -6,17 +6,28 @@ import sqlite3
 import os
 from dotenv import load_dotenv
 
+from _console import log, phase
+
 load_dotenv('text_2_sql/.env')
 
+def count_rows_query(table_names):
+    """SELECT returning (table, row count) for each table, in the given order"""
+    return " UNION ALL ".join(
+        "SELECT '{}', COUNT(*), {} FROM \"{}\"".format(
+            name.replace("'", "''"), position, name.replace('"', '""')
+        )
+        for position, name in enumerate(table_names)
+    ) + " ORDER BY 3"
+
 def test_sqlite_connection():
     """Test SQLite database connection"""
-    print("=== TESTING SQLITE DATABASE CONNECTION ===")
+    log("=== TESTING SQLITE DATABASE CONNECTION ===")
     
     db_path = os.getenv('Text2Sql__Sqlite__Database')
-    print(f"Database path: {db_path}")
+    log(f"Database path: {db_path}")
     
     if not os.path.exists(db_path):
-        print(f"❌ Database file not found: {db_path}")
+        log(f"❌ Database file not found: {db_path}")
         return False
     
     try:
@@ -28,30 +39,32 @@ def test_sqlite_connection():
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
         tables = cursor.fetchall()
         
-        print(f"✅ Connection successful!")
-        print(f"Found {len(tables)} tables:")
+        log(f"✅ Connection successful!")
+        log(f"Found {len(tables)} tables:")
         
-        for table in tables[:10]:  # Show first 10 tables
-            table_name = table[0]
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            count = cursor.fetchone()[0]
-            print(f"  - {table_name}: {count} rows")
+        # Count the first 10 tables in one compound statement rather than a query each
+        table_names = [table[0] for table in tables[:10]]
+        if table_names:
+            cursor.execute(count_rows_query(table_names))
+            for table_name, count, _ in cursor.fetchall():
+                log(f"  - {table_name}: {count} rows")
         
         # Test a sample query from your banking data
-        print(f"\n=== SAMPLE DATA ===")
+        log(f"\n=== SAMPLE DATA ===")
         cursor.execute("SELECT CUSTOMER_NAME, CUSTOMER_TYPE_DESCRIPTION FROM CUSTOMER_DIMENSION LIMIT 5")
         customers = cursor.fetchall()
         
-        print("Sample customers:")
+        log("Sample customers:")
         for customer in customers:
-            print(f"  - {customer[0]} ({customer[1]})")
+            log(f"  - {customer[0]} ({customer[1]})")
         
         conn.close()
         return True
         
     except Exception as e:
-        print(f"❌ Connection failed: {e}")
+        log(f"❌ Connection failed: {e}")
         return False
 
 if __name__ == "__main__":
-    test_sqlite_connection()
\ No newline at end of file
+    with phase():
+        test_sqlite_connection()
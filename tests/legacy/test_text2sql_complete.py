@@ -17,15 +17,17 @@ sys.path.insert(0, str(text_2_sql_path))
 from dotenv import load_dotenv
 load_dotenv('text_2_sql/.env')
 
+from _console import flush, log, phase
+
 async def test_complete_text2sql_system():
     """Test the complete Text2SQL system"""
-    print("=" * 80)
-    print("🏦 COMPLETE TEXT2SQL SYSTEM TEST")
-    print("=" * 80)
-    print()
+    log("=" * 80)
+    log("🏦 COMPLETE TEXT2SQL SYSTEM TEST")
+    log("=" * 80)
+    log()
     
     # Test database connection
-    print("📊 TESTING DATABASE CONNECTION...")
+    log("📊 TESTING DATABASE CONNECTION...")
     try:
         from text_2_sql_core.connectors.sqlite_sql import SQLiteSqlConnector
         
@@ -33,31 +35,31 @@ async def test_complete_text2sql_system():
         
         # Test basic query
         result = await db_connector.query_execution("SELECT COUNT(*) as table_count FROM sqlite_master WHERE type='table'")
-        print(f"✅ Database connected: {result[0]['table_count']} tables found")
+        log(f"✅ Database connected: {result[0]['table_count']} tables found")
         
     except Exception as e:
-        print(f"❌ Database connection failed: {e}")
+        log(f"❌ Database connection failed: {e}")
         return False
     
     # Test schema access
-    print("\n🗂️  TESTING SCHEMA ACCESS...")
+    log("\n🗂️  TESTING SCHEMA ACCESS...")
     try:
         schemas = await db_connector.get_entity_schemas("customer", as_json=False)
-        print(f"✅ Schema access working: Found {len(schemas)} customer-related schemas")
+        log(f"✅ Schema access working: Found {len(schemas)} customer-related schemas")
         
         if schemas:
-            print("📋 Sample schema:")
+            log("📋 Sample schema:")
             sample = schemas[0]
-            print(f"   Table: {sample['SelectFromEntity']}")
-            print(f"   Columns: {len(sample['Columns'])}")
-            print(f"   Sample columns: {[col['Name'] for col in sample['Columns'][:5]]}")
+            log(f"   Table: {sample['SelectFromEntity']}")
+            log(f"   Columns: {len(sample['Columns'])}")
+            log(f"   Sample columns: {[col['Name'] for col in sample['Columns'][:5]]}")
         
     except Exception as e:
-        print(f"❌ Schema access failed: {e}")
-        print("⚠️  This is expected if schema store not deployed")
+        log(f"❌ Schema access failed: {e}")
+        log("⚠️  This is expected if schema store not deployed")
     
     # Test specific banking queries
-    print("\n🔍 TESTING BANKING QUERIES...")
+    log("\n🔍 TESTING BANKING QUERIES...")
     
     test_queries = [
         {
@@ -93,88 +95,103 @@ async def test_complete_text2sql_system():
     
     successful_queries = 0
     
-    for i, query in enumerate(test_queries, 1):
-        print(f"\n📊 Test {i}: {query['description']}")
+    # The queries are independent reads, so run them together (the connector runs each
+    # on its own worker thread) and report in order afterwards
+    results = await asyncio.gather(
+        *(db_connector.query_execution(query['sql']) for query in test_queries),
+        return_exceptions=True,
+    )
+    
+    for i, (query, result) in enumerate(zip(test_queries, results), 1):
+        log(f"\n📊 Test {i}: {query['description']}")
         try:
-            result = await db_connector.query_execution(query['sql'])
+            if isinstance(result, Exception):
+                raise result
             
             if result:
-                print(f"   ✅ Success: {len(result)} rows returned")
+                log(f"   ✅ Success: {len(result)} rows returned")
                 
                 # Show sample data
+                # query_execution already returns one dict per row, so no copies needed
                 if len(result) <= 3:
                     for row in result:
-                        print(f"      {dict(row)}")
+                        log(f"      {row}")
                 else:
-                    print(f"      Sample: {dict(result[0])}")
-                    print(f"      ... and {len(result)-1} more rows")
+                    log(f"      Sample: {result[0]}")
+                    log(f"      ... and {len(result)-1} more rows")
                 
                 successful_queries += 1
             else:
-                print(f"   ⚠️  No results returned")
+                log(f"   ⚠️  No results returned")
                 successful_queries += 1  # Still counts as success
                 
         except Exception as e:
-            print(f"   ❌ Query failed: {e}")
+            log(f"   ❌ Query failed: {e}")
     
-    print(f"\n📈 QUERY TEST RESULTS: {successful_queries}/{len(test_queries)} successful")
+    log(f"\n📈 QUERY TEST RESULTS: {successful_queries}/{len(test_queries)} successful")
     
     return successful_queries == len(test_queries)
 
 async def test_streamlit_integration():
     """Test the integration components for Streamlit"""
-    print("\n" + "=" * 80)
-    print("🌐 STREAMLIT INTEGRATION TEST")
-    print("=" * 80)
-    print()
+    log("\n" + "=" * 80)
+    log("🌐 STREAMLIT INTEGRATION TEST")
+    log("=" * 80)
+    log()
     
     # Test database statistics function
-    print("📊 Testing database statistics...")
+    log("📊 Testing database statistics...")
     try:
+        from text_2_sql_core.connectors.sqlite_sql import SQLITE_CACHE_SIZE_KIB, SQLITE_MMAP_SIZE
+        
         db_path = os.getenv('Text2Sql__Sqlite__Database')
         conn = sqlite3.connect(db_path)
+        # Same read tuning as SQLiteSqlConnector's connections
+        conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}")
+        conn.execute("PRAGMA temp_store=MEMORY")
         cursor = conn.cursor()
         
         # Get comprehensive stats
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
         tables = cursor.fetchall()
         
-        print(f"✅ Found {len(tables)} tables")
+        log(f"✅ Found {len(tables)} tables")
         
         total_rows = 0
         total_columns = 0
         
-        for table in tables[:3]:  # Test first 3 tables
-            table_name = table[0]
-            
-            # Get column info
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = cursor.fetchall()
-            
-            # Get row count
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            row_count = cursor.fetchone()[0]
-            
+        # Column and row counts for the first 3 tables in one compound statement,
+        # instead of a PRAGMA and a COUNT(*) per table
+        sample = " UNION ALL ".join(
+            "SELECT '{name}', (SELECT COUNT(*) FROM pragma_table_info('{name}')), COUNT(*), {position} FROM \"{ident}\"".format(
+                name=table[0].replace("'", "''"), ident=table[0].replace('"', '""'), position=position
+            )
+            for position, table in enumerate(tables[:3])
+        )
+        stats = cursor.execute(sample + " ORDER BY 4").fetchall() if sample else []
+        
+        for table_name, column_count, row_count, _ in stats:
             total_rows += row_count
-            total_columns += len(columns)
+            total_columns += column_count
             
-            print(f"   📋 {table_name}: {len(columns)} columns, {row_count:,} rows")
+            log(f"   📋 {table_name}: {column_count} columns, {row_count:,} rows")
         
-        print(f"✅ Statistics working: {total_columns} columns, {total_rows:,} total rows (from sample)")
+        log(f"✅ Statistics working: {total_columns} columns, {total_rows:,} total rows (from sample)")
         conn.close()
         
         return True
         
     except Exception as e:
-        print(f"❌ Statistics test failed: {e}")
+        log(f"❌ Statistics test failed: {e}")
         return False
 
 async def demonstrate_text2sql_capabilities():
     """Demonstrate the full capabilities of the Text2SQL system"""
-    print("\n" + "=" * 80)
-    print("🎯 TEXT2SQL SYSTEM CAPABILITIES DEMONSTRATION")
-    print("=" * 80)
-    print()
+    log("\n" + "=" * 80)
+    log("🎯 TEXT2SQL SYSTEM CAPABILITIES DEMONSTRATION")
+    log("=" * 80)
+    log()
     
     capabilities = [
         {
@@ -205,13 +222,13 @@ async def demonstrate_text2sql_capabilities():
     ]
     
     for cap in capabilities:
-        print(f"🔧 {cap['feature']}")
-        print(f"   📝 {cap['description']}")
-        print(f"   💡 Example: {cap['example']}")
-        print()
+        log(f"🔧 {cap['feature']}")
+        log(f"   📝 {cap['description']}")
+        log(f"   💡 Example: {cap['example']}")
+        log()
     
     # Show system configuration
-    print("⚙️  SYSTEM CONFIGURATION:")
+    log("⚙️  SYSTEM CONFIGURATION:")
     config_items = [
         ("Database Engine", os.getenv('Text2Sql__DatabaseEngine', 'SQLITE')),
         ("Use Query Cache", os.getenv('Text2Sql__UseQueryCache', 'True')),
@@ -221,60 +238,63 @@ async def demonstrate_text2sql_capabilities():
     ]
     
     for item, value in config_items:
-        print(f"   • {item}: {value}")
-    print()
+        log(f"   • {item}: {value}")
+    log()
 
 async def main():
     """Main test function"""
-    print("🚀 FIS BANKING TEXT2SQL COMPLETE SYSTEM TEST")
-    print("   Testing all components of your Text2SQL implementation")
-    print()
+    log("🚀 FIS BANKING TEXT2SQL COMPLETE SYSTEM TEST")
+    log("   Testing all components of your Text2SQL implementation")
+    log()
     
-    # Run all tests
+    # Run all tests, writing each one's output as it finishes
     db_test = await test_complete_text2sql_system()
+    flush()
     stats_test = await test_streamlit_integration()
+    flush()
     
     # Show capabilities
     await demonstrate_text2sql_capabilities()
     
     # Final summary
-    print("=" * 80)
-    print("🎉 TEST SUMMARY")
-    print("=" * 80)
-    print()
+    log("=" * 80)
+    log("🎉 TEST SUMMARY")
+    log("=" * 80)
+    log()
     
     tests_passed = sum([db_test, stats_test])
     total_tests = 2
     
-    print(f"✅ Tests Passed: {tests_passed}/{total_tests}")
+    log(f"✅ Tests Passed: {tests_passed}/{total_tests}")
     
     if db_test:
-        print("   ✅ Database connection and queries working")
+        log("   ✅ Database connection and queries working")
     else:
-        print("   ❌ Database issues detected")
+        log("   ❌ Database issues detected")
     
     if stats_test:
-        print("   ✅ Streamlit integration components ready")
+        log("   ✅ Streamlit integration components ready")
     else:
-        print("   ❌ Streamlit integration issues")
+        log("   ❌ Streamlit integration issues")
     
-    print()
-    print("🌐 STREAMLIT APPLICATION STATUS:")
-    print("   The Streamlit app is running at: http://localhost:8501")
-    print("   You can test the Text2SQL system interactively!")
-    print()
+    log()
+    log("🌐 STREAMLIT APPLICATION STATUS:")
+    log("   The Streamlit app is running at: http://localhost:8501")
+    log("   You can test the Text2SQL system interactively!")
+    log()
     
-    print("🎯 NEXT STEPS:")
-    print("   1. Open the Streamlit app in your browser")
-    print("   2. Try the sample banking questions")
-    print("   3. Ask custom questions about your data")
-    print("   4. Explore the multi-agent capabilities")
-    print()
+    log("🎯 NEXT STEPS:")
+    log("   1. Open the Streamlit app in your browser")
+    log("   2. Try the sample banking questions")
+    log("   3. Ask custom questions about your data")
+    log("   4. Explore the multi-agent capabilities")
+    log()
     
     if tests_passed == total_tests:
-        print("🎉 All systems ready for production use!")
+        log("🎉 All systems ready for production use!")
     else:
-        print("⚠️  Some issues detected - check error messages above")
+        log("⚠️  Some issues detected - check error messages above")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    with phase():
+        asyncio.run(main())
\ No newline at end of file
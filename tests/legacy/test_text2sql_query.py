@@ -32,27 +32,20 @@ async def test_sql_generation():
         """
         
         user_question = "How many customers do we have in total?"
+        user_question2 = "What are the top 5 customers by total order amount?"
         
-        messages = [
-            {"role": "system", "content": f"You are a SQL expert. Given this database schema:\n{schema_info}\n\nGenerate a SQL query to answer the user's question. Return only the SQL query."},
-            {"role": "user", "content": user_question}
-        ]
+        system_message = {"role": "system", "content": f"You are a SQL expert. Given this database schema:\n{schema_info}\n\nGenerate a SQL query to answer the user's question. Return only the SQL query."}
         
-        sql_result = await connector.run_completion_request(messages)
+        # Both completions are independent, so request them together
+        sql_result, sql_result2 = await asyncio.gather(
+            connector.run_completion_request([system_message, {"role": "user", "content": user_question}]),
+            connector.run_completion_request([system_message, {"role": "user", "content": user_question2}]),
+        )
         
         print(f"✅ SQL Generation successful!")
         print(f"Question: {user_question}")
         print(f"Generated SQL: {sql_result}")
         
-        # Test another query
-        user_question2 = "What are the top 5 customers by total order amount?"
-        messages2 = [
-            {"role": "system", "content": f"You are a SQL expert. Given this database schema:\n{schema_info}\n\nGenerate a SQL query to answer the user's question. Return only the SQL query."},
-            {"role": "user", "content": user_question2}
-        ]
-        
-        sql_result2 = await connector.run_completion_request(messages2)
-        
         print(f"\nQuestion: {user_question2}")
         print(f"Generated SQL: {sql_result2}")
         
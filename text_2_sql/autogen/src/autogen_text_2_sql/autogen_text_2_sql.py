@@ -278,6 +278,7 @@ class AutoGenText2Sql:
         self,
         thread_id: str,
         message_payload: UserMessagePayload,
+        yield_processing_updates: bool = True,
     ) -> AsyncGenerator[InteractionPayload, None]:
         """Process the complete message through the unified system.
 
@@ -286,6 +287,7 @@ class AutoGenText2Sql:
             thread_id (str): The ID of the thread the message belongs to.
             task (str): The user message to process.
             injected_parameters (dict, optional): Parameters to pass to agents. Defaults to None.
+            yield_processing_updates (bool, optional): Whether to build and yield processing update payloads. Callers that only need the final payload can disable this. Defaults to True.
 
         Returns:
         -------
@@ -308,7 +310,9 @@ class AutoGenText2Sql:
             payload = None
 
             if isinstance(message, TextMessage):
-                if message.source == "user_message_rewrite_agent":
+                if not yield_processing_updates:
+                    continue
+                elif message.source == "user_message_rewrite_agent":
                     payload = ProcessingUpdatePayload(
                         message="Rewriting the query...",
                     )
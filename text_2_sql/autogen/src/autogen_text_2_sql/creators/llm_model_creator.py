@@ -1,25 +1,128 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-import os
+from autogen_core import CacheStore
+from autogen_core.models import ChatCompletionClient, ModelFamily, ModelInfo
+from autogen_ext.models.cache import CHAT_CACHE_VALUE_TYPE, ChatCompletionCache
+from cachetools import LRUCache
+from openai import DefaultAsyncHttpxClient
+from text_2_sql_core.utils.config import get_config
+from text_2_sql_core.utils.loop_resources import LoopResources
+import asyncio
 import dotenv
 
 dotenv.load_dotenv()
 
+# Both deployments are 4o models. Passed as model_info rather than the deprecated
+# model_capabilities, which warns on every client created and lacks the family field.
+MODEL_INFO = ModelInfo(
+    vision=False,
+    function_calling=True,
+    json_output=True,
+    family=ModelFamily.GPT_4O,
+)
+
+
+class LLMCacheStore(CacheStore[CHAT_CACHE_VALUE_TYPE]):
+    """Completion cache shared by every model client, scoped per model configuration.
+
+    ChatCompletionCache keys on the request (messages, tools, json_output and extra
+    args) but not on the client's model or response format, so the keys are prefixed
+    with both here to stop 4o and 4o-mini, or two structured outputs, sharing entries."""
+
+    _cache: LRUCache = LRUCache(maxsize=1024)
+
+    def __init__(self, scope: tuple):
+        self.scope = scope
+
+    def get(self, key: str, default=None):
+        return self._cache.get((self.scope, key), default)
+
+    def set(self, key: str, value) -> None:
+        self._cache[(self.scope, key)] = value
+
 
 class LLMModelCreator:
+    # One pooled HTTP client per event loop, shared by every model client created on
+    # it and closed when that loop shuts down
+    _http_clients = LoopResources(close=lambda client: client.aclose())
+
+    # Model clients per event loop, keyed on (model name, structured output); their
+    # connections belong to the shared HTTP client, so they are only released
+    _model_clients = LoopResources()
+
+    @classmethod
+    def get_http_client(cls) -> DefaultAsyncHttpxClient | None:
+        """Gets the HTTP client shared by the model clients on the running event loop.
+
+        httpx connections are bound to the loop they were opened on, so the pool is
+        kept per loop. Returns None outside a running loop, in which case the OpenAI
+        SDK creates its own client.
+
+        Returns:
+            DefaultAsyncHttpxClient | None: The shared HTTP client."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+        return cls._http_clients.get(None, DefaultAsyncHttpxClient)
+
+    @classmethod
+    def with_cache(
+        cls, client: ChatCompletionClient, model_name: str, structured_output
+    ) -> ChatCompletionClient:
+        """Wraps the client so an identical request returns the earlier completion.
+
+        Enabled with Text2Sql__UseLLMCache; the agents run at temperature 0, so a
+        repeated question through the same agent would get the same answer anyway.
+
+        Returns:
+            ChatCompletionClient: The cached client, or the client itself when disabled."""
+        if not get_config().use_llm_cache:
+            return client
+
+        return ChatCompletionCache(
+            client, LLMCacheStore((model_name, structured_output))
+        )
+
     @classmethod
     def get_model(
         cls, model_name: str, structured_output=None
-    ) -> OpenAIChatCompletionClient:
+    ) -> ChatCompletionClient:
         """Retrieves the model based on the model name.
 
+        Agents asking for the same model and structured output on the same event loop
+        share one client, rather than each building its own. Outside a running loop a
+        new client is created every time, as the HTTP client can't be shared there.
+
         Args:
         ----
             model_name (str): The name of the model to retrieve.
 
         Returns:
-            OpenAIChatCompletionClient: The model client."""
+            ChatCompletionClient: The model client."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return cls.create_model(model_name, structured_output=structured_output)
+
+        return cls._model_clients.get(
+            (model_name, structured_output),
+            lambda: cls.create_model(model_name, structured_output=structured_output),
+        )
+
+    @classmethod
+    def create_model(
+        cls, model_name: str, structured_output=None
+    ) -> ChatCompletionClient:
+        """Creates a new client for the model name.
+
+        Args:
+        ----
+            model_name (str): The name of the model to create.
+
+        Returns:
+            ChatCompletionClient: The model client."""
         if model_name == "4o-mini":
             return cls.gpt_4o_mini_model(structured_output=structured_output)
         elif model_name == "4o":
@@ -28,61 +131,57 @@ class LLMModelCreator:
             raise ValueError(f"Model {model_name} not found")
 
     @classmethod
-    def get_authentication_properties(cls) -> tuple:
-        """Get API key and provider - supports OpenAI or Claude"""
-        provider = os.environ.get("LLM_PROVIDER", "openai").lower()
-
-        if provider in ["claude", "anthropic"]:
-            api_key = os.environ.get("ANTHROPIC_API_KEY") or os.environ.get("CLAUDE_API_KEY")
-            if not api_key:
-                raise ValueError("ANTHROPIC_API_KEY or CLAUDE_API_KEY environment variable is required for Claude")
-            # AutoGen uses OpenAI SDK, so we use OpenAI compatibility mode via base_url
-            # Claude SDK doesn't work with AutoGen directly - use OpenAI API instead
-            # For Claude, user should use OPENAI_API_KEY
+    def get_authentication_properties(cls) -> str:
+        """Get the OpenAI API key; the AutoGen agents only run against OpenAI."""
+        config = get_config()
+
+        if config.provider in ("claude", "anthropic"):
+            # AutoGen uses the OpenAI SDK, which can't talk to Claude
             raise ValueError(
                 "AutoGen multi-agent system currently only supports OpenAI API. "
                 "Please set LLM_PROVIDER=openai and OPENAI_API_KEY. "
                 "For main Text2SQL queries, Claude will still be used."
             )
-        else:
-            api_key = os.environ.get("OPENAI_API_KEY") or os.environ.get("OpenAI__ApiKey")
-            if not api_key:
-                raise ValueError("OPENAI_API_KEY environment variable is required")
 
-        return api_key, provider
+        if not config.openai_api_key:
+            raise ValueError("OPENAI_API_KEY environment variable is required")
+
+        return config.openai_api_key
 
     @classmethod
-    def gpt_4o_mini_model(
-        cls, structured_output=None
-    ) -> OpenAIChatCompletionClient:
-        api_key, provider = cls.get_authentication_properties()
-        model_name = os.environ.get("OpenAI__MiniCompletionDeployment", "gpt-4o-mini")
+    def gpt_4o_mini_model(cls, structured_output=None) -> ChatCompletionClient:
+        api_key = cls.get_authentication_properties()
+        model_name = get_config().mini_completion_deployment
+
+        # Imported on first use: autogen_ext's OpenAI client pulls in tiktoken and its
+        # model tables, which importing the package shouldn't pay for
+        from autogen_ext.models.openai import OpenAIChatCompletionClient
 
-        return OpenAIChatCompletionClient(
+        client = OpenAIChatCompletionClient(
             model=model_name,
             api_key=api_key,
-            model_capabilities={
-                "vision": False,
-                "function_calling": True,
-                "json_output": True,
-            },
+            model_info=MODEL_INFO,
             temperature=0,
             response_format=structured_output,
+            http_client=cls.get_http_client(),
         )
 
+        return cls.with_cache(client, model_name, structured_output)
+
     @classmethod
-    def gpt_4o_model(cls, structured_output=None) -> OpenAIChatCompletionClient:
-        api_key, provider = cls.get_authentication_properties()
-        model_name = os.environ.get("OpenAI__CompletionDeployment", "gpt-4o")
+    def gpt_4o_model(cls, structured_output=None) -> ChatCompletionClient:
+        api_key = cls.get_authentication_properties()
+        model_name = get_config().completion_deployment
 
-        return OpenAIChatCompletionClient(
+        from autogen_ext.models.openai import OpenAIChatCompletionClient
+
+        client = OpenAIChatCompletionClient(
             model=model_name,
             api_key=api_key,
-            model_capabilities={
-                "vision": False,
-                "function_calling": True,
-                "json_output": True,
-            },
+            model_info=MODEL_INFO,
             temperature=0,
             response_format=structured_output,
+            http_client=cls.get_http_client(),
         )
+
+        return cls.with_cache(client, model_name, structured_output)
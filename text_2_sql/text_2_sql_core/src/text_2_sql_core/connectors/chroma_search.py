@@ -1,23 +1,58 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License
-import os
+import asyncio
 import logging
 import base64
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Annotated
 import chromadb
 from chromadb.config import Settings
-from text_2_sql_core.connectors.open_ai import OpenAIConnector
+from text_2_sql_core.connectors.open_ai import EmbeddingBatcher, OpenAIConnector
+from text_2_sql_core.utils.config import get_config
 from text_2_sql_core.utils.database import DatabaseEngineSpecificFields
 
+# Documents embedded and upserted per call when indexing in bulk
+UPSERT_BATCH_SIZE = 250
+
+# Schema store fields returned by get_entity_schemas, before any engine specific ones
+SCHEMA_RETRIEVAL_FIELDS = (
+    "FQN",
+    "Entity",
+    "EntityName",
+    "Schema",
+    "Definition",
+    "Columns",
+    "EntityRelationships",
+    "CompleteEntityRelationshipsGraph",
+)
+
+# Schema fields left out of the filtered results when they are empty
+PRUNED_WHEN_EMPTY_FIELDS = frozenset(
+    ["CompleteEntityRelationshipsGraph", "SampleValues", "EntityRelationships"]
+)
+
+# Search results are reused for this many seconds, unless the index is written to
+SEARCH_RESULT_CACHE_TTL = 300
+SEARCH_RESULT_CACHE_SIZE = 1024
+
 
 class ChromaSearchConnector:
     """ChromaDB-based vector search connector to replace Azure AI Search"""
 
+    # Search results shared by every connector instance, keyed on the whole query;
+    # the agents often repeat the same schema and column value lookups
+    _result_cache: OrderedDict = OrderedDict()
+    _result_cache_stats = {"hits": 0, "misses": 0}
+
     def __init__(self):
         self.open_ai_connector = OpenAIConnector()
+        self.embedding_batcher = EmbeddingBatcher(self.open_ai_connector)
+        # Collection handles by name, so each search doesn't look the collection up again
+        self._collections = {}
         # Initialize ChromaDB client with settings for Streamlit Cloud compatibility
-        chroma_path = os.environ.get("CHROMA_DB_PATH", "./chroma_db")
+        chroma_path = get_config().chroma_db_path
         try:
             # Try to use PersistentClient with explicit settings
             settings = Settings(
@@ -34,15 +69,28 @@ class ChromaSearchConnector:
             # Fallback to basic Client for compatibility
             self.client = chromadb.Client(settings=Settings(anonymized_telemetry=False))
 
-    def _get_or_create_collection(self, collection_name: str):
+    @classmethod
+    def get_cache_stats(cls) -> dict:
+        """Get the hit and miss counts and current size of the search result cache."""
+        return {**cls._result_cache_stats, "size": len(cls._result_cache)}
+
+    @classmethod
+    def clear_result_cache(cls):
+        """Drop every cached search result, e.g. after the index is written to."""
+        cls._result_cache.clear()
+
+    async def _get_or_create_collection(self, collection_name: str):
         """Get or create a ChromaDB collection"""
-        try:
-            collection = self.client.get_collection(name=collection_name)
-        except:
-            collection = self.client.create_collection(
-                name=collection_name,
-                metadata={"hnsw:space": "cosine"}
-            )
+        if collection_name in self._collections:
+            return self._collections[collection_name]
+
+        collection = await asyncio.to_thread(
+            self.client.get_or_create_collection,
+            name=collection_name,
+            metadata={"hnsw:space": "cosine"}
+        )
+
+        self._collections[collection_name] = collection
         return collection
 
     async def run_ai_search_query(
@@ -55,27 +103,54 @@ class ChromaSearchConnector:
         top=5,
         include_scores=False,
         minimum_score: float = None,
+        where: dict = None,
     ):
-        """Run the AI search query using ChromaDB."""
+        """Run the AI search query using ChromaDB.
 
-        collection = self._get_or_create_collection(index_name)
+        where is passed through as Chroma's metadata filter, so excluded documents
+        are skipped by the search rather than taking up places in the top results."""
+
+        cache_key = (
+            index_name,
+            query,
+            tuple(vector_fields),
+            top,
+            include_scores,
+            minimum_score,
+            repr(where),
+            self.open_ai_connector.get_embedding_model(),
+        )
+        cached = self._result_cache.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] < SEARCH_RESULT_CACHE_TTL:
+            self._result_cache.move_to_end(cache_key)
+            self._result_cache_stats["hits"] += 1
+            # Copies, as callers trim the result dictionaries in place
+            return [result.copy() for result in cached[1]]
+
+        self._result_cache_stats["misses"] += 1
+
+        collection = await self._get_or_create_collection(index_name)
 
         # Generate query embedding if vector fields are specified
         if len(vector_fields) > 0:
-            embeddings = await self.open_ai_connector.run_embedding_request([query])
-            query_embedding = embeddings.data[0].embedding
+            query_embedding = await self.embedding_batcher.embed(query)
 
-            # Query with embeddings
-            results = collection.query(
+            # Query with embeddings; Chroma's local client blocks, so it runs in a
+            # worker thread to leave the event loop free for the other agents
+            results = await asyncio.to_thread(
+                collection.query,
                 query_embeddings=[query_embedding],
                 n_results=top,
+                where=where,
                 include=['documents', 'metadatas', 'distances']
             )
         else:
             # Full-text search using query
-            results = collection.query(
+            results = await asyncio.to_thread(
+                collection.query,
                 query_texts=[query],
                 n_results=top,
+                where=where,
                 include=['documents', 'metadatas', 'distances']
             )
 
@@ -83,22 +158,38 @@ class ChromaSearchConnector:
 
         # Process results
         if results['metadatas'] and len(results['metadatas'][0]) > 0:
-            for i, metadata in enumerate(results['metadatas'][0]):
-                # Convert distance to similarity score (1 - distance for cosine)
-                score = 1 - results['distances'][0][i] if results['distances'] else 1.0
+            metadatas = results['metadatas'][0]
 
-                # Filter by minimum score if specified
-                if minimum_score is not None and score < (minimum_score / 4.0):  # Adjust threshold
-                    continue
+            # Convert distance to similarity score (1 - distance for cosine)
+            if results['distances']:
+                scores = [1 - distance for distance in results['distances'][0]]
+            else:
+                scores = [1.0] * len(metadatas)
 
-                result_item = metadata.copy()
+            # Filter by minimum score if specified
+            minimum_similarity = (
+                minimum_score / 4.0 if minimum_score is not None else None  # Adjust threshold
+            )
 
-                if include_scores:
-                    result_item["@search.score"] = score
+            for metadata, score in zip(metadatas, scores):
+                if minimum_similarity is not None and score < minimum_similarity:
+                    continue
 
-                combined_results.append(result_item)
+                # The metadata dicts are fresh from this query, so they're used as is
+                combined_results.append(
+                    {**metadata, "@search.score": score} if include_scores else metadata
+                )
 
         logging.info("Results: %s", combined_results)
+
+        self._result_cache[cache_key] = (
+            time.monotonic(),
+            [result.copy() for result in combined_results],
+        )
+        self._result_cache.move_to_end(cache_key)
+        if len(self._result_cache) > SEARCH_RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+
         return combined_results
 
     async def get_column_values(
@@ -110,10 +201,7 @@ class ChromaSearchConnector:
     ):
         """Gets the values of a column in the SQL Database by selecting the most relevant entity based on the search term."""
 
-        index_name = os.environ.get(
-            "CHROMA_TEXT2SQL_COLUMN_VALUE_STORE",
-            "text2sql-column-value-store"
-        )
+        index_name = get_config().column_value_store
 
         values = await self.run_ai_search_query(
             text,
@@ -149,20 +237,18 @@ class ChromaSearchConnector:
 
         stringified_engine_specific_fields = list(map(str, engine_specific_fields))
 
-        retrieval_fields = [
-            "FQN",
-            "Entity",
-            "EntityName",
-            "Schema",
-            "Definition",
-            "Columns",
-            "EntityRelationships",
-            "CompleteEntityRelationshipsGraph",
-        ] + stringified_engine_specific_fields
-
-        index_name = os.environ.get(
-            "CHROMA_TEXT2SQL_SCHEMA_STORE",
-            "text2sql-schema-store"
+        retrieval_fields = [*SCHEMA_RETRIEVAL_FIELDS, *stringified_engine_specific_fields]
+
+        index_name = get_config().schema_store
+
+        # Exclude the entities in the search itself, so they don't use up the top 3.
+        # Chroma compares case-sensitively, so this matches on the lowercased copy of
+        # Entity stored at index time; documents indexed before it was stored have no
+        # EntityLower and are let through, to be caught by the check below instead
+        where = (
+            {"EntityLower": {"$nin": [entity.lower() for entity in excluded_entities]}}
+            if len(excluded_entities) > 0
+            else None
         )
 
         schemas = await self.run_ai_search_query(
@@ -173,6 +259,7 @@ class ChromaSearchConnector:
             None,
             top=3,
             minimum_score=1.5,
+            where=where,
         )
 
         fqn_to_trim = ".".join(stringified_engine_specific_fields)
@@ -182,40 +269,45 @@ class ChromaSearchConnector:
 
         filtered_schemas = []
         for schema in schemas:
-            if "FQN" in schema:
-                del schema["FQN"]
-
-            if (
-                schema.get("CompleteEntityRelationshipsGraph") is not None
-                and len(schema["CompleteEntityRelationshipsGraph"]) == 0
-            ):
-                del schema["CompleteEntityRelationshipsGraph"]
-            else:
-                if schema.get("CompleteEntityRelationshipsGraph"):
-                    schema["CompleteEntityRelationshipsGraph"] = list(
-                        map(
-                            lambda x: x.replace(fqn_to_trim, ""),
-                            schema["CompleteEntityRelationshipsGraph"],
-                        )
-                    )
-
-            if schema.get("SampleValues") is not None and len(schema.get("SampleValues", [])) == 0:
-                del schema["SampleValues"]
-
-            if (
-                schema.get("EntityRelationships") is not None
-                and len(schema.get("EntityRelationships", [])) == 0
-            ):
-                del schema["EntityRelationships"]
-
-            if schema.get("Entity", "").lower() not in excluded_entities:
-                filtered_schemas.append(schema)
-            else:
+            if schema.get("Entity", "").lower() in excluded_entities:
                 logging.info("Excluded entity: %s", schema.get("Entity"))
+                continue
+
+            # Drop the FQN, the lowercased Entity and any relationship or sample fields
+            # that came back empty
+            schema = {
+                field: value
+                for field, value in schema.items()
+                if field not in ("FQN", "EntityLower")
+                and not (
+                    field in PRUNED_WHEN_EMPTY_FIELDS
+                    and value is not None
+                    and len(value) == 0
+                )
+            }
+
+            if schema.get("CompleteEntityRelationshipsGraph"):
+                schema["CompleteEntityRelationshipsGraph"] = [
+                    entity.replace(fqn_to_trim, "")
+                    for entity in schema["CompleteEntityRelationshipsGraph"]
+                ]
+
+            filtered_schemas.append(schema)
 
         logging.info("Filtered Schemas: %s", filtered_schemas)
         return filtered_schemas
 
+    @staticmethod
+    def _document_metadata(document: dict, vector_fields: dict) -> dict:
+        """Get the metadata stored for a document: all its non-embedding fields, plus
+        a lowercased copy of Entity that searches can exclude entities by."""
+        metadata = {k: v for k, v in document.items() if k not in vector_fields.values()}
+
+        if isinstance(metadata.get("Entity"), str):
+            metadata["EntityLower"] = metadata["Entity"].lower()
+
+        return metadata
+
     async def add_entry_to_index(
         self, document: dict, vector_fields: dict, index_name: str
     ):
@@ -224,42 +316,80 @@ class ChromaSearchConnector:
         logging.info("Document: %s", document)
         logging.info("Vector Fields: %s", vector_fields)
 
-        for field in vector_fields.keys():
-            if field not in document.keys():
-                logging.error(f"Field {field} is not in the document.")
-                return
-
-        collection = self._get_or_create_collection(index_name)
-
-        fields_to_embed = {field: document[field] for field in vector_fields}
-        document["DateLastModified"] = datetime.now(timezone.utc).isoformat()
+        await self.add_entries_to_index([document], vector_fields, index_name)
 
-        try:
-            embeddings = await self.open_ai_connector.run_embedding_request(
-                list(fields_to_embed.values())
-            )
-
-            # Generate document ID
-            doc_id = base64.urlsafe_b64encode(
-                document["Question"].encode()
-            ).decode("utf-8")
-
-            # Prepare metadata (all non-embedding fields)
-            metadata = {k: v for k, v in document.items() if k not in vector_fields.values()}
-
-            # Use the first embedding for the document
-            embedding = embeddings.data[0].embedding
-
-            # Add to ChromaDB
-            collection.upsert(
-                ids=[doc_id],
-                embeddings=[embedding],
-                metadatas=[metadata],
-                documents=[document.get("Question", "")]
-            )
-
-            logging.info(f"Successfully added document to {index_name}")
-
-        except Exception as e:
-            logging.error("Failed to add item to index.")
-            logging.error("Error: %s", e)
+    async def add_entries_to_index(
+        self, documents: list[dict], vector_fields: dict, index_name: str
+    ):
+        """Add entries to the ChromaDB collection, embedding and upserting them in batches.
+
+        Each chunk of up to UPSERT_BATCH_SIZE documents takes one embedding request
+        and one upsert, rather than one of each per document."""
+
+        valid_documents = []
+        for document in documents:
+            missing_fields = [field for field in vector_fields if field not in document]
+            if len(missing_fields) > 0:
+                for field in missing_fields:
+                    logging.error(f"Field {field} is not in the document.")
+                continue
+
+            valid_documents.append(document)
+
+        if len(valid_documents) == 0:
+            return
+
+        collection = await self._get_or_create_collection(index_name)
+
+        # The document is stored with the embedding of its first vector field
+        embedding_field = next(iter(vector_fields), None)
+        date_last_modified = datetime.now(timezone.utc).isoformat()
+
+        for start in range(0, len(valid_documents), UPSERT_BATCH_SIZE):
+            try:
+                # Documents are keyed on their question; upsert rejects a batch holding
+                # the same ID twice, so keep the last one, as separate upserts would
+                documents_by_id = {
+                    base64.urlsafe_b64encode(document["Question"].encode()).decode(
+                        "utf-8"
+                    ): document
+                    for document in valid_documents[start:start + UPSERT_BATCH_SIZE]
+                }
+                batch = list(documents_by_id.values())
+
+                for document in batch:
+                    document["DateLastModified"] = date_last_modified
+
+                # Documents often share text, so each distinct text is embedded once
+                texts = [document[embedding_field] for document in batch]
+                unique_texts = list(dict.fromkeys(texts))
+
+                embeddings = await self.open_ai_connector.run_embedding_request(
+                    unique_texts
+                )
+                embeddings_by_text = {
+                    text: item.embedding
+                    for text, item in zip(unique_texts, embeddings.data)
+                }
+
+                await asyncio.to_thread(
+                    collection.upsert,
+                    ids=list(documents_by_id),
+                    embeddings=[embeddings_by_text[text] for text in texts],
+                    metadatas=[
+                        self._document_metadata(document, vector_fields)
+                        for document in batch
+                    ],
+                    documents=[document.get("Question", "") for document in batch],
+                )
+
+                logging.info(
+                    f"Successfully added {len(batch)} documents to {index_name}"
+                )
+
+            except Exception as e:
+                logging.error("Failed to add items to index.")
+                logging.error("Error: %s", e)
+
+        # Cached searches may no longer match what the index returns
+        self.clear_result_cache()
@@ -1,25 +1,55 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License
+from collections import OrderedDict
 from openai import AsyncOpenAI
-import os
+import asyncio
 import dotenv
+from text_2_sql_core.utils.config import get_config
+from text_2_sql_core.utils.loop_resources import LoopResources
 
 dotenv.load_dotenv()
 
 
 class OpenAIConnector:
+    # API clients per event loop, keyed on (provider, api key), shared by every
+    # connector instance so each request reuses the pooled keep-alive connections
+    _api_clients = LoopResources(close=lambda client: client.close())
+
+    @classmethod
+    def get_api_client(cls, provider: str, api_key: str):
+        """Gets the OpenAI or Anthropic client shared on the running event loop.
+
+        The clients' httpx connections are bound to the loop they were opened on,
+        so one client is kept per loop and is closed when that loop shuts down."""
+
+        def create_client():
+            if provider in ["claude", "anthropic"]:
+                from anthropic import AsyncAnthropic
+
+                return AsyncAnthropic(api_key=api_key)
+            return AsyncOpenAI(api_key=api_key)
+
+        return cls._api_clients.get((provider, api_key), create_client)
+
+    @classmethod
+    def get_embedding_model(cls) -> str:
+        """Get the OpenAI embedding model name."""
+        return get_config().embedding_model
+
     @classmethod
     def get_authentication_properties(cls) -> dict:
         """Get API key - supports OpenAI or Claude (Anthropic)"""
+        config = get_config()
+
         # Check for provider type
-        provider = os.environ.get("LLM_PROVIDER", "openai").lower()
+        provider = config.provider
 
         if provider == "claude" or provider == "anthropic":
-            api_key = os.environ.get("ANTHROPIC_API_KEY") or os.environ.get("CLAUDE_API_KEY")
+            api_key = config.claude_api_key
             if not api_key:
                 raise ValueError("ANTHROPIC_API_KEY or CLAUDE_API_KEY environment variable is required for Claude")
         else:
-            api_key = os.environ.get("OPENAI_API_KEY") or os.environ.get("OpenAI__ApiKey")
+            api_key = config.openai_api_key
             if not api_key:
                 raise ValueError("OPENAI_API_KEY environment variable is required")
 
@@ -50,32 +80,30 @@ class OpenAIConnector:
         self, messages, temperature, max_tokens, model, response_format, api_key
     ):
         """Run completion using OpenAI API"""
-        from openai import AsyncOpenAI
-
         # Map model names to OpenAI API model names
         if model == "4o-mini":
-            model_name = os.environ.get("OpenAI__MiniCompletionDeployment", "gpt-4o-mini")
+            model_name = get_config().mini_completion_deployment
         elif model == "4o":
-            model_name = os.environ.get("OpenAI__CompletionDeployment", "gpt-4o")
+            model_name = get_config().completion_deployment
         else:
             model_name = model
 
-        async with AsyncOpenAI(api_key=api_key) as open_ai_client:
-            if response_format is not None:
-                response = await open_ai_client.beta.chat.completions.parse(
-                    model=model_name,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    response_format=response_format,
-                )
-            else:
-                response = await open_ai_client.chat.completions.create(
-                    model=model_name,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                )
+        open_ai_client = self.get_api_client("openai", api_key)
+        if response_format is not None:
+            response = await open_ai_client.beta.chat.completions.parse(
+                model=model_name,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                response_format=response_format,
+            )
+        else:
+            response = await open_ai_client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
 
         message = response.choices[0].message
         if response_format is not None and message.parsed is not None:
@@ -90,14 +118,14 @@ class OpenAIConnector:
     ):
         """Run completion using Claude/Anthropic API"""
         try:
-            from anthropic import AsyncAnthropic
+            client = self.get_api_client("anthropic", api_key)
         except ImportError:
             raise ImportError("anthropic package not installed. Run: pip install anthropic")
 
         # Map model names to Claude models
         model_map = {
-            "4o-mini": os.environ.get("CLAUDE_MINI_MODEL", "claude-3-5-haiku-20241022"),
-            "4o": os.environ.get("CLAUDE_MODEL", "claude-3-5-sonnet-20241022"),
+            "4o-mini": get_config().claude_mini_model,
+            "4o": get_config().claude_model,
         }
         model_name = model_map.get(model, model)
 
@@ -114,21 +142,28 @@ class OpenAIConnector:
                     "content": msg["content"]
                 })
 
-        async with AsyncAnthropic(api_key=api_key) as client:
-            kwargs = {
-                "model": model_name,
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "messages": claude_messages,
-            }
+        kwargs = {
+            "model": model_name,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": claude_messages,
+        }
 
-            if system_message:
-                kwargs["system"] = system_message
+        if system_message:
+            # Mark the system prompt (schema context, repeated on every call) as a
+            # cacheable prefix; prompts under the model's minimum length are sent as-is
+            kwargs["system"] = [
+                {
+                    "type": "text",
+                    "text": system_message,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ]
 
-            response = await client.messages.create(**kwargs)
+        response = await client.messages.create(**kwargs)
 
-            # Extract text from response
-            return response.content[0].text
+        # Extract text from response
+        return response.content[0].text
 
     async def run_embedding_request(self, batch: list[str]):
         """Generate embeddings for text - uses OpenAI (Claude doesn't have embeddings API)"""
@@ -138,7 +173,7 @@ class OpenAIConnector:
         # You'll need both API keys if using Claude for completions
         if provider in ["claude", "anthropic"]:
             # Try to get OpenAI key for embeddings
-            openai_key = os.environ.get("OPENAI_API_KEY")
+            openai_key = get_config().openai_api_key
             if not openai_key:
                 raise ValueError(
                     "OPENAI_API_KEY required for embeddings (Claude doesn't support embeddings). "
@@ -146,12 +181,95 @@ class OpenAIConnector:
                 )
             api_key = openai_key
 
-        model = os.environ.get("OpenAI__EmbeddingModel", "text-embedding-3-small")
+        model = self.get_embedding_model()
 
-        async with AsyncOpenAI(api_key=api_key) as open_ai_client:
-            embeddings = await open_ai_client.embeddings.create(
-                model=model,
-                input=batch,
-            )
+        open_ai_client = self.get_api_client("openai", api_key)
+        embeddings = await open_ai_client.embeddings.create(
+            model=model,
+            input=batch,
+        )
 
         return embeddings
+
+
+class EmbeddingBatcher:
+    """Coalesces single-text embedding requests made close together into one call.
+
+    The schema selection agent searches for every entity group at once, so each
+    search would otherwise send its own one-item embedding request. Embeddings are
+    also kept in an LRU cache shared by every batcher, keyed on the model and text,
+    so a question searched again in the session doesn't go back to the API."""
+
+    _cache: OrderedDict = OrderedDict()
+    cache_size = 4096
+
+    def __init__(
+        self,
+        open_ai_connector: OpenAIConnector,
+        window: float = 0.01,
+        max_batch: int = 32,
+    ):
+        self.open_ai_connector = open_ai_connector
+        self.window = window
+        self.max_batch = max_batch
+
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._flush_handle = None
+        self._requests: set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> list[float]:
+        """Embeds the text along with any others requested within the batch window.
+
+        Args:
+        ----
+            text (str): The text to embed.
+
+        Returns:
+            list[float]: The embedding for the text."""
+        key = (self.open_ai_connector.get_embedding_model(), text)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+
+        embedding = await future
+
+        self._cache[key] = embedding
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return embedding
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+
+        request = asyncio.ensure_future(self._run_batch(batch))
+        self._requests.add(request)
+        request.add_done_callback(self._requests.discard)
+
+    async def _run_batch(self, batch: list[tuple[str, asyncio.Future]]):
+        try:
+            embeddings = await self.open_ai_connector.run_embedding_request(
+                [text for text, _ in batch]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), item in zip(batch, embeddings.data):
+            if not future.done():
+                future.set_result(item.embedding)
@@ -1,9 +1,12 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 
+import asyncio
 import os
 import sqlite3
 import logging
+import threading
+import time
 from typing import Annotated
 import json
 import re
@@ -11,6 +14,39 @@ import re
 from text_2_sql_core.utils.database import DatabaseEngine
 from text_2_sql_core.connectors.sql import SqlConnector
 
+# One connection per (worker thread, database file). Reusing the connection keeps
+# sqlite3's per-connection statement cache warm, so repeated queries skip re-parsing
+# and re-planning; per-thread because sqlite3 connections can't cross threads.
+_thread_connections = threading.local()
+
+SQLITE_MMAP_SIZE = 1 << 30  # bytes
+SQLITE_CACHE_SIZE_KIB = 64 * 1024
+# Prepared statements kept per connection (sqlite3's default is 128); agent runs
+# issue many distinct schema and value lookups, so allow more before evicting
+SQLITE_CACHED_STATEMENTS = 256
+# How many VM instructions run between deadline checks when a query has a timeout
+SQLITE_PROGRESS_INTERVAL = 10_000
+
+
+def _get_thread_connection(db_file: str) -> sqlite3.Connection:
+    """Get this thread's connection to the database file, opening it on first use."""
+    connections = getattr(_thread_connections, "connections", None)
+    if connections is None:
+        connections = _thread_connections.connections = {}
+
+    conn = connections.get(db_file)
+    if conn is None:
+        conn = connections[db_file] = sqlite3.connect(
+            db_file, cached_statements=SQLITE_CACHED_STATEMENTS
+        )
+        # Read through a memory map (shared with other connections via the page cache)
+        # and keep a larger page cache, since the connection now outlives a single query
+        conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}")
+        # Sorts and GROUP BYs in generated queries build temp b-trees; keep them in RAM
+        conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
 
 class SQLiteSqlConnector(SqlConnector):
     def __init__(self):
@@ -65,6 +101,7 @@ class SQLiteSqlConnector(SqlConnector):
         ],
         cast_to: any = None,
         limit=None,
+        timeout: float | None = None,
     ) -> list[dict]:
         """Run the SQL query against the database.
 
@@ -72,6 +109,8 @@ class SQLiteSqlConnector(SqlConnector):
             sql_query: The SQL query to execute.
             cast_to: Optional type to cast results to.
             limit: Optional limit on number of results.
+            timeout: Optional limit in seconds; the query is aborted in its worker
+                thread once it runs past it, raising TimeoutError.
 
         Returns:
             List of dictionaries containing query results.
@@ -87,27 +126,51 @@ class SQLiteSqlConnector(SqlConnector):
 
         logging.info(f"Running query against {db_file}: {sql_query}")
 
-        results = []
-        with sqlite3.connect(db_file) as conn:
-            cursor = conn.cursor()
-            cursor.execute(sql_query)
+        def run_query():
+            # sqlite3 connections are bound to the thread that opened them, so the
+            # whole execute/fetch cycle runs in one worker thread
+            with _get_thread_connection(db_file) as conn:
+                if timeout is not None:
+                    # A non-zero return from the handler makes SQLite abort the
+                    # statement, so the query itself stops rather than just the await
+                    deadline = time.monotonic() + timeout
+                    conn.set_progress_handler(
+                        lambda: time.monotonic() > deadline, SQLITE_PROGRESS_INTERVAL
+                    )
 
-            columns = (
-                [column[0] for column in cursor.description]
-                if cursor.description
-                else []
-            )
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(sql_query)
 
-            if limit is not None:
-                rows = cursor.fetchmany(limit)
-            else:
-                rows = cursor.fetchall()
+                    columns = (
+                        [column[0] for column in cursor.description]
+                        if cursor.description
+                        else []
+                    )
 
-            for row in rows:
-                if cast_to:
-                    results.append(cast_to.from_sql_row(row, columns))
-                else:
-                    results.append(dict(zip(columns, row)))
+                    if limit is not None:
+                        rows = cursor.fetchmany(limit)
+                    else:
+                        rows = cursor.fetchall()
+                except sqlite3.OperationalError:
+                    if timeout is not None and time.monotonic() > deadline:
+                        raise TimeoutError(
+                            f"Query timed out after {timeout} seconds"
+                        ) from None
+                    raise
+                finally:
+                    # Reset the statement so the pooled connection holds no open read
+                    cursor.close()
+                    if timeout is not None:
+                        conn.set_progress_handler(None, 0)
+
+            # Build the row objects here too, so large results don't hold up the event loop
+            if cast_to:
+                return [cast_to.from_sql_row(row, columns) for row in rows]
+            return [dict(zip(columns, row)) for row in rows]
+
+        # Run off the event loop so concurrent queries overlap instead of blocking it
+        results = await asyncio.to_thread(run_query)
 
         logging.debug("Results: %s", results)
         return results
@@ -52,8 +52,12 @@ class SqlSchemaSelectionAgentCustomAgent:
                 self.sql_connector.get_column_values(filter_condition, as_json=False)
             )
 
-        schemas_results = await asyncio.gather(*entity_search_tasks)
-        column_value_results = await asyncio.gather(*column_search_tasks)
+        # Run the schema and column value searches together rather than one group
+        # after the other
+        schemas_results, column_value_results = await asyncio.gather(
+            asyncio.gather(*entity_search_tasks),
+            asyncio.gather(*column_search_tasks),
+        )
 
         # Group schemas by database for Spider evaluation support
         schemas_by_db = {}
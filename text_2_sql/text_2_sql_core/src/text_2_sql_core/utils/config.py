@@ -0,0 +1,54 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import functools
+import os
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """The environment settings read by the OpenAI and ChromaDB connectors and the
+    AutoGen model clients."""
+
+    provider: str
+    openai_api_key: str | None
+    claude_api_key: str | None
+    embedding_model: str
+    mini_completion_deployment: str
+    completion_deployment: str
+    claude_mini_model: str
+    claude_model: str
+    chroma_db_path: str
+    column_value_store: str
+    schema_store: str
+    use_llm_cache: bool
+
+
+@functools.cache
+def get_config() -> Config:
+    """Reads the settings from the environment on first use and keeps them.
+
+    Read lazily rather than at import, so values loaded into the environment after
+    import (e.g. Streamlit secrets) are still picked up.
+
+    Returns:
+        Config: The settings."""
+    env = os.environ
+    return Config(
+        provider=env.get("LLM_PROVIDER", "openai").lower(),
+        openai_api_key=env.get("OPENAI_API_KEY") or env.get("OpenAI__ApiKey"),
+        claude_api_key=env.get("ANTHROPIC_API_KEY") or env.get("CLAUDE_API_KEY"),
+        embedding_model=env.get("OpenAI__EmbeddingModel", "text-embedding-3-small"),
+        mini_completion_deployment=env.get(
+            "OpenAI__MiniCompletionDeployment", "gpt-4o-mini"
+        ),
+        completion_deployment=env.get("OpenAI__CompletionDeployment", "gpt-4o"),
+        claude_mini_model=env.get("CLAUDE_MINI_MODEL", "claude-3-5-haiku-20241022"),
+        claude_model=env.get("CLAUDE_MODEL", "claude-3-5-sonnet-20241022"),
+        chroma_db_path=env.get("CHROMA_DB_PATH", "./chroma_db"),
+        column_value_store=env.get(
+            "CHROMA_TEXT2SQL_COLUMN_VALUE_STORE", "text2sql-column-value-store"
+        ),
+        schema_store=env.get("CHROMA_TEXT2SQL_SCHEMA_STORE", "text2sql-schema-store"),
+        use_llm_cache=env.get("Text2Sql__UseLLMCache", "False").lower() == "true",
+    )
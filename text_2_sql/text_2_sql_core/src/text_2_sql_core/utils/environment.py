@@ -1,5 +1,6 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
+import functools
 import os
 from enum import Enum
 
@@ -12,10 +13,12 @@ class IdentityType(Enum):
     KEY = "key"
 
 
+@functools.cache
 def get_identity_type() -> IdentityType:
     """This function returns the identity type.
 
-    For open source version, always returns KEY (no Azure managed identity)
+    For open source version, always returns KEY (no Azure managed identity).
+    Read from the environment on the first call only.
 
     Returns:
         IdentityType: The identity type
@@ -0,0 +1,71 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class LoopResources:
+    """Objects kept per event loop, closed and released when that loop shuts down.
+
+    Pooled HTTP clients hold transports that reference the loop they were opened on,
+    so a cache keyed weakly on the loop never lets go of it. Entries are held here
+    until the loop's async generators are shut down (as asyncio.run does on exit),
+    at which point each object is closed on that loop. Entries for loops closed
+    without that step are dropped on the next lookup from another loop."""
+
+    def __init__(self, close: Callable[[Any], Awaitable[None]] | None = None):
+        self._close = close
+        # id(loop) -> (loop, objects keyed by the caller, shutdown hook)
+        self._entries: dict[int, tuple] = {}
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Gets the object for the key on the running loop, creating it on first use.
+
+        Args:
+        ----
+            key (Hashable): Identifies the object within the loop.
+            factory (Callable[[], Any]): Creates the object when there isn't one yet.
+
+        Returns:
+            Any: The object shared on the running loop."""
+        loop = asyncio.get_running_loop()
+
+        entry = self._entries.get(id(loop))
+        if entry is None or entry[0] is not loop:
+            self._drop_closed_loops()
+            entry = self._register(loop)
+
+        objects = entry[1]
+        if key not in objects:
+            objects[key] = factory()
+
+        return objects[key]
+
+    def _register(self, loop: asyncio.AbstractEventLoop) -> tuple:
+        """Starts tracking the loop, hooking its shutdown to close the objects."""
+        shutdown_hook = self._close_on_shutdown(id(loop))
+        entry = self._entries[id(loop)] = (loop, {}, shutdown_hook)
+
+        # Running the generator up to its yield registers it with the loop, which
+        # closes it (running the finally block) from shutdown_asyncgens
+        asyncio.ensure_future(anext(shutdown_hook))
+        return entry
+
+    async def _close_on_shutdown(self, loop_id: int):
+        try:
+            yield
+        finally:
+            _, objects, _ = self._entries.pop(loop_id, (None, {}, None))
+            if self._close is not None:
+                for obj in objects.values():
+                    try:
+                        await self._close(obj)
+                    except Exception as e:
+                        logging.warning("Failed to close %r: %s", obj, e)
+
+    def _drop_closed_loops(self) -> None:
+        """Releases the objects of loops that were closed without shutting down."""
+        for loop_id, (loop, _, _) in list(self._entries.items()):
+            if loop.is_closed():
+                del self._entries[loop_id]
@@ -4,6 +4,7 @@ Unified Text2SQL Streamlit App - Powered by Claude AI
 Combines pattern matching, Claude AI-powered SQL generation, and AutoGen multi-agent system
 """
 import streamlit as st
+import httpx
 import sys
 import os
 import json
@@ -11,11 +12,14 @@ import sqlite3
 import pandas as pd
 from pathlib import Path
 import asyncio
-from datetime import datetime
+import concurrent.futures
 import logging
 import re
+import threading
 import time
 import uuid
+import itertools
+from collections import OrderedDict, deque
 
 # Import MLflow tracking
 from mlflow_tracking import get_tracker, render_mlflow_stats
@@ -51,7 +55,9 @@ st.set_page_config(
 
 # Initialize session state
 if "query_history" not in st.session_state:
-    st.session_state.query_history = []
+    # Only the most recent queries are kept; older ones drop off automatically
+    st.session_state.query_history = deque(maxlen=50)
+    st.session_state.query_count = 0
 if "processing_mode" not in st.session_state:
     st.session_state.processing_mode = "Smart Auto"
 if "session_id" not in st.session_state:
@@ -65,12 +71,22 @@ if "mlflow_tracker" not in st.session_state:
 @st.cache_resource
 def initialize_systems():
     """Initialize all Text2SQL systems"""
+    # AutoGen's imports are the slow part, so they start first and load while the
+    # rest is set up
+    autogen_future = start_autogen_warmup()
+
     systems = {
         "db_connector": None,
         "llm_client": None,
         "llm_provider": None,
-        "autogen_system": None,
+        "autogen_future": None,
         "schema_info": None,
+        "total_rows": 0,
+        "ai_system_prompt": None,
+        # Shared by every session; resolved here because the query coroutines run on
+        # the worker thread, where Streamlit's session and cache APIs aren't available
+        "sql_cache": SQLGenerationCache(),
+        "db_semaphore": get_event_loop_worker().db_semaphore,
     }
 
     # Initialize database connector
@@ -81,45 +97,75 @@ def initialize_systems():
     except Exception as e:
         logger.error(f"Database connector failed: {e}")
 
-    # Initialize LLM client (Claude or OpenAI based on LLM_PROVIDER)
+    # Initialize LLM client (Claude or OpenAI based on LLM_PROVIDER). The client and
+    # its connection pool are shared by every session, so keep-alive connections are
+    # reused across questions instead of paying a TLS handshake per call.
     try:
         provider = os.getenv("LLM_PROVIDER", "claude").lower()
+        http_options = {
+            "http_client": httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+            ),
+            "timeout": httpx.Timeout(60.0, connect=5.0),
+        }
 
         if provider in ["claude", "anthropic"]:
             from anthropic import AsyncAnthropic
             api_key = os.getenv("ANTHROPIC_API_KEY") or os.getenv("CLAUDE_API_KEY")
-            systems["llm_client"] = AsyncAnthropic(api_key=api_key)
+            systems["llm_client"] = AsyncAnthropic(api_key=api_key, **http_options)
             systems["llm_provider"] = "claude"
         else:
             from openai import AsyncOpenAI
             api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OpenAI__ApiKey")
-            systems["llm_client"] = AsyncOpenAI(api_key=api_key)
+            systems["llm_client"] = AsyncOpenAI(api_key=api_key, **http_options)
             systems["llm_provider"] = "openai"
     except Exception as e:
         logger.error(f"LLM client failed: {e}")
         systems["llm_client"] = None
         systems["llm_provider"] = None
 
-    # Initialize AutoGen system (with error handling)
+    # Get database schema
+    systems["schema_info"] = get_database_schema()
+    if systems["schema_info"]:
+        systems["total_rows"] = sum(
+            table["row_count"] for table in systems["schema_info"].values()
+        )
+    systems["ai_system_prompt"] = build_ai_system_prompt(systems["schema_info"])
+
+    systems["autogen_future"] = autogen_future
+    return systems
+
+
+def warm_autogen_imports():
+    """Import the AutoGen packages, returning whether they are available
+
+    Each question builds its own AutoGenText2Sql (see process_autogen_async), so
+    only the imports are loaded ahead of time."""
     try:
-        from autogen_text_2_sql.autogen_text_2_sql import AutoGenText2Sql
-        from autogen_text_2_sql.state_store import InMemoryStateStore
+        import autogen_text_2_sql.autogen_text_2_sql  # noqa: F401
+        import autogen_text_2_sql.state_store  # noqa: F401
 
-        state_store = InMemoryStateStore()
-        systems["autogen_system"] = AutoGenText2Sql(
-            state_store=state_store,
-            thread_id="streamlit_session",
-            enable_cache=True,
-            enable_column_value_store=True,
-        )
+        return True
     except Exception as e:
         logger.warning(f"AutoGen system not available: {e}")
-        systems["autogen_system"] = None
+        return False
 
-    # Get database schema
-    systems["schema_info"] = get_database_schema()
 
-    return systems
+def start_autogen_warmup():
+    """Load the AutoGen imports on a background thread, returning a future for the outcome"""
+    future = concurrent.futures.Future()
+    threading.Thread(
+        target=lambda: future.set_result(warm_autogen_imports()),
+        name="autogen-init",
+        daemon=True,
+    ).start()
+    return future
+
+
+def autogen_ready(systems):
+    """Whether AutoGen has finished loading and is available, without waiting for it"""
+    future = systems["autogen_future"]
+    return future.done() and future.result()
 
 
 @st.cache_data(ttl=600)
@@ -130,27 +176,35 @@ def get_database_schema():
         if not db_path or not os.path.exists(db_path):
             return None
 
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        schema_info = {}
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
-
-        for table in tables:
-            table_name = table[0]
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = cursor.fetchall()
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            row_count = cursor.fetchone()[0]
-
-            schema_info[table_name] = {
-                "columns": [{"name": col[1], "type": col[2]} for col in columns],
-                "row_count": row_count,
-                "column_names": [col[1] for col in columns],
-            }
+        # Read-only, as the app never writes to the database
+        conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            # Every table's columns in one statement, rather than a PRAGMA per table
+            schema_info = {}
+            for table_name, column_name, column_type in conn.execute(
+                "SELECT m.name, p.name, p.type FROM sqlite_master m "
+                "JOIN pragma_table_info(m.name) p WHERE m.type = 'table' ORDER BY m.rowid, p.cid"
+            ):
+                table = schema_info.setdefault(
+                    table_name, {"columns": [], "row_count": 0, "column_names": []}
+                )
+                table["columns"].append({"name": column_name, "type": column_type})
+                table["column_names"].append(column_name)
+
+            # And every table's row count in one compound statement
+            counts = " UNION ALL ".join(
+                "SELECT '{name}', COUNT(*) FROM \"{ident}\"".format(
+                    name=table_name.replace("'", "''"),
+                    ident=table_name.replace('"', '""'),
+                )
+                for table_name in schema_info
+            )
+            if counts:
+                for table_name, row_count in conn.execute(counts):
+                    schema_info[table_name]["row_count"] = row_count
+        finally:
+            conn.close()
 
-        conn.close()
         return schema_info
     except Exception as e:
         logger.error(f"Failed to get database schema: {e}")
@@ -187,71 +241,94 @@ PATTERN_QUERIES = {
                        ORDER BY OrderDate DESC LIMIT 10""",
 }
 
+# All the patterns as one case-insensitive alternation, so matching a question is a
+# single regex search rather than a substring scan per pattern
+PATTERN_RE = re.compile("|".join(map(re.escape, PATTERN_QUERIES)), re.IGNORECASE)
+
+# Phrases that mark a question as complex enough for AutoGen
+COMPLEX_INDICATORS = [
+    "analysis",
+    "compare",
+    "correlation",
+    "trend",
+    "comprehensive",
+    "multi-dimensional",
+    "progression",
+    "deteriorating",
+    "concerning patterns",
+    "early warning",
+    "multiple warning signs",
+]
+
+# Patterns and complexity indicators in one alternation, so choosing a mode takes a
+# single scan of the question; patterns come first so they win at the same position
+MODE_RE = re.compile(
+    "(?P<pattern>{})|(?P<complex>{})".format(
+        "|".join(map(re.escape, PATTERN_QUERIES)),
+        "|".join(map(re.escape, COMPLEX_INDICATORS)),
+    ),
+    re.IGNORECASE,
+)
+
+
+def match_pattern(question):
+    """Return the pattern from PATTERN_QUERIES found earliest in the question, if any"""
+    match = PATTERN_RE.search(question)
+    return match.group(0).lower() if match else None
+
 
 def detect_processing_mode(question):
     """Determine the best processing mode for the question"""
-    question_lower = question.lower()
-
-    # Check for pattern match
-    for pattern in PATTERN_QUERIES.keys():
-        if pattern in question_lower:
+    # A pattern match anywhere wins; otherwise any complexity indicator means AutoGen
+    is_complex = False
+    for match in MODE_RE.finditer(question):
+        if match.lastgroup == "pattern":
             return "Pattern Match"
+        is_complex = True
+
+    return "AutoGen Multi-Agent" if is_complex else "AI-Powered"
+
 
-    # Check complexity indicators for AutoGen
-    complex_indicators = [
-        "analysis",
-        "compare",
-        "correlation",
-        "trend",
-        "comprehensive",
-        "multi-dimensional",
-        "progression",
-        "deteriorating",
-        "concerning patterns",
-        "early warning",
-        "multiple warning signs",
-    ]
+# Upper bound on a single query, so one runaway scan can't hold a slot indefinitely
+DB_QUERY_TIMEOUT = 30
 
-    if any(indicator in question_lower for indicator in complex_indicators):
-        return "AutoGen Multi-Agent"
 
-    return "AI-Powered"
+async def execute_query(db_connector, semaphore, sql_query):
+    """Run a query once a database slot is free, aborting it after DB_QUERY_TIMEOUT"""
+    # The connector stops the query in its worker thread at the deadline, so the slot
+    # is held until the database work has actually finished
+    async with semaphore:
+        return await db_connector.query_execution(sql_query, timeout=DB_QUERY_TIMEOUT)
 
 
-async def process_pattern_match(question, db_connector):
+async def process_pattern_match(question, db_connector, db_semaphore):
     """Process using pattern matching (fastest)"""
-    question_lower = question.lower()
-
-    for pattern, sql_query in PATTERN_QUERIES.items():
-        if pattern in question_lower:
-            try:
-                result = await db_connector.query_execution(sql_query)
-                return {
-                    "method": "Pattern Match",
-                    "sql_query": sql_query,
-                    "results": result,
-                    "success": True,
-                    "explanation": f"Matched pattern '{pattern}'",
-                }
-            except Exception as e:
-                return {
-                    "method": "Pattern Match",
-                    "sql_query": sql_query,
-                    "results": None,
-                    "success": False,
-                    "error": str(e),
-                }
-
-    return None
-
-
-async def process_ai_powered(question, db_connector, llm_client, llm_provider, schema_info):
-    """Process using AI SQL generation (Claude or OpenAI)"""
+    pattern = match_pattern(question)
+    if pattern is None:
+        return None
+
+    sql_query = PATTERN_QUERIES[pattern]
     try:
-        # Create schema context
-        schema_context = create_schema_context(schema_info)
+        result = await execute_query(db_connector, db_semaphore, sql_query)
+        return {
+            "method": "Pattern Match",
+            "sql_query": sql_query,
+            "results": result,
+            "success": True,
+            "explanation": f"Matched pattern '{pattern}'",
+        }
+    except Exception as e:
+        return {
+            "method": "Pattern Match",
+            "sql_query": sql_query,
+            "results": None,
+            "success": False,
+            "error": str(e),
+        }
+
 
-        system_prompt = f"""You are an expert SQL analyst. Generate precise SQL queries for the AdventureWorks sales database.
+# System prompt for AI-powered SQL generation, filled in once with the schema context
+AI_SYSTEM_PROMPT = """You are an expert SQL analyst. Generate precise SQL queries for the AdventureWorks sales database.
 
 {schema_context}
 
@@ -272,12 +349,76 @@ RULES:
 
 Return ONLY the SQL query, no explanations or markdown formatting."""
 
+# Markdown code fence the model sometimes wraps its SQL in, at either end of the reply
+SQL_FENCE_RE = re.compile(r"^```(?:sql)?\s*|\s*```$")
+
+
+def build_ai_system_prompt(schema_info):
+    """Build the AI system prompt for the schema; done once when the systems start"""
+    return AI_SYSTEM_PROMPT.format(schema_context=create_schema_context(schema_info))
+
+
+class SQLGenerationCache:
+    """Generated SQL for recently asked questions, so asking again skips the LLM call.
+
+    Keyed on the provider, model and the question with case and spacing normalised.
+    Only SQL that executed successfully is stored; the query is still run on a hit."""
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(llm_provider, model, question):
+        return (llm_provider, model, " ".join(question.lower().split()))
+
+    def get(self, llm_provider, model, question):
+        key = self._key(llm_provider, model, question)
+        with self._lock:
+            sql_query = self._entries.get(key)
+            if sql_query is not None:
+                self._entries.move_to_end(key)
+            return sql_query
+
+    def put(self, llm_provider, model, question, sql_query):
+        key = self._key(llm_provider, model, question)
+        with self._lock:
+            self._entries[key] = sql_query
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+async def process_ai_powered(
+    question, db_connector, db_semaphore, llm_client, llm_provider, system_prompt, sql_cache
+):
+    """Process using AI SQL generation (Claude or OpenAI)"""
+    try:
+        if llm_provider == "claude":
+            model = os.getenv("CLAUDE_MODEL", "claude-3-haiku-20240307")
+        else:
+            model = "gpt-4o-mini"
+
+        # Reuse the SQL generated for the same question earlier
+        sql_query = sql_cache.get(llm_provider, model, question)
+        if sql_query is not None:
+            result = await execute_query(db_connector, db_semaphore, sql_query)
+
+            return {
+                "method": f"AI-Powered ({llm_provider.upper()})",
+                "sql_query": sql_query,
+                "results": result,
+                "success": True,
+                "explanation": f"Cached AI-generated SQL using {llm_provider.upper()}: '{question}'",
+            }
+
         user_prompt = f"Question: {question}"
 
         # Use Claude or OpenAI based on provider
         if llm_provider == "claude":
             response = await llm_client.messages.create(
-                model=os.getenv("CLAUDE_MODEL", "claude-3-haiku-20240307"),
+                model=model,
                 max_tokens=1000,
                 temperature=0.1,
                 system=system_prompt,
@@ -289,7 +430,7 @@ Return ONLY the SQL query, no explanations or markdown formatting."""
         else:
             # OpenAI
             response = await llm_client.chat.completions.create(
-                model="gpt-4o-mini",
+                model=model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt},
@@ -300,13 +441,12 @@ Return ONLY the SQL query, no explanations or markdown formatting."""
             sql_query = response.choices[0].message.content.strip()
 
         # Clean up SQL query
-        sql_query = re.sub(r"^```sql\s*", "", sql_query)
-        sql_query = re.sub(r"^```\s*", "", sql_query)
-        sql_query = re.sub(r"\s*```$", "", sql_query)
-        sql_query = sql_query.strip()
+        sql_query = SQL_FENCE_RE.sub("", sql_query).strip()
 
         # Execute the query
-        result = await db_connector.query_execution(sql_query)
+        result = await execute_query(db_connector, db_semaphore, sql_query)
+
+        sql_cache.put(llm_provider, model, question, sql_query)
 
         return {
             "method": f"AI-Powered ({llm_provider.upper()})",
@@ -327,185 +467,219 @@ Return ONLY the SQL query, no explanations or markdown formatting."""
         }
 
 
-def process_autogen_sync(question):
-    """Synchronous wrapper for AutoGen multi-agent system - creates fresh system in isolated thread"""
-    import asyncio
-    import os
-    import sys
-    from pathlib import Path
-    from dotenv import load_dotenv
+async def batch_process_ai_powered(questions, systems, max_concurrent=8):
+    """Run several questions through AI-powered generation concurrently, in order
+
+    At most max_concurrent LLM calls are in flight at once."""
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def process_one(question):
+        async with semaphore:
+            start_time = time.perf_counter()
+            response = await process_ai_powered(
+                question,
+                systems["db_connector"],
+                systems["db_semaphore"],
+                systems["llm_client"],
+                systems["llm_provider"],
+                systems["ai_system_prompt"],
+                systems["sql_cache"],
+            )
+        response["processing_time"] = time.perf_counter() - start_time
+        response["question"] = question
+        return response
+
+    return await asyncio.gather(*(process_one(question) for question in questions))
+
+
+async def process_autogen_async(question):
+    """Run a question through a fresh AutoGen multi-agent system on the current event loop"""
     from text_2_sql_core.payloads.interaction_payloads import UserMessagePayload
 
-    # Reload environment variables in the new thread
-    load_dotenv("text_2_sql/.env")
+    try:
+        # A fresh system per question: the agent team keeps its conversation between
+        # runs and can't run two questions at once
+        from autogen_text_2_sql.autogen_text_2_sql import AutoGenText2Sql
+        from autogen_text_2_sql.state_store import InMemoryStateStore
+
+        state_store = InMemoryStateStore()
+        fresh_autogen_system = AutoGenText2Sql(
+            state_store=state_store,
+            thread_id="autogen_thread",
+            use_case="Banking and financial data analysis",
+            enable_cache=True,
+            enable_column_value_store=True,
+        )
 
-    # Verify key environment variables are loaded
-    logger.info(f"Thread ENV - SPIDER_DATA_DIR: {os.getenv('SPIDER_DATA_DIR')}")
-    logger.info(
-        f"Thread ENV - Text2Sql__DatabaseEngine: {os.getenv('Text2Sql__DatabaseEngine')}"
-    )
-    logger.info(
-        f"Thread ENV - Text2Sql__Sqlite__Database: {os.getenv('Text2Sql__Sqlite__Database')}"
-    )
+        # Create the user message payload
+        payload = UserMessagePayload(user_message=question, injected_parameters={})
 
-    async def run_autogen():
-        try:
-            # Create a fresh AutoGen system in this thread to avoid event loop conflicts
-            text_2_sql_path = Path("text_2_sql/text_2_sql_core/src")
-            autogen_path = Path("text_2_sql/autogen/src")
-
-            if str(text_2_sql_path) not in sys.path:
-                sys.path.insert(0, str(text_2_sql_path))
-            if str(autogen_path) not in sys.path:
-                sys.path.insert(0, str(autogen_path))
-
-            from autogen_text_2_sql.autogen_text_2_sql import AutoGenText2Sql
-            from autogen_text_2_sql.state_store import InMemoryStateStore
-
-            # Create a new AutoGen system instance in this thread with proper state store
-            state_store = InMemoryStateStore()
-            fresh_autogen_system = AutoGenText2Sql(
-                state_store=state_store,
-                thread_id="autogen_thread",
-                use_case="Banking and financial data analysis",
-                enable_cache=True,
-                enable_column_value_store=True,
-            )
+        # Process the message using the correct method
+        response_data = None
+        async for response_payload in fresh_autogen_system.process_user_message(
+            "thread_1", payload
+        ):
+            payload_type = getattr(response_payload, "payload_type", None)
+            if payload_type is not None and payload_type.value != "processing_update":
+                response_data = response_payload
+                break
 
-            # Create the user message payload
-            payload = UserMessagePayload(user_message=question, injected_parameters={})
+        if not response_data:
+            return {
+                "method": "AutoGen Multi-Agent",
+                "success": False,
+                "error": "No response received from AutoGen system",
+            }
 
-            # Process the message using the correct method
-            response_data = None
-            async for response_payload in fresh_autogen_system.process_user_message(
-                "thread_1", payload
-            ):
-                if (
-                    hasattr(response_payload, "payload_type")
-                    and response_payload.payload_type.value != "processing_update"
-                ):
-                    response_data = response_payload
-                    break
-
-            if not response_data:
-                return {
-                    "method": "AutoGen Multi-Agent",
-                    "success": False,
-                    "error": "No response received from AutoGen system",
-                }
-
-            # Parse AutoGen response based on payload type
-            response_type = response_data.payload_type.value if hasattr(response_data, 'payload_type') else 'unknown'
+        # Parse AutoGen response based on payload type; each attribute is resolved once
+        # with a default rather than probed with hasattr first
+        response_type = getattr(
+            getattr(response_data, "payload_type", None), "value", "unknown"
+        )
+        body = getattr(response_data, "body", None)
+
+        # Handle disambiguation requests (user choices)
+        if response_type == 'disambiguation_requests':
+            disambiguation_requests = getattr(body, 'disambiguation_requests', [])
             
-            # Handle disambiguation requests (user choices)
-            if response_type == 'disambiguation_requests':
-                disambiguation_requests = getattr(response_data.body, 'disambiguation_requests', [])
-                
-                # Extract user choices and questions
-                user_choices = []
-                clarification_questions = []
-                
-                for req in disambiguation_requests:
-                    if hasattr(req, 'assistant_question') and req.assistant_question:
-                        clarification_questions.append(req.assistant_question)
-                    if hasattr(req, 'user_choices') and req.user_choices:
-                        user_choices.extend(req.user_choices)
-                
-                return {
-                    "method": "AutoGen Multi-Agent",
-                    "response_type": "disambiguation",
-                    "clarification_questions": clarification_questions,
-                    "user_choices": user_choices,
-                    "success": True,
-                    "explanation": "AutoGen is requesting clarification to provide better analysis",
-                }
+            # Extract user choices and questions
+            user_choices = []
+            clarification_questions = []
+            
+            for req in disambiguation_requests:
+                # Both are declared model fields, so no attribute probing is needed
+                if req.assistant_question:
+                    clarification_questions.append(req.assistant_question)
+                if req.user_choices:
+                    user_choices.extend(req.user_choices)
             
-            # Handle answer with sources (normal response)
-            elif response_type == 'answer_with_sources' or hasattr(response_data, "body"):
-                sources = (
-                    getattr(response_data.body, "sources", [])
-                    if hasattr(response_data, "body")
-                    else []
-                )
-                sql_query = None
-                results = []
-
-                for source in sources:
-                    if hasattr(source, "sql_query"):
-                        sql_query = source.sql_query
-                    if hasattr(source, "sql_rows"):
-                        results = source.sql_rows
-
-                # Check for follow-up suggestions
-                follow_up_suggestions = []
-                if hasattr(response_data.body, 'follow_up_suggestions'):
-                    follow_up_suggestions = response_data.body.follow_up_suggestions
-
-                # Get answer safely
-                answer = getattr(response_data, 'answer', None) or getattr(response_data.body, 'answer', 'Analysis completed successfully')
-
-                return {
-                    "method": "AutoGen Multi-Agent",
-                    "response_type": "answer",
-                    "answer": answer,
-                    "sql_query": sql_query,
-                    "results": results,
-                    "follow_up_suggestions": follow_up_suggestions,
-                    "sources": (
-                        [
-                            {"sql_query": s.sql_query, "sql_rows": s.sql_rows}
-                            for s in sources
-                        ]
-                        if sources
-                        else []
-                    ),
-                    "success": True,
-                    "explanation": "AutoGen multi-agent processing completed",
-                }
-
             return {
                 "method": "AutoGen Multi-Agent",
-                "response_type": "unknown",
-                "answer": str(response_data),
-                "sql_query": None,
-                "results": None,
+                "response_type": "disambiguation",
+                "clarification_questions": clarification_questions,
+                "user_choices": user_choices,
                 "success": True,
-                "explanation": f"AutoGen processing completed (type: {response_type})",
+                "explanation": "AutoGen is requesting clarification to provide better analysis",
             }
+        
+        # Handle answer with sources (normal response)
+        elif response_type == 'answer_with_sources' or body is not None:
+            sources = getattr(body, "sources", None) or []
+            sql_query = None
+            results = []
 
-        except Exception as e:
-            logger.error(f"AutoGen processing failed: {e}")
-            import traceback
+            for source in sources:
+                sql_query = getattr(source, "sql_query", sql_query)
+                results = getattr(source, "sql_rows", results)
+
+            # Check for follow-up suggestions
+            follow_up_suggestions = getattr(body, "follow_up_suggestions", [])
+
+            # Get answer safely
+            answer = getattr(response_data, 'answer', None) or getattr(body, 'answer', 'Analysis completed successfully')
 
-            logger.error(f"AutoGen traceback: {traceback.format_exc()}")
             return {
                 "method": "AutoGen Multi-Agent",
-                "success": False,
-                "error": f"AutoGen processing failed: {str(e)}",
+                "response_type": "answer",
+                "answer": answer,
+                "sql_query": sql_query,
+                "results": results,
+                "follow_up_suggestions": follow_up_suggestions,
+                "sources": (
+                    [
+                        {"sql_query": s.sql_query, "sql_rows": s.sql_rows}
+                        for s in sources
+                    ]
+                    if sources
+                    else []
+                ),
+                "success": True,
+                "explanation": "AutoGen multi-agent processing completed",
             }
 
+        return {
+            "method": "AutoGen Multi-Agent",
+            "response_type": "unknown",
+            "answer": str(response_data),
+            "sql_query": None,
+            "results": None,
+            "success": True,
+            "explanation": f"AutoGen processing completed (type: {response_type})",
+        }
+
+    except Exception as e:
+        logger.error(f"AutoGen processing failed: {e}")
+        import traceback
+
+        logger.error(f"AutoGen traceback: {traceback.format_exc()}")
+        return {
+            "method": "AutoGen Multi-Agent",
+            "success": False,
+            "error": f"AutoGen processing failed: {str(e)}",
+        }
+
+
+def process_autogen_sync(question):
+    """Synchronous wrapper for AutoGen multi-agent system - creates fresh system in isolated thread"""
     # Run in a new event loop in the current thread
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     try:
-        result = loop.run_until_complete(run_autogen())
+        result = loop.run_until_complete(process_autogen_async(question))
         return result
     finally:
+        # Lets the per-loop HTTP and model clients close before the loop goes away
+        loop.run_until_complete(loop.shutdown_asyncgens())
         loop.close()
 
 
-async def process_autogen(question, autogen_system):
-    """Process using AutoGen multi-agent system - thread-safe wrapper"""
-    import concurrent.futures
-    import threading
+class EventLoopWorker:
+    """Runs the app's queries on one background event loop that lives as long as the app.
+
+    The LLM client's connection pool and AutoGen's model and HTTP clients are tied to
+    the event loop they were first used on, so a loop kept between questions lets each
+    question reuse them rather than set them up again. Sessions hand their coroutines
+    over thread-safely, so they can share the loop."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="query-worker", daemon=True
+        )
+        self.thread.start()
+
+        # Caps concurrent database queries across all sessions, which all share this loop
+        self.db_semaphore = self.run(self._create_db_semaphore())
+
+    @staticmethod
+    async def _create_db_semaphore():
+        """Create the database semaphore on the worker loop it is used from"""
+        return asyncio.Semaphore(int(os.getenv("DB_CONCURRENCY", "4")))
+
+    def run(self, coroutine):
+        """Run the coroutine on the worker loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
 
+
+@st.cache_resource
+def get_event_loop_worker():
+    """Get the event loop worker, started once and kept across reruns"""
+    return EventLoopWorker()
+
+
+async def process_autogen(question):
+    """Process using AutoGen multi-agent system, with a fresh agent team per question"""
     try:
-        # Run AutoGen in a separate thread to avoid event loop conflicts
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(process_autogen_sync, question)
-            result = future.result(timeout=120)  # 2 minute timeout
-            return result
+        # Timing out cancels the question's task on the worker loop
+        return await asyncio.wait_for(process_autogen_async(question), timeout=120)
 
+    except asyncio.TimeoutError:
+        logger.error("AutoGen processing timed out after 120 seconds")
+        return {
+            "method": "AutoGen Multi-Agent",
+            "success": False,
+            "error": "AutoGen processing timed out after 120 seconds",
+        }
     except Exception as e:
         logger.error(f"AutoGen processing failed: {e}")
         return {"method": "AutoGen Multi-Agent", "success": False, "error": str(e)}
@@ -547,24 +721,20 @@ KEY RELATIONSHIPS:
     return context
 
 
-async def unified_query_processor(question, systems):
-    """Main unified processing logic"""
-    mode = st.session_state.processing_mode
-
-    # Smart Auto mode - detect best approach
-    if mode == "Smart Auto":
-        mode = detect_processing_mode(question)
-        st.info(f"🤖 Auto-selected: **{mode}** processing")
+async def unified_query_processor(question, mode, systems):
+    """Main unified processing logic
 
-    start_time = datetime.now()
+    Runs on the worker loop, so it is given the mode rather than reading session state
+    and must not call Streamlit."""
+    start_time = time.perf_counter()
 
     # Try pattern matching first if not explicitly using other modes
     if mode in ["Smart Auto", "Pattern Match"]:
-        pattern_result = await process_pattern_match(question, systems["db_connector"])
+        pattern_result = await process_pattern_match(
+            question, systems["db_connector"], systems["db_semaphore"]
+        )
         if pattern_result:
-            pattern_result["processing_time"] = (
-                datetime.now() - start_time
-            ).total_seconds()
+            pattern_result["processing_time"] = time.perf_counter() - start_time
             return pattern_result
 
     # Use AI-powered approach
@@ -572,19 +742,19 @@ async def unified_query_processor(question, systems):
         ai_result = await process_ai_powered(
             question,
             systems["db_connector"],
+            systems["db_semaphore"],
             systems["llm_client"],
             systems["llm_provider"],
-            systems["schema_info"],
+            systems["ai_system_prompt"],
+            systems["sql_cache"],
         )
-        ai_result["processing_time"] = (datetime.now() - start_time).total_seconds()
+        ai_result["processing_time"] = time.perf_counter() - start_time
         return ai_result
 
     # Use AutoGen approach
-    if mode == "AutoGen Multi-Agent" and systems["autogen_system"]:
-        autogen_result = await process_autogen(question, systems["autogen_system"])
-        autogen_result["processing_time"] = (
-            datetime.now() - start_time
-        ).total_seconds()
+    if mode == "AutoGen Multi-Agent" and autogen_ready(systems):
+        autogen_result = await process_autogen(question)
+        autogen_result["processing_time"] = time.perf_counter() - start_time
         return autogen_result
 
     # Fallback
@@ -606,7 +776,8 @@ def display_unified_results(response):
     method = response.get("method", "Unknown")
     processing_time = response.get("processing_time", 0)
 
-    run_id = tracker.log_query_experiment(
+    # Only the run is created here; its details are written in the background
+    run_id = tracker.submit_query_experiment(
         question=question,
         approach=method,
         result=response,
@@ -687,19 +858,19 @@ def display_unified_results(response):
             df = pd.DataFrame(response["results"])
 
             if len(df) > 0:
-                # Format numeric columns
+                # Format numeric columns at render time through a Styler, rather than
+                # rewriting every cell as a string (which also keeps sorting numeric)
+                formats = {}
                 for col in df.columns:
                     if df[col].dtype in ["int64", "float64"]:
                         if "balance" in col.lower() or "amount" in col.lower():
-                            df[col] = df[col].apply(
-                                lambda x: f"${x:,.2f}" if pd.notnull(x) else x
-                            )
+                            formats[col] = "${:,.2f}"
                         else:
-                            df[col] = df[col].apply(
-                                lambda x: f"{x:,}" if pd.notnull(x) else x
-                            )
+                            formats[col] = "{:,}"
 
-                st.dataframe(df, use_container_width=True)
+                st.dataframe(
+                    df.style.format(formats, na_rep=""), use_container_width=True
+                )
 
                 # Add insights for delinquency queries
                 if (
@@ -726,6 +897,44 @@ def display_unified_results(response):
     # MLflow feedback collection is handled in main() after display_unified_results
 
 
+# Comprehensive example questions offered in the question picker
+EXAMPLE_QUESTIONS = (
+    "",
+    # Pattern matching examples
+    "How many customers do we have?",
+    "What is our total loan portfolio value?",
+    "What's our loan portfolio size?",
+    "Show me the top 5 customers by loan balance",
+    "Which loans are most likely to go delinquent?",
+    "What's our total customers count?",
+    # AI-powered examples
+    "What percentage of our loan portfolio is considered high risk?",
+    "Show me customers with past due amounts greater than $10,000",
+    "Which customers have risk ratings that don't match their loan performance?",
+    # AutoGen examples (if available)
+    "Perform a comprehensive risk analysis identifying multiple warning signs across our portfolio",
+    "Analyze the correlation between risk ratings, past due amounts, and industry trends",
+)
+
+
+def record_query(question, response):
+    """Add a query to the session history, keeping only what the history panel shows"""
+    st.session_state.query_count += 1
+    st.session_state.query_history.append(
+        {
+            "number": st.session_state.query_count,
+            "question": question,
+            "question_preview": question[:50],
+            "response": {
+                "method": response.get("method", "Unknown"),
+                "success": response.get("success", False),
+                "processing_time": response.get("processing_time"),
+            },
+            "timestamp": time.time(),
+        }
+    )
+
+
 def main():
     """Main unified application"""
 
@@ -743,12 +952,15 @@ def main():
         st.error("❌ Cannot initialize database connection.")
         st.stop()
 
+    # Still False on the first runs while AutoGen loads in the background
+    autogen_available = autogen_ready(systems)
+
     # Sidebar
     with st.sidebar:
         st.header("⚙️ Processing Mode")
 
         mode_options = ["Smart Auto", "Pattern Match", "AI-Powered"]
-        if systems["autogen_system"]:
+        if autogen_available:
             mode_options.append("AutoGen Multi-Agent")
 
         st.session_state.processing_mode = st.selectbox(
@@ -776,19 +988,33 @@ def main():
         else:
             st.write("❌ AI-Powered: Not available")
 
-        if systems["autogen_system"]:
+        if autogen_available:
             st.write("✅ AutoGen: Ready")
+        elif not systems["autogen_future"].done():
+            st.write("⏳ AutoGen: Warming up")
         else:
             st.write("⚠️ AutoGen: Not available")
 
+        # Re-ask every distinct question from the history with the AI at once
+        if systems["llm_client"] and st.session_state.query_history:
+            if st.button("🔁 Re-run history in batch"):
+                questions = list(
+                    dict.fromkeys(q["question"] for q in st.session_state.query_history)
+                )
+                with st.spinner(f"Re-running {len(questions)} questions..."):
+                    responses = get_event_loop_worker().run(
+                        batch_process_ai_powered(questions, systems)
+                    )
+                for response in responses:
+                    record_query(response["question"], response)
+                succeeded = sum(response["success"] for response in responses)
+                st.write(f"✅ {succeeded}/{len(responses)} re-run successfully")
+
         # Database stats
         if systems["schema_info"]:
             st.subheader("📊 Database")
             st.metric("Tables", len(systems["schema_info"]))
-            total_rows = sum(
-                table["row_count"] for table in systems["schema_info"].values()
-            )
-            st.metric("Total Records", f"{total_rows:,}")
+            st.metric("Total Records", f"{systems['total_rows']:,}")
 
         # MLflow tracking statistics
         render_mlflow_stats(st.session_state.mlflow_tracker)
@@ -799,27 +1025,8 @@ def main():
     with col1:
         st.subheader("💬 Ask Your Banking Question")
 
-        # Comprehensive example questions
-        example_questions = [
-            "",
-            # Pattern matching examples
-            "How many customers do we have?",
-            "What is our total loan portfolio value?",
-            "What's our loan portfolio size?",
-            "Show me the top 5 customers by loan balance",
-            "Which loans are most likely to go delinquent?",
-            "What's our total customers count?",
-            # AI-powered examples
-            "What percentage of our loan portfolio is considered high risk?",
-            "Show me customers with past due amounts greater than $10,000",
-            "Which customers have risk ratings that don't match their loan performance?",
-            # AutoGen examples (if available)
-            "Perform a comprehensive risk analysis identifying multiple warning signs across our portfolio",
-            "Analyze the correlation between risk ratings, past due amounts, and industry trends",
-        ]
-
         selected_question = st.selectbox(
-            "Select an example:", example_questions, index=0
+            "Select an example:", EXAMPLE_QUESTIONS, index=0
         )
 
         custom_question = st.text_area(
@@ -828,9 +1035,7 @@ def main():
             placeholder="e.g., Which customers show early warning signs of potential default based on multiple risk factors?",
         )
 
-        final_question = (
-            custom_question.strip() if custom_question.strip() else selected_question
-        )
+        final_question = custom_question.strip() or selected_question
 
         # Execute query
         if st.button("🔍 Process Query", type="primary", disabled=not final_question):
@@ -840,21 +1045,27 @@ def main():
 
                 try:
                     # Record start time for MLflow logging
-                    start_time = time.time()
+                    start_time = time.perf_counter()
 
-                    # Use asyncio.run to handle event loop properly
-                    response = asyncio.run(
-                        unified_query_processor(final_question, systems)
+                    # Smart Auto mode - detect best approach
+                    mode = st.session_state.processing_mode
+                    if mode == "Smart Auto":
+                        mode = detect_processing_mode(final_question)
+                        st.info(f"🤖 Auto-selected: **{mode}** processing")
+
+                    # Run on the shared worker loop rather than a new loop per query
+                    response = get_event_loop_worker().run(
+                        unified_query_processor(final_question, mode, systems)
                     )
 
                     # Calculate execution time and add to response
-                    execution_time = time.time() - start_time
+                    execution_time = time.perf_counter() - start_time
                     response["processing_time"] = execution_time
                     response["question"] = final_question
 
                 except Exception as e:
                     execution_time = (
-                        time.time() - start_time if "start_time" in locals() else 0
+                        time.perf_counter() - start_time if "start_time" in locals() else 0
                     )
                     st.error(f"Error processing query: {e}")
                     response = {
@@ -869,17 +1080,12 @@ def main():
             display_unified_results(response)
 
             # FEEDBACK SECTION
-            if (
-                hasattr(st.session_state, "current_run_id")
-                and st.session_state.current_run_id
-            ):
+            if st.session_state.get("current_run_id"):
                 st.markdown("---")
                 st.subheader("📝 Feedback")
 
-                # Use timestamp to ensure unique keys
-                feedback_key = (
-                    f"feedback_{st.session_state.current_run_id}_{int(time.time())}"
-                )
+                # The run ID is unique per query, so widget keys stay stable across reruns
+                feedback_key = f"feedback_{st.session_state.current_run_id}"
 
                 # Single feedback selectbox
                 feedback_rating = st.selectbox(
@@ -902,7 +1108,8 @@ def main():
                         rating = 1 if feedback_rating == "👍 Helpful" else 0
 
                         try:
-                            st.session_state.mlflow_tracker.log_user_feedback(
+                            # Written in the background so the rerun isn't held up by MLflow I/O
+                            st.session_state.mlflow_tracker.submit_user_feedback(
                                 run_id=st.session_state.current_run_id,
                                 user_rating=rating,
                                 user_comment=feedback_comment,
@@ -910,13 +1117,18 @@ def main():
                             )
 
                             # Show detailed confirmation
-                            success_msg = f"✅ Thank you for your feedback!\n\n"
-                            success_msg += f"**Rating:** {feedback_rating}\n"
+                            success_lines = [
+                                "✅ Thank you for your feedback!",
+                                "",
+                                f"**Rating:** {feedback_rating}",
+                            ]
                             if feedback_comment.strip():
-                                success_msg += f"**Comment:** {feedback_comment}\n"
-                            success_msg += f"**Logged to MLflow run:** `{st.session_state.current_run_id}`"
+                                success_lines.append(f"**Comment:** {feedback_comment}")
+                            success_lines.append(
+                                f"**Logged to MLflow run:** `{st.session_state.current_run_id}`"
+                            )
 
-                            st.success(success_msg)
+                            st.success("\n".join(success_lines))
 
                             # Clear the run_id to prevent duplicate submissions
                             st.session_state.current_run_id = None
@@ -929,24 +1141,18 @@ def main():
                 st.info("💡 Process a query above to provide feedback")
 
             # Add to history
-            st.session_state.query_history.append(
-                {
-                    "question": final_question,
-                    "response": response,
-                    "timestamp": datetime.now(),
-                }
-            )
+            record_query(final_question, response)
 
     with col2:
         st.subheader("📈 Query History")
 
         if st.session_state.query_history:
-            for i, query in enumerate(reversed(st.session_state.query_history[-5:])):
-                with st.expander(f"Query {len(st.session_state.query_history) - i}"):
+            for query in itertools.islice(reversed(st.session_state.query_history), 5):
+                with st.expander(f"Query {query['number']}"):
                     response = query["response"]
                     method = response.get("method", "Unknown")
 
-                    st.write(f"**Question:** {query['question'][:50]}...")
+                    st.write(f"**Question:** {query['question_preview']}...")
                     st.write(f"**Method:** {method}")
                     st.write(f"**Status:** {'✅' if response['success'] else '❌'}")
                     if response.get("processing_time"):